@@ -5,7 +5,9 @@ from __future__ import annotations
 import time
 
 import gymnasium as gym
+import numpy as np
 
+from minigrid.core.reset_stats import ResetStats
 from minigrid.manual_control import ManualControl
 from minigrid.wrappers import ImgObsWrapper, RGBImgPartialObsWrapper
 
@@ -49,6 +51,48 @@ def benchmark(env_id, num_resets, num_frames):
     env.close()
 
 
+def benchmark_resets(env_ids, num_resets, seed=None):
+    """
+    Report the reset latency percentiles of each environment, along with
+    the average work done by the level generator and the reasons levels
+    were rejected for
+    """
+
+    print(
+        f"{'env id':<40} {'mean':>7} {'p50':>7} {'p90':>7} {'p99':>7} {'max':>7}"
+        "  (ms per reset)"
+    )
+    for env_id in env_ids:
+        env = gym.make(env_id)
+        stats = ResetStats()
+        times = np.empty(num_resets)
+        for i in range(num_resets):
+            t0 = time.perf_counter()
+            env.reset(seed=None if seed is None else seed + i)
+            times[i] = time.perf_counter() - t0
+            stats += env.unwrapped.reset_stats
+        env.close()
+
+        times *= 1000
+        p50, p90, p99 = np.percentile(times, [50, 90, 99])
+        print(
+            f"{env_id:<40} {times.mean():7.2f} {p50:7.2f} {p90:7.2f} {p99:7.2f} "
+            f"{times.max():7.2f}"
+        )
+        counters = ", ".join(
+            f"{name}={count / num_resets:.1f}"
+            for name, count in sorted(stats.counters.items())
+        )
+        print(f"    per reset: {counters}")
+        phases = ", ".join(
+            f"{name}={1000 * seconds / num_resets:.2f}"
+            for name, seconds in sorted(stats.phase_times.items())
+        )
+        print(f"    phase times (ms per reset): {phases}")
+        for reason, count in stats.rejections.most_common():
+            print(f"    rejected: {reason} ({count / num_resets:.2f} per reset)")
+
+
 def benchmark_manual_control(env_id, num_resets, num_frames, tile_size):
     env = gym.make(env_id, tile_size=tile_size)
     env = ManualControl(env, seed=args.seed)
@@ -99,8 +143,9 @@ if __name__ == "__main__":
     parser.add_argument(
         "--env-id",
         dest="env_id",
-        help="gym environment to load",
-        default="MiniGrid-LavaGapS7-v0",
+        nargs="+",
+        help="gym environments to load",
+        default=["MiniGrid-LavaGapS7-v0"],
     )
     parser.add_argument(
         "--seed",
@@ -124,9 +169,19 @@ if __name__ == "__main__":
         "--tile-size", type=int, help="size at which to render tiles", default=32
     )
 
-    args = parser.parse_args()
-    benchmark(args.env_id, args.num_resets, args.num_frames)
-
-    benchmark_manual_control(
-        args.env_id, args.num_resets, args.num_frames, args.tile_size
+    parser.add_argument(
+        "--resets",
+        action="store_true",
+        help="only report reset latency percentiles and generator stats",
     )
+
+    args = parser.parse_args()
+    if args.resets:
+        benchmark_resets(args.env_id, args.num_resets, args.seed)
+    else:
+        for env_id in args.env_id:
+            benchmark(env_id, args.num_resets, args.num_frames)
+
+            benchmark_manual_control(
+                env_id, args.num_resets, args.num_frames, args.tile_size
+            )
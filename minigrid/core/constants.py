@@ -56,3 +56,6 @@ DIR_TO_VEC = [
     # Up (negative Y)
     np.array((0, -1)),
 ]
+
+# Same as DIR_TO_VEC, as tuples of Python ints
+DIR_TO_TUPLE = [(1, 0), (0, 1), (-1, 0), (0, -1)]
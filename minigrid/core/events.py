@@ -0,0 +1,38 @@
+# Events recorded by the environment when an action changes its state
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, NamedTuple, Union
+
+if TYPE_CHECKING:
+    from minigrid.core.world_object import WorldObj
+
+
+class Moved(NamedTuple):
+    # The agent moved forward to `pos`
+    pos: tuple[int, int]
+
+
+class Turned(NamedTuple):
+    # The agent turned to face `direction`
+    direction: int
+
+
+class PickedUp(NamedTuple):
+    # The agent picked up `obj` from the cell `pos`
+    obj: WorldObj
+    pos: tuple[int, int]
+
+
+class Dropped(NamedTuple):
+    # The agent dropped `obj` in the cell `pos`
+    obj: WorldObj
+    pos: tuple[int, int]
+
+
+class Toggled(NamedTuple):
+    # The agent toggled `obj` in the cell `pos`, which changed its state
+    obj: WorldObj
+    pos: tuple[int, int]
+
+
+Event = Union[Moved, Turned, PickedUp, Dropped, Toggled]
@@ -1,12 +1,27 @@
 from __future__ import annotations
 
 import math
+from functools import lru_cache
 from typing import Any, Callable
 
 import numpy as np
 
-from minigrid.core.constants import OBJECT_TO_IDX, TILE_PIXELS
-from minigrid.core.world_object import Wall, WorldObj
+from minigrid.core.constants import (
+    COLOR_TO_IDX,
+    DIR_TO_VEC,
+    OBJECT_TO_IDX,
+    STATE_TO_IDX,
+    TILE_PIXELS,
+)
+from minigrid.core.tile_cache import TileCache, tile_key
+from minigrid.core.visibility import compute_visibility
+from minigrid.core.world_object import (
+    Wall,
+    WorldObj,
+    get_objects_state,
+    set_objects_state,
+)
+from minigrid.core.zobrist import cell_key, cell_keys, grid_cell_keys
 from minigrid.utils.rendering import (
     downsample,
     fill_coords,
@@ -16,14 +31,113 @@ from minigrid.utils.rendering import (
     rotate_fn,
 )
 
+# Encoding of a cell that holds no object
+EMPTY_ENCODING = (OBJECT_TO_IDX["empty"], 0, 0)
+
+# Encoding of the walls seen outside of the grid
+WALL_ENCODING = (OBJECT_TO_IDX["wall"], COLOR_TO_IDX["grey"], 0)
+
+
+@lru_cache(maxsize=None)
+def _rotate_left_index(width: int, height: int) -> tuple[int, ...]:
+    """
+    Flat source index of every cell of a (width, height) grid rotated left
+    """
+
+    return tuple(
+        x * width + (width - 1 - y) for y in range(width) for x in range(height)
+    )
+
+
+@lru_cache(maxsize=None)
+def _view_deltas(agent_dir: int, view_size: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Position, relative to the agent, of the cells seen by an agent facing
+    `agent_dir`. Entry [i, j] maps to cell (i, j) of the egocentric view.
+    """
+
+    fx, fy = DIR_TO_VEC[agent_dir]
+    rx, ry = -fy, fx
+    vi, vj = np.meshgrid(np.arange(view_size), np.arange(view_size), indexing="ij")
+    forward = view_size - 1 - vj
+    right = vi - view_size // 2
+    dx = fx * forward + rx * right
+    dy = fy * forward + ry * right
+    dx.flags.writeable = False
+    dy.flags.writeable = False
+    return dx, dy
+
+
+@lru_cache(maxsize=None)
+def _view_offsets(agent_dir: int, view_size: int, stride: int) -> np.ndarray:
+    """
+    Same as `_view_deltas`, as offsets into a flattened grid whose columns
+    are `stride` cells long
+    """
+
+    dx, dy = _view_deltas(agent_dir, view_size)
+    offsets = dx * stride + dy
+    offsets.flags.writeable = False
+    return offsets
+
+
+# Bounds of the encoding fields that tile codes can represent
+TILE_CODE_BOUNDS = (len(OBJECT_TO_IDX), len(COLOR_TO_IDX), len(STATE_TO_IDX))
+
+# Number of (type, color, state, agent_dir, highlight) tile codes, where the
+# agent direction is stored as 0 for no agent and 1 + agent_dir otherwise
+NUM_TILE_CODES = int(np.prod(TILE_CODE_BOUNDS)) * 5 * 2
+
+
+class TileAtlas:
+    """
+    Tiles of one size indexed by tile code, to gather the tiles of a whole
+    frame at once. Rows are allocated as tiles are added, the first time a
+    frame needs them.
+    """
+
+    def __init__(self, tile_size: int):
+        self.tile_size = tile_size
+        # Row of the tile of each code, or -1 if it was not added yet
+        self.rows = np.full(NUM_TILE_CODES, -1, dtype=np.int32)
+        self.tiles = np.zeros((0, tile_size, tile_size, 3), dtype=np.uint8)
+        self.num_tiles = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.rows.nbytes + self.tiles.nbytes
+
+    def add(self, code: int, tile: np.ndarray):
+        """
+        Add the tile of a code, growing the rows geometrically
+        """
+
+        if self.num_tiles == len(self.tiles):
+            tiles = np.zeros(
+                (max(8, 2 * len(self.tiles)), *self.tiles.shape[1:]), dtype=np.uint8
+            )
+            tiles[: self.num_tiles] = self.tiles
+            self.tiles = tiles
+        self.tiles[self.num_tiles] = tile
+        self.rows[code] = self.num_tiles
+        self.num_tiles += 1
+
+    def gather(self, codes: np.ndarray) -> np.ndarray:
+        """
+        Tiles of an array of codes, which must all have been added
+        """
+
+        return self.tiles[self.rows[codes]]
+
 
 class Grid:
     """
     Represent a grid and operations on it
     """
 
-    # Static cache of pre-renderer tiles
-    tile_cache: dict[tuple[Any, ...], Any] = {}
+    # Static cache of pre-rendered tiles and of the tile atlases, bounded
+    # and local to each process
+    tile_cache: TileCache = TileCache()
 
     def __init__(self, width: int, height: int):
         assert width >= 3
@@ -32,27 +146,222 @@ class Grid:
         self.width: int = width
         self.height: int = height
 
+        # Side table of the objects in each cell, indexed by j * width + i
         self.grid: list[WorldObj | None] = [None] * (width * height)
 
+        # Encoding of every cell, indexed by [i, j]. This array is the source
+        # of truth for encoding, slicing, rotating and comparing grids and
+        # is kept in sync with the side table by `set` and `refresh_cell`.
+        state = np.empty((width, height, 3), dtype=np.uint8)
+        state[:, :] = EMPTY_ENCODING
+
+        # Cells that cannot be seen through, used to compute visibility
+        opaque = np.zeros((width, height), dtype=bool)
+
+        # Number of changes made to the grid, so that consumers can tell
+        # whether it changed since they last looked at it without hashing it
+        self.version: int = 0
+
+        self._set_arrays(state, opaque)
+
+    def _set_arrays(self, state: np.ndarray, opaque: np.ndarray):
+        """
+        Use the given unpadded arrays as storage for this grid
+        """
+
+        # Both arrays are views into storage that can be padded with walls
+        # so that agent views can be gathered without bounds checks
+        self._pad = 0
+        self._padded_state = self._state = state
+        self._padded_opaque = self._opaque = opaque
+        self._rehash()
+
+    def _rehash(self):
+        """
+        Forget the Zobrist keys of the cells, which are recomputed from the
+        encoding the next time the hash is read. Grids whose hash is never
+        read, such as agent views, never compute it.
+        """
+
+        self.version += 1
+        self._cell_keys: list[int] | None = None
+        self._zobrist_hash = 0
+
+    def _hash_cells(self):
+        self._zobrist_keys = cell_keys(self.width, self.height)
+        keys = grid_cell_keys(self._zobrist_keys, self._state)
+        self._cell_keys = keys.tolist()
+        self._zobrist_hash = int(np.bitwise_xor.reduce(keys))
+
+    def _set_cell_key(self, idx: int, encoding: tuple[int, int, int]):
+        # Keys are only updated once the hash has been computed
+        if self._cell_keys is None:
+            return
+        key = cell_key(self._zobrist_keys, idx, encoding)
+        self._zobrist_hash ^= self._cell_keys[idx] ^ key
+        self._cell_keys[idx] = key
+
+    @property
+    def zobrist_hash(self) -> int:
+        """
+        64-bit Zobrist hash of the grid encoding: the XOR of one random key
+        per (cell, encoding) pair, computed the first time it is read and
+        then updated in O(1) when a cell changes
+        """
+
+        if self._cell_keys is None:
+            self._hash_cells()
+        return self._zobrist_hash
+
+    def _ensure_pad(self, pad: int):
+        """
+        Surround the storage with at least `pad` cells of walls
+        """
+
+        if pad <= self._pad:
+            return
+
+        width, height = self.width, self.height
+        padded_state = np.empty((width + 2 * pad, height + 2 * pad, 3), np.uint8)
+        padded_state[:, :] = WALL_ENCODING
+        padded_opaque = np.ones((width + 2 * pad, height + 2 * pad), dtype=bool)
+
+        inner = (slice(pad, pad + width), slice(pad, pad + height))
+        padded_state[inner] = self._state
+        padded_opaque[inner] = self._opaque
+
+        self._pad = pad
+        self._padded_state = padded_state
+        self._padded_opaque = padded_opaque
+        self._state = padded_state[inner]
+        self._opaque = padded_opaque[inner]
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Views into the padded storage do not survive pickling or deep
+        # copies, only store the grid itself
+        state = self.__dict__.copy()
+        state["_state"] = self._state.copy()
+        state["_opaque"] = self._opaque.copy()
+        del state["_pad"], state["_padded_state"], state["_padded_opaque"]
+        del state["_cell_keys"], state["_zobrist_hash"]
+        state.pop("_zobrist_keys", None)
+
+        # Objects are pickled without their grid, remember which ones this
+        # grid holds
+        state["_owned"] = [
+            idx
+            for idx, obj in enumerate(self.grid)
+            if obj is not None and self._owns(obj, idx)
+        ]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]):
+        owned = state.pop("_owned", [])
+        self.__dict__.update(state)
+        self._set_arrays(self._state, self._opaque)
+        for idx in owned:
+            self.grid[idx]._grid_cell = (self, idx)
+
+    def _owns(self, obj: WorldObj, idx: int) -> bool:
+        """
+        Whether `obj` is held by the cell at flat index `idx` of this grid
+        """
+
+        cell = obj._grid_cell
+        return cell is not None and cell[0] is self and cell[1] == idx
+
+    def snapshot(self) -> tuple[Any, ...]:
+        """
+        Capture the contents of the grid, to be restored with `restore`.
+        Objects are referenced rather than copied, along with a copy of
+        their attributes.
+        """
+
+        return (
+            self._state.copy(),
+            self._opaque.copy(),
+            tuple(self.grid),
+            get_objects_state(self.grid),
+        )
+
+    def restore(self, snapshot: tuple[Any, ...]):
+        """
+        Restore contents captured by `snapshot`, on a grid of the same size
+        """
+
+        state, opaque, objects, objects_state = snapshot
+        for idx, obj in enumerate(self.grid):
+            if obj is not None and self._owns(obj, idx):
+                obj._grid_cell = None
+
+        self._state[:] = state
+        self._opaque[:] = opaque
+        self.grid[:] = objects
+        for idx, obj in enumerate(objects):
+            if obj is not None:
+                obj._grid_cell = (self, idx)
+        set_objects_state(objects_state)
+        self._rehash()
+
+    @property
+    def state(self) -> np.ndarray:
+        """
+        Read-only (width, height, 3) view of the grid encoding
+        """
+
+        view = self._state.view()
+        view.flags.writeable = False
+        return view
+
     def __contains__(self, key: Any) -> bool:
         if isinstance(key, WorldObj):
-            for e in self.grid:
-                if e is key:
-                    return True
+            return any(e is key for e in self.grid)
         elif isinstance(key, tuple):
-            for e in self.grid:
-                if e is None:
-                    continue
-                if (e.color, e.type) == key:
-                    return True
-                if key[0] is None and key[1] == e.type:
-                    return True
+            color, obj_type = key
+            if obj_type in ("unseen", "empty") or obj_type not in OBJECT_TO_IDX:
+                return False
+            match = self._state[:, :, 0] == OBJECT_TO_IDX[obj_type]
+            if color is not None:
+                if color not in COLOR_TO_IDX:
+                    return False
+                match &= self._state[:, :, 1] == COLOR_TO_IDX[color]
+            return bool(match.any())
         return False
 
+    def find(
+        self, obj_type: str | None = None, color: str | None = None
+    ) -> list[tuple[int, int]]:
+        """
+        Positions of the objects of type `obj_type` and color `color`, of
+        any type or color when None, ordered by column then row. The
+        encoding of the grid serves as the index of the objects.
+        """
+
+        if obj_type is None:
+            match = self._state[:, :, 0] != OBJECT_TO_IDX["empty"]
+        elif obj_type in ("unseen", "empty") or obj_type not in OBJECT_TO_IDX:
+            return []
+        else:
+            match = self._state[:, :, 0] == OBJECT_TO_IDX[obj_type]
+        if color is not None:
+            if color not in COLOR_TO_IDX:
+                return []
+            match &= self._state[:, :, 1] == COLOR_TO_IDX[color]
+
+        return [divmod(idx, self.height) for idx in np.flatnonzero(match).tolist()]
+
+    def obj_pos(self, obj: WorldObj) -> tuple[int, int] | None:
+        """
+        Position of `obj` in the grid, or None if it is not held by the grid
+        """
+
+        cell = obj._grid_cell
+        if cell is None or cell[0] is not self:
+            return None
+        return cell[1] % self.width, cell[1] // self.width
+
     def __eq__(self, other: Grid) -> bool:
-        grid1 = self.encode()
-        grid2 = other.encode()
-        return np.array_equal(grid2, grid1)
+        return np.array_equal(other._state, self._state)
 
     def __ne__(self, other: Grid) -> bool:
         return not self == other
@@ -69,7 +378,70 @@ class Grid:
         assert (
             0 <= j < self.height
         ), f"row index {j} outside of grid of height {self.height}"
-        self.grid[j * self.width + i] = v
+        idx = j * self.width + i
+
+        # Release the previous object if this cell owns it
+        old = self.grid[idx]
+        if old is not None and self._owns(old, idx):
+            old._grid_cell = None
+
+        self.grid[idx] = v
+        self.version += 1
+
+        if v is None:
+            self._state[i, j] = EMPTY_ENCODING
+            self._opaque[i, j] = False
+            self._set_cell_key(idx, EMPTY_ENCODING)
+        else:
+            v._grid_cell = (self, idx)
+            encoding = v.encode()
+            self._state[i, j] = encoding
+            self._opaque[i, j] = not v.see_behind()
+            self._set_cell_key(idx, encoding)
+
+    def refresh_cell(self, idx: int):
+        """
+        Re-encode the cell at flat index `idx` after its object changed
+        """
+
+        v = self.grid[idx]
+        i, j = idx % self.width, idx // self.width
+        self.version += 1
+        if v is None:
+            self._state[i, j] = EMPTY_ENCODING
+            self._opaque[i, j] = False
+            self._set_cell_key(idx, EMPTY_ENCODING)
+        else:
+            encoding = v.encode()
+            self._state[i, j] = encoding
+            self._opaque[i, j] = not v.see_behind()
+            self._set_cell_key(idx, encoding)
+
+    def move_objs(self, moves: list[tuple[tuple[int, int], tuple[int, int]]]):
+        """
+        Apply `(src, dst)` moves in order, each moving the object of the cell
+        `src` to the empty cell `dst` and leaving `src` empty
+        """
+
+        state, opaque, cells = self._state, self._opaque, self.grid
+        self.version += 1
+        for (si, sj), (di, dj) in moves:
+            src_idx = sj * self.width + si
+            dst_idx = dj * self.width + di
+            obj = cells[src_idx]
+            encoding = tuple(state[si, sj].tolist())
+
+            cells[src_idx] = None
+            state[si, sj] = EMPTY_ENCODING
+            opaque[di, dj] = opaque[si, sj]
+            opaque[si, sj] = False
+            self._set_cell_key(src_idx, EMPTY_ENCODING)
+
+            cells[dst_idx] = obj
+            if obj is not None:
+                obj._grid_cell = (self, dst_idx)
+            state[di, dj] = encoding
+            self._set_cell_key(dst_idx, encoding)
 
     def get(self, i: int, j: int) -> WorldObj | None:
         assert 0 <= i < self.width
@@ -114,10 +486,12 @@ class Grid:
 
         grid = Grid(self.height, self.width)
 
-        for i in range(self.width):
-            for j in range(self.height):
-                v = self.get(i, j)
-                grid.set(j, grid.height - 1 - i, v)
+        # Cell (i, j) moves to (j, width - 1 - i)
+        grid._set_arrays(
+            np.ascontiguousarray(self._state.transpose(1, 0, 2)[:, ::-1]),
+            np.ascontiguousarray(self._opaque.T[:, ::-1]),
+        )
+        grid.grid = [self.grid[k] for k in _rotate_left_index(self.width, self.height)]
 
         return grid
 
@@ -128,20 +502,83 @@ class Grid:
 
         grid = Grid(width, height)
 
-        for j in range(0, height):
-            for i in range(0, width):
-                x = topX + i
-                y = topY + j
+        # Cells outside of the grid are seen as walls
+        wall = Wall()
+        grid._state[:, :] = wall.encode()
+        grid._opaque[:, :] = True
+        objs: list[WorldObj | None] = [wall] * (width * height)
+
+        # Copy the part of the window that overlaps this grid
+        x0, y0 = max(topX, 0), max(topY, 0)
+        x1, y1 = min(topX + width, self.width), min(topY + height, self.height)
+        if x0 < x1 and y0 < y1:
+            dst_x = slice(x0 - topX, x1 - topX)
+            dst_y = slice(y0 - topY, y1 - topY)
+            grid._state[dst_x, dst_y] = self._state[x0:x1, y0:y1]
+            grid._opaque[dst_x, dst_y] = self._opaque[x0:x1, y0:y1]
+            for y in range(y0, y1):
+                dst = (y - topY) * width + (x0 - topX)
+                src = y * self.width + x0
+                objs[dst : dst + x1 - x0] = self.grid[src : src + x1 - x0]
+
+        grid.grid = objs
+        grid._rehash()
 
-                if 0 <= x < self.width and 0 <= y < self.height:
-                    v = self.get(x, y)
-                else:
-                    v = Wall()
+        return grid
 
-                grid.set(i, j, v)
+    def gather_view(
+        self, agent_pos: tuple[int, int], agent_dir: int, view_size: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get the encoding and opacity of the square view of an agent,
+        already rotated so that the agent sits at the bottom center facing
+        up. This is equivalent to slicing the view extents and rotating the
+        result, but done in one gather without building intermediate grids.
+        Cells outside of the grid are seen as walls.
+        """
+
+        self._ensure_pad(view_size)
+
+        stride = self.height + 2 * self._pad
+        base = (agent_pos[0] + self._pad) * stride + (agent_pos[1] + self._pad)
+        idx = _view_offsets(agent_dir, view_size, stride) + base
+
+        state = self._padded_state.reshape(-1, 3).take(idx, axis=0)
+        opaque = self._padded_opaque.reshape(-1).take(idx)
+
+        return state, opaque
+
+    def view(self, agent_pos: tuple[int, int], agent_dir: int, view_size: int) -> Grid:
+        """
+        Get the square view of an agent as a new grid, laid out like
+        `gather_view`
+        """
+
+        grid = Grid(view_size, view_size)
+        grid._set_arrays(*self.gather_view(agent_pos, agent_dir, view_size))
+        grid.grid = self.view_objects(agent_pos, agent_dir, view_size)
 
         return grid
 
+    def view_objects(
+        self, agent_pos: tuple[int, int], agent_dir: int, view_size: int
+    ) -> list[WorldObj | None]:
+        """
+        Objects in the view of an agent, laid out like `gather_view`
+        and flattened in the order of `Grid.grid`
+        """
+
+        dx, dy = _view_deltas(agent_dir, view_size)
+        ax, ay = agent_pos
+        wall = Wall()
+        objs: list[WorldObj | None] = []
+        for x, y in zip((dx.T + ax).ravel().tolist(), (dy.T + ay).ravel().tolist()):
+            if 0 <= x < self.width and 0 <= y < self.height:
+                objs.append(self.grid[y * self.width + x])
+            else:
+                objs.append(wall)
+        return objs
+
     @classmethod
     def render_tile(
         cls,
@@ -156,11 +593,30 @@ class Grid:
         """
 
         # Hash map lookup key for the cache
-        key: tuple[Any, ...] = (agent_dir, highlight, tile_size)
-        key = obj.encode() + key if obj else key
+        key = tile_key(obj, agent_dir, highlight, tile_size)
+
+        cached = cls.tile_cache.get(key)
+        if cached is not None:
+            return cached
+
+        img = cls.draw_tile(obj, agent_dir, highlight, tile_size, subdivs)
+
+        # Cache the rendered tile
+        cls.tile_cache[key] = img
+
+        return img
 
-        if key in cls.tile_cache:
-            return cls.tile_cache[key]
+    @staticmethod
+    def draw_tile(
+        obj: WorldObj | None,
+        agent_dir: int | None = None,
+        highlight: bool = False,
+        tile_size: int = TILE_PIXELS,
+        subdivs: int = 3,
+    ) -> np.ndarray:
+        """
+        Render a tile, without caching it
+        """
 
         img = np.zeros(
             shape=(tile_size * subdivs, tile_size * subdivs, 3), dtype=np.uint8
@@ -190,12 +646,36 @@ class Grid:
             highlight_img(img)
 
         # Downsample the image to perform supersampling/anti-aliasing
-        img = downsample(img, subdivs)
+        return downsample(img, subdivs)
 
-        # Cache the rendered tile
-        cls.tile_cache[key] = img
+    def tile_codes(
+        self,
+        agent_pos: tuple[int, int] | None = None,
+        agent_dir: int | None = None,
+        highlight_mask: np.ndarray | None = None,
+    ) -> np.ndarray | None:
+        """
+        Atlas index of the tile of every cell, as a (width, height) array,
+        or None if some cell has an encoding outside of the atlas bounds
+        """
 
-        return img
+        state = self._state.astype(np.int64)
+        if (state >= TILE_CODE_BOUNDS).any():
+            return None
+
+        type_bound, color_bound, state_bound = TILE_CODE_BOUNDS
+        codes = (state[..., 0] * color_bound + state[..., 1]) * state_bound
+        codes = (codes + state[..., 2]) * 10
+
+        if agent_pos is not None and agent_dir is not None:
+            i, j = agent_pos
+            if 0 <= i < self.width and 0 <= j < self.height:
+                codes[i, j] += 2 * (1 + agent_dir)
+
+        if highlight_mask is not None:
+            codes += np.asarray(highlight_mask, dtype=bool)
+
+        return codes
 
     def render(
         self,
@@ -210,6 +690,45 @@ class Grid:
         :param tile_size: tile size in pixels
         """
 
+        codes = self.tile_codes(agent_pos, agent_dir, highlight_mask)
+        if codes is None:
+            return self._render_cells(tile_size, agent_pos, agent_dir, highlight_mask)
+
+        atlas = Grid.tile_cache.get_atlas(tile_size) or TileAtlas(tile_size)
+
+        # Render the tiles seen for the first time from a cell using them
+        missing = codes[atlas.rows[codes] < 0]
+        if missing.size:
+            for code in np.unique(missing).tolist():
+                i, j = np.argwhere(codes == code)[0]
+                dir_slot = code // 2 % 5
+                tile = Grid.render_tile(
+                    self.get(i, j),
+                    agent_dir=dir_slot - 1 if dir_slot else None,
+                    highlight=bool(code % 2),
+                    tile_size=tile_size,
+                )
+                atlas.add(code, tile)
+            # Count the new tiles against the bounds of the cache
+            Grid.tile_cache.put_atlas(tile_size, atlas)
+
+        # Gather the tiles of all the cells and lay them out row by row
+        tiles = atlas.gather(codes)
+        return tiles.transpose(1, 2, 0, 3, 4).reshape(
+            self.height * tile_size, self.width * tile_size, 3
+        )
+
+    def _render_cells(
+        self,
+        tile_size: int,
+        agent_pos: tuple[int, int],
+        agent_dir: int | None = None,
+        highlight_mask: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """
+        Render this grid tile by tile, for encodings not covered by atlases
+        """
+
         if highlight_mask is None:
             highlight_mask = np.zeros(shape=(self.width, self.height), dtype=bool)
 
@@ -247,25 +766,10 @@ class Grid:
         """
 
         if vis_mask is None:
-            vis_mask = np.ones((self.width, self.height), dtype=bool)
-
-        array = np.zeros((self.width, self.height, 3), dtype="uint8")
+            return self._state.copy()
 
-        for i in range(self.width):
-            for j in range(self.height):
-                assert vis_mask is not None
-                if vis_mask[i, j]:
-                    v = self.get(i, j)
-
-                    if v is None:
-                        array[i, j, 0] = OBJECT_TO_IDX["empty"]
-                        array[i, j, 1] = 0
-                        array[i, j, 2] = 0
-
-                    else:
-                        array[i, j, :] = v.encode()
-
-        return array
+        # Cells outside of the visibility mask are encoded as zeros (unseen)
+        return np.where(np.asarray(vis_mask, dtype=bool)[:, :, None], self._state, 0)
 
     @staticmethod
     def decode(array: np.ndarray) -> tuple[Grid, np.ndarray]:
@@ -289,40 +793,19 @@ class Grid:
         return grid, vis_mask
 
     def process_vis(self, agent_pos: tuple[int, int]) -> np.ndarray:
-        mask = np.zeros(shape=(self.width, self.height), dtype=bool)
-
-        mask[agent_pos[0], agent_pos[1]] = True
-
-        for j in reversed(range(0, self.height)):
-            for i in range(0, self.width - 1):
-                if not mask[i, j]:
-                    continue
-
-                cell = self.get(i, j)
-                if cell and not cell.see_behind():
-                    continue
-
-                mask[i + 1, j] = True
-                if j > 0:
-                    mask[i + 1, j - 1] = True
-                    mask[i, j - 1] = True
-
-            for i in reversed(range(1, self.width)):
-                if not mask[i, j]:
-                    continue
-
-                cell = self.get(i, j)
-                if cell and not cell.see_behind():
-                    continue
+        """
+        Compute which cells are visible from `agent_pos` and clear the
+        cells that are not
+        """
 
-                mask[i - 1, j] = True
-                if j > 0:
-                    mask[i - 1, j - 1] = True
-                    mask[i, j - 1] = True
+        mask = compute_visibility(self._opaque, agent_pos)
 
-        for j in range(0, self.height):
-            for i in range(0, self.width):
-                if not mask[i, j]:
-                    self.set(i, j, None)
+        hidden = ~mask
+        self._state[hidden] = EMPTY_ENCODING
+        self._opaque[hidden] = False
+        for idx in np.flatnonzero(hidden.T).tolist():
+            if self.grid[idx] is not None:
+                self.set(idx % self.width, idx // self.width, None)
+        self._rehash()
 
         return mask
@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import pickle
+import zipfile
+from typing import Any, Iterable
+
+import gymnasium as gym
+import numpy as np
+
+from minigrid.core.constants import OBJECT_TO_IDX
+from minigrid.core.grid import Grid
+from minigrid.core.tile_cache import load_npz_member
+from minigrid.core.world_object import Wall, WorldObj
+
+_MISSING = object()
+
+
+class _LevelRecorder:
+    """
+    Level option that generates the grid with `_gen_grid` and records it,
+    along with the attributes of the environment that `_gen_grid` sets
+    """
+
+    def build(self, env):
+        before = dict(vars(env))
+        env._gen_grid(env.width, env.height)
+
+        # Attributes may be set to the values they already had in this
+        # environment, always record the ones that describe the episode
+        recorded = {"mission", "agent_pos", "agent_dir", *env.state_attrs}
+        attrs = {
+            name: value
+            for name, value in vars(env).items()
+            if name in recorded or before.get(name, _MISSING) is not value
+        }
+
+        # The rest of `reset` may modify the level, serialize it now
+        grid = attrs.pop("grid", env.grid)
+        objects = {
+            idx: obj
+            for idx, obj in enumerate(grid.grid)
+            if obj is not None and type(obj) is not Wall
+        }
+        self.encoding = grid.encode()
+        self.agent_pos = tuple(int(x) for x in env.agent_pos)
+        self.agent_dir = int(env.agent_dir)
+        self.mission = env.mission
+        self.extras = pickle.dumps(
+            (objects, attrs, env.np_random.bit_generator.state),
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+
+
+class Level:
+    """
+    Level stored in a `LevelBank`, built in place of `_gen_grid` when passed
+    to `reset` as `options={"level": level}`
+    """
+
+    def __init__(
+        self,
+        seed: int,
+        encoding: np.ndarray,
+        agent_pos: tuple[int, int],
+        agent_dir: int,
+        mission: str,
+        extras: bytes,
+    ):
+        self.seed = seed
+        self.encoding = encoding
+        self.agent_pos = agent_pos
+        self.agent_dir = agent_dir
+        self.mission = mission
+        self.extras = extras
+
+    def __repr__(self) -> str:
+        return f"Level(seed={self.seed}, mission={self.mission!r})"
+
+    def build(self, env):
+        """
+        Set the grid, agent pose, mission and generated attributes of `env`
+        to those of the level
+        """
+
+        width, height = self.encoding.shape[:2]
+        if (env.width, env.height) != (width, height):
+            raise ValueError(
+                f"Level of size {width}x{height} cannot be built in an "
+                f"environment of size {env.width}x{env.height}"
+            )
+
+        objects, attrs, rng_state = pickle.loads(self.extras)
+
+        # Walls are rebuilt from the encoding, other objects are stored whole
+        state = np.array(self.encoding, dtype=np.uint8)
+        opaque = np.zeros((width, height), dtype=bool)
+        cells: list[WorldObj | None] = [None] * (width * height)
+        flat_state = state.transpose(1, 0, 2).reshape(-1, 3)
+        walls = np.flatnonzero(flat_state[:, 0] == OBJECT_TO_IDX["wall"])
+        for idx, encoding in zip(walls.tolist(), flat_state[walls].tolist()):
+            cells[idx] = WorldObj.decode(*encoding)
+        opaque.T.flat[walls] = True
+        for idx, obj in objects.items():
+            cells[idx] = obj
+            opaque[idx % width, idx // width] = not obj.see_behind()
+
+        grid = Grid(width, height)
+        grid.restore((state, opaque, tuple(cells), ()))
+
+        env.grid = grid
+        for name, value in attrs.items():
+            setattr(env, name, value)
+        env.np_random.bit_generator.state = rng_state
+
+
+class LevelBank:
+    """
+    Bank of levels pregenerated for a range of seeds, stored in an
+    uncompressed `.npz` archive and memory-mapped when loaded.
+
+    `LevelBank.generate` resets an environment once per seed and records
+    what `_gen_grid` produced: the encoded grid, the agent pose, the mission,
+    and, pickled, the objects that are not walls along with the other
+    attributes set by `_gen_grid` (such as BabyAI instructions) and the
+    state of the random number generator. Building a level from the bank
+    then takes the place of `_gen_grid`, so that resetting an environment
+    with `options={"level": bank[i]}` gives the same episode as resetting
+    it with `seed=bank.seeds[i]`, without rejection sampling.
+    `LevelBankWrapper` does this for every reset.
+
+    The attributes recorded are those that `_gen_grid` assigns new objects
+    to, and those listed in the `state_attrs` of the environment. Attributes
+    that `_gen_grid` modifies in place or sets to the objects they already
+    referenced are only recorded if they are listed in `state_attrs`.
+
+    Example:
+        >>> import tempfile
+        >>> import gymnasium as gym
+        >>> from minigrid.core.level_bank import LevelBank
+        >>> path = tempfile.mktemp(suffix=".npz")
+        >>> bank = LevelBank.generate("BabyAI-GoToObj-v0", range(10), path)
+        >>> bank.encodings.shape
+        (10, 8, 8, 3)
+        >>> env = gym.make("BabyAI-GoToObj-v0")
+        >>> obs, _ = env.reset(seed=3, options={"level": bank[3]})
+        >>> obs["mission"] == bank.missions[3]
+        True
+    """
+
+    def __init__(self, path: str, mmap: bool = True):
+        self.path = path
+        with zipfile.ZipFile(path) as archive:
+
+            def load(name: str, mmap: bool = mmap) -> np.ndarray:
+                return load_npz_member(path, archive, name, mmap)
+
+            self.env_id: str = str(load("env_id", mmap=False))
+            self.seeds: np.ndarray = load("seeds", mmap=False)
+            self.encodings: np.ndarray = load("encodings")
+            self.agent_pos: np.ndarray = load("agent_pos")
+            self.agent_dir: np.ndarray = load("agent_dir")
+            mission_offsets = load("mission_offsets", mmap=False)
+            mission_bytes = load("missions", mmap=False).tobytes()
+            self._extra_offsets = load("extra_offsets", mmap=False)
+            self._extras = load("extras")
+
+        self.missions: list[str] = [
+            mission_bytes[start:end].decode("utf8")
+            for start, end in zip(mission_offsets[:-1], mission_offsets[1:])
+        ]
+        self._index = {seed: index for index, seed in enumerate(self.seeds.tolist())}
+
+    def __len__(self) -> int:
+        return len(self.seeds)
+
+    def __repr__(self) -> str:
+        return f"LevelBank(env_id={self.env_id!r}, levels={len(self)})"
+
+    def __getitem__(self, index: int) -> Level:
+        start, end = self._extra_offsets[index], self._extra_offsets[index + 1]
+        return Level(
+            int(self.seeds[index]),
+            self.encodings[index],
+            tuple(self.agent_pos[index].tolist()),
+            int(self.agent_dir[index]),
+            self.missions[index],
+            self._extras[start:end].tobytes(),
+        )
+
+    def index(self, seed: int) -> int | None:
+        """
+        Index of the level generated with `seed`, or None if it is not in the
+        bank
+        """
+
+        return self._index.get(seed)
+
+    @staticmethod
+    def generate(
+        env_id: str, seeds: Iterable[int], path: str, **kwargs: Any
+    ) -> LevelBank:
+        """
+        Generate the levels of `env_id` for each seed, write them to `path`
+        and load the bank. Extra arguments are passed to `gym.make`.
+        """
+
+        if not path.endswith(".npz"):
+            path += ".npz"
+        env = gym.make(env_id, disable_env_checker=True, **kwargs)
+        seeds = [int(seed) for seed in seeds]
+        encodings, agent_pos, agent_dir, missions, extras = [], [], [], [], []
+        for seed in seeds:
+            recorder = _LevelRecorder()
+            env.reset(seed=seed, options={"level": recorder})
+            encodings.append(recorder.encoding)
+            agent_pos.append(recorder.agent_pos)
+            agent_dir.append(recorder.agent_dir)
+            missions.append(recorder.mission.encode("utf8"))
+            extras.append(recorder.extras)
+        env.close()
+
+        np.savez(
+            path,
+            env_id=np.array(env_id),
+            seeds=np.array(seeds, dtype=np.int64),
+            encodings=np.stack(encodings),
+            agent_pos=np.array(agent_pos, dtype=np.int64).reshape(-1, 2),
+            agent_dir=np.array(agent_dir, dtype=np.int64),
+            mission_offsets=np.cumsum([0] + [len(m) for m in missions]),
+            missions=np.frombuffer(b"".join(missions), dtype=np.uint8),
+            extra_offsets=np.cumsum([0] + [len(e) for e in extras]),
+            extras=np.frombuffer(b"".join(extras), dtype=np.uint8),
+        )
+        return LevelBank(path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("env_id", help="gym environment to generate levels of")
+    parser.add_argument("path", help="path of the .npz bank to write")
+    parser.add_argument(
+        "--seeds",
+        type=int,
+        nargs=2,
+        metavar=("START", "STOP"),
+        help="range of seeds to generate levels with",
+        default=(0, 1000),
+    )
+
+    args = parser.parse_args()
+    bank = LevelBank.generate(args.env_id, range(*args.seeds), args.path)
+    print(bank)
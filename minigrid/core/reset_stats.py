@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+
+class ResetStats:
+    """
+    Counters and timings of the generation of a level, available after each
+    reset as `env.unwrapped.reset_stats`.
+
+    `counters` counts the work done by the level generator:
+
+    - `place_obj_tries`: positions sampled by `place_obj`
+    - `connect_all_iterations`: iterations of `RoomGrid.connect_all`
+    - `rand_obj_retries`: object descriptions rejected by BabyAI `rand_obj`
+    - `gen_retries`: levels discarded and generated again
+
+    `rejections` counts the reasons levels were discarded for: BabyAI
+    `RejectSampling` reasons, and `timeout: ...` when generation gave up
+    with a `RecursionError`. `phase_times` holds the wall time in
+    seconds spent in each phase of the reset. Phases can be nested, e.g.
+    `gen_grid` includes `connect_all`.
+
+    Stats of several resets can be summed with `+=`.
+
+    Example:
+        >>> import gymnasium as gym
+        >>> import minigrid
+        >>> env = gym.make("BabyAI-GoToLocal-v0")
+        >>> _ = env.reset(seed=29)
+        >>> stats = env.unwrapped.reset_stats
+        >>> stats.counters["gen_retries"], dict(stats.rejections)
+        (1, {'unreachable object': 1})
+        >>> sorted(stats.phase_times)
+        ['gen_grid', 'gen_mission', 'gen_obs', 'gen_rooms', 'surface', 'validate_instrs']
+    """
+
+    def __init__(self):
+        self.counters: Counter[str] = Counter()
+        self.rejections: Counter[str] = Counter()
+        self.phase_times: Counter[str] = Counter()
+        self.num_resets = 0
+
+        # Only the work done while resetting is recorded, not the calls to
+        # the generation methods made while stepping
+        self.recording = False
+
+    def __iadd__(self, other: ResetStats) -> ResetStats:
+        self.counters.update(other.counters)
+        self.rejections.update(other.rejections)
+        self.phase_times.update(other.phase_times)
+        self.num_resets += other.num_resets
+        return self
+
+    def __repr__(self) -> str:
+        return (
+            f"ResetStats(num_resets={self.num_resets}, "
+            f"counters={dict(self.counters)}, rejections={dict(self.rejections)})"
+        )
+
+    def count(self, name: str, n: int = 1):
+        """
+        Add `n` to the counter `name`
+        """
+
+        if self.recording:
+            self.counters[name] += n
+
+    def reject(self, reason: str):
+        """
+        Record that a level was discarded for `reason`
+        """
+
+        if self.recording:
+            self.rejections[reason] += 1
+            self.counters["gen_retries"] += 1
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Add the wall time spent in the block to the phase `name`
+        """
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.recording:
+                self.phase_times[name] += time.perf_counter() - start
+
+    def as_dict(self) -> dict[str, Any]:
+        """
+        Stats as a dict of plain values
+        """
+
+        return {
+            "num_resets": self.num_resets,
+            "counters": dict(self.counters),
+            "rejections": dict(self.rejections),
+            "phase_times": dict(self.phase_times),
+        }
@@ -69,6 +69,8 @@ class RoomGrid(MiniGridEnv):
     This is meant to serve as a base class for other environments.
     """
 
+    state_attrs = ("room_grid",)
+
     def __init__(
         self,
         room_size: int = 7,
@@ -360,36 +362,38 @@ class RoomGrid(MiniGridEnv):
 
         num_itrs = 0
 
-        while True:
-            # This is to handle rare situations where random sampling produces
-            # a level that cannot be connected, producing in an infinite loop
-            if num_itrs > max_itrs:
-                raise RecursionError("connect_all failed")
-            num_itrs += 1
-
-            # If all rooms are reachable, stop
-            reach = find_reach()
-            if len(reach) == self.num_rows * self.num_cols:
-                break
+        with self.reset_stats.phase("connect_all"):
+            while True:
+                # This is to handle rare situations where random sampling produces
+                # a level that cannot be connected, producing in an infinite loop
+                if num_itrs > max_itrs:
+                    raise RecursionError("connect_all failed")
+                num_itrs += 1
+                self.reset_stats.count("connect_all_iterations")
+
+                # If all rooms are reachable, stop
+                reach = find_reach()
+                if len(reach) == self.num_rows * self.num_cols:
+                    break
 
-            # Pick a random room and door position
-            i = self._rand_int(0, self.num_cols)
-            j = self._rand_int(0, self.num_rows)
-            k = self._rand_int(0, 4)
-            room = self.get_room(i, j)
+                # Pick a random room and door position
+                i = self._rand_int(0, self.num_cols)
+                j = self._rand_int(0, self.num_rows)
+                k = self._rand_int(0, 4)
+                room = self.get_room(i, j)
 
-            # If there is already a door there, skip
-            if not room.door_pos[k] or room.doors[k]:
-                continue
+                # If there is already a door there, skip
+                if not room.door_pos[k] or room.doors[k]:
+                    continue
 
-            neighbor_room = room.neighbors[k]
-            assert neighbor_room is not None
-            if room.locked or neighbor_room.locked:
-                continue
+                neighbor_room = room.neighbors[k]
+                assert neighbor_room is not None
+                if room.locked or neighbor_room.locked:
+                    continue
 
-            color = self._rand_elem(door_colors)
-            door, _ = self.add_door(i, j, k, color, False)
-            added_doors.append(door)
+                color = self._rand_elem(door_colors)
+                door, _ = self.add_door(i, j, k, color, False)
+                added_doors.append(door)
 
         return added_doors
 
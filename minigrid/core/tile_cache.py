@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import struct
+import zipfile
+from collections import OrderedDict
+from typing import Any, Iterable, Iterator
+
+import gymnasium as gym
+import numpy as np
+
+from minigrid.core.world_object import Box, Door, WorldObj
+
+# Default bound on the memory used by the rendered tiles
+TILE_CACHE_MAX_BYTES = 64 * 2**20
+
+
+def load_npz_member(path: str, archive: zipfile.ZipFile, name: str, mmap: bool):
+    """
+    Read an array stored in an `.npz` archive, memory-mapping it when it is
+    stored uncompressed
+    """
+
+    info = archive.getinfo(name + ".npy")
+    if not mmap or info.compress_type != zipfile.ZIP_STORED:
+        with archive.open(info) as f:
+            return np.lib.format.read_array(f)
+
+    with open(path, "rb") as f:
+        # Skip the local file header of the member, then the .npy header
+        f.seek(info.header_offset)
+        header = f.read(30)
+        name_len, extra_len = struct.unpack("<HH", header[26:30])
+        f.seek(info.header_offset + 30 + name_len + extra_len)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+
+    if 0 in shape:
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(
+        path,
+        dtype=dtype,
+        mode="r",
+        shape=shape,
+        order="F" if fortran_order else "C",
+        offset=offset,
+    )
+
+
+def tile_key(
+    obj: WorldObj | None, agent_dir: int | None, highlight: bool, tile_size: int
+) -> tuple[Any, ...]:
+    """
+    Cache key of a tile
+    """
+
+    key: tuple[Any, ...] = (agent_dir, highlight, tile_size)
+    return obj.encode() + key if obj else key
+
+
+class TileCache:
+    """
+    Least recently used cache of the tiles rendered by `Grid.render_tile`.
+
+    Keys are the `obj.encode() + (agent_dir, highlight, tile_size)` tuples
+    used by `Grid.render_tile`, or `(agent_dir, highlight, tile_size)` for
+    empty cells. The cache also holds the tile atlases of `Grid.render`, by
+    tile size. It holds at most `max_tiles` tiles and `max_bytes` bytes of
+    tiles and atlases, when they are set, and evicts the least recently used
+    atlases and then tiles beyond that: atlases are rebuilt from the cached
+    tiles. `hits`, `misses` and `evictions` count tile lookups and evictions
+    since the last `clear`.
+
+    Every process uses its own cache, `Grid.tile_cache`. Tiles can be
+    rendered ahead of time with `warm`, saved with `save`, and loaded with
+    `load` at the start of each worker, which memory-maps them so that the
+    pages are shared between the processes.
+
+    Example:
+        >>> import gymnasium as gym
+        >>> from minigrid.core.grid import Grid
+        >>> env = gym.make("MiniGrid-DoorKey-5x5-v0")
+        >>> _ = env.reset(seed=0)
+        >>> Grid.tile_cache.warm([8], [env])
+        >>> misses = Grid.tile_cache.misses
+        >>> _ = env.unwrapped.get_frame(tile_size=8)
+        >>> Grid.tile_cache.misses - misses
+        0
+    """
+
+    def __init__(
+        self, max_tiles: int | None = None, max_bytes: int | None = TILE_CACHE_MAX_BYTES
+    ):
+        self.max_tiles = max_tiles
+        self.max_bytes = max_bytes
+        self._tiles: OrderedDict[tuple[Any, ...], np.ndarray] = OrderedDict()
+        # Atlases by tile size, and their sizes when they were last put
+        self._atlases: OrderedDict[int, Any] = OrderedDict()
+        self._atlas_nbytes: dict[int, int] = {}
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._tiles)
+
+    def __iter__(self) -> Iterator[tuple[Any, ...]]:
+        # Lookups reorder the tiles, iterate over a snapshot of the keys
+        return iter(list(self._tiles))
+
+    def __contains__(self, key: tuple[Any, ...]) -> bool:
+        return key in self._tiles
+
+    def __getitem__(self, key: tuple[Any, ...]) -> np.ndarray:
+        tile = self.get(key)
+        if tile is None:
+            raise KeyError(key)
+        return tile
+
+    def __setitem__(self, key: tuple[Any, ...], tile: np.ndarray):
+        old = self._tiles.pop(key, None)
+        if old is not None:
+            self.nbytes -= old.nbytes
+        self._tiles[key] = tile
+        self.nbytes += tile.nbytes
+        self._evict()
+
+    def __repr__(self) -> str:
+        return (
+            f"TileCache(tiles={len(self)}, nbytes={self.nbytes}, hits={self.hits}, "
+            f"misses={self.misses}, evictions={self.evictions})"
+        )
+
+    def get(self, key: tuple[Any, ...]) -> np.ndarray | None:
+        """
+        Look up a tile, marking it as recently used
+        """
+
+        tile = self._tiles.get(key)
+        if tile is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._tiles.move_to_end(key)
+        return tile
+
+    def get_atlas(self, tile_size: int) -> Any | None:
+        """
+        Look up the atlas of a tile size, marking it as recently used
+        """
+
+        atlas = self._atlases.get(tile_size)
+        if atlas is not None:
+            self._atlases.move_to_end(tile_size)
+        return atlas
+
+    def put_atlas(self, tile_size: int, atlas: Any):
+        """
+        Add the atlas of a tile size, or update the size of the atlas after
+        adding tiles to it, counting its `nbytes` against `max_bytes`
+        """
+
+        self.nbytes -= self._atlas_nbytes.pop(tile_size, 0)
+        self._atlases[tile_size] = atlas
+        self._atlases.move_to_end(tile_size)
+        self._atlas_nbytes[tile_size] = atlas.nbytes
+        self.nbytes += atlas.nbytes
+        self._evict()
+
+    def _evict(self):
+        while self.max_tiles is not None and len(self._tiles) > self.max_tiles:
+            self._evict_tile()
+        while self.max_bytes is not None and self.nbytes > self.max_bytes:
+            if self._atlases:
+                tile_size, _ = self._atlases.popitem(last=False)
+                self.nbytes -= self._atlas_nbytes.pop(tile_size)
+                self.evictions += 1
+            elif self._tiles:
+                self._evict_tile()
+            else:
+                break
+
+    def _evict_tile(self):
+        _, tile = self._tiles.popitem(last=False)
+        self.nbytes -= tile.nbytes
+        self.evictions += 1
+
+    def clear(self):
+        """
+        Drop every tile and atlas and reset the counters
+        """
+
+        self._tiles.clear()
+        self._atlases.clear()
+        self._atlas_nbytes.clear()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def warm(self, tile_sizes: Iterable[int], envs: Iterable[gym.Env]):
+        """
+        Render every tile that the given environments can show in their
+        current grids, at each of the given tile sizes: the tiles of their
+        objects (with every state of their doors and the contents of their
+        boxes) and of empty cells, highlighted or not, with the agent on the
+        cells it can overlap and the objects it can carry. Environments that
+        were never reset are reset.
+        """
+
+        from minigrid.core.grid import Grid
+
+        objects: dict[tuple[int, int, int], WorldObj] = {}
+
+        def add(obj: WorldObj | None):
+            if obj is None or obj.encode() in objects:
+                return
+            objects[obj.encode()] = obj
+            if isinstance(obj, Box):
+                add(obj.contains)
+            if isinstance(obj, Door):
+                for state in range(3):
+                    add(WorldObj.decode(*obj.encode()[:2], state))
+
+        for env in envs:
+            env = env.unwrapped
+            if getattr(env, "grid", None) is None:
+                env.reset()
+            for obj in env.grid.grid:
+                add(obj)
+            add(env.carrying)
+
+        for tile_size in tile_sizes:
+            for obj in [None, *objects.values()]:
+                agent_dirs = [None]
+                # Agent views show the agent over what it carries
+                if obj is None or obj.can_overlap() or obj.can_pickup():
+                    agent_dirs += [0, 1, 2, 3]
+                for agent_dir in agent_dirs:
+                    for highlight in (False, True):
+                        key = tile_key(obj, agent_dir, highlight, tile_size)
+                        if key not in self:
+                            self[key] = Grid.draw_tile(
+                                obj, agent_dir, highlight, tile_size
+                            )
+
+    def save(self, path: str):
+        """
+        Save the tiles to an uncompressed `.npz` archive, grouped by tile
+        size
+        """
+
+        groups: dict[int, list[tuple[tuple[int, ...], np.ndarray]]] = {}
+        for key, tile in self._tiles.items():
+            if len(key) == 6:
+                encoding, (agent_dir, highlight, tile_size) = key[:3], key[3:]
+            else:
+                encoding, (agent_dir, highlight, tile_size) = (-1, -1, -1), key
+            row = (*encoding, -1 if agent_dir is None else agent_dir, highlight)
+            groups.setdefault(tile_size, []).append((row, tile))
+
+        arrays = {}
+        for tile_size, entries in groups.items():
+            arrays[f"keys_{tile_size}"] = np.array([row for row, _ in entries])
+            arrays[f"tiles_{tile_size}"] = np.stack([tile for _, tile in entries])
+        np.savez(path, **arrays)
+
+    def load(self, path: str, mmap: bool = True):
+        """
+        Add the tiles saved with `save` to the cache. With `mmap`, the tiles
+        are memory-mapped from the file rather than read into memory.
+        """
+
+        with zipfile.ZipFile(path) as archive:
+            names = [name[: -len(".npy")] for name in archive.namelist()]
+            for name in names:
+                if not name.startswith("keys_"):
+                    continue
+                tile_size = int(name[len("keys_") :])
+                keys = load_npz_member(path, archive, name, mmap=False)
+                tiles = load_npz_member(path, archive, f"tiles_{tile_size}", mmap)
+                for row, tile in zip(keys.tolist(), tiles):
+                    type_idx, color_idx, state, agent_dir, highlight = row
+                    key = (
+                        None if agent_dir == -1 else agent_dir,
+                        bool(highlight),
+                        tile_size,
+                    )
+                    if type_idx != -1:
+                        key = (type_idx, color_idx, state) + key
+                    self[key] = tile
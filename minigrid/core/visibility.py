@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+from functools import lru_cache
+
+import numpy as np
+
+# Maximum number of opacity patterns remembered by the visibility cache
+VIS_CACHE_SIZE = 2**16
+
+
+def pack_rows(bits: np.ndarray) -> tuple[int, ...]:
+    """
+    Pack a (width, height) boolean array into one integer per row,
+    where bit i of row j is bits[i, j]
+    """
+
+    width = bits.shape[0]
+    rows = np.ascontiguousarray(bits.T, dtype=bool)
+    if width <= 62:
+        weights = np.left_shift(1, np.arange(width, dtype=np.int64))
+        return tuple((rows @ weights).tolist())
+    packed = np.packbits(rows, axis=1, bitorder="little")
+    return tuple(int.from_bytes(row.tobytes(), "little") for row in packed)
+
+
+def unpack_rows(rows: tuple[int, ...], width: int) -> np.ndarray:
+    """
+    Inverse of `pack_rows`, produces a (width, height) boolean array
+    """
+
+    if width <= 62:
+        packed = np.array(rows, dtype=np.int64)
+        bits = (packed[:, None] >> np.arange(width, dtype=np.int64)) & 1
+        return bits.T.astype(bool)
+    as_bytes = b"".join(row.to_bytes((width + 7) // 8, "little") for row in rows)
+    bits = np.unpackbits(
+        np.frombuffer(as_bytes, dtype=np.uint8).reshape(len(rows), -1),
+        axis=1,
+        count=width,
+        bitorder="little",
+    )
+    return bits.T.astype(bool)
+
+
+def _fill(
+    seeds: int | np.ndarray, through: int | np.ndarray, width: int, left: bool
+) -> int | np.ndarray:
+    """
+    Extend every seed bit along a row while it stays inside `through`,
+    using log2(width) shift steps (Kogge-Stone occluded fill)
+    """
+
+    gen = seeds & through
+    prop = through
+    shift = 1
+    while shift < width:
+        # Not updated in place, so that arrays can be passed as well
+        if left:
+            gen = gen | (prop & (gen >> shift))
+            prop = prop & (prop >> shift)
+        else:
+            gen = gen | (prop & (gen << shift))
+            prop = prop & (prop << shift)
+        shift <<= 1
+    return gen
+
+
+def _visible_rows(
+    width: int, agent_x: int, agent_y: int, transparent: tuple[int, ...]
+) -> tuple[int, ...]:
+    """
+    Visibility of every row given the packed transparent cells of each row
+    """
+
+    full = (1 << width) - 1
+    visible = [0] * len(transparent)
+
+    # Light enters at the agent and is swept row by row towards the top.
+    # Inside a row, it spreads sideways through transparent cells and
+    # stops on (but includes) the first opaque cell. Every lit transparent
+    # cell then lights the three cells above it.
+    seeds = 1 << agent_x
+    for j in range(agent_y, -1, -1):
+        through = transparent[j]
+        row = seeds | ((_fill(seeds, through, width, left=False) << 1) & full)
+        row |= _fill(row, through, width, left=True) >> 1
+        visible[j] = row
+
+        lit = row & through
+        seeds = (lit | (lit << 1) | (lit >> 1)) & full
+
+    return tuple(visible)
+
+
+_visible_rows_cached = lru_cache(maxsize=VIS_CACHE_SIZE)(_visible_rows)
+
+
+def compute_visibility(
+    opaque: np.ndarray, agent_pos: tuple[int, int], use_cache: bool = True
+) -> np.ndarray:
+    """
+    Compute the (width, height) visibility mask of a grid seen from
+    `agent_pos`, given which of its cells cannot be seen through.
+
+    The result is identical to the two-pass scan historically done by
+    `Grid.process_vis`. With `use_cache`, masks are memoized on the packed
+    opacity bits, which pays off since agent views repeat a lot.
+    """
+
+    width = opaque.shape[0]
+    transparent = pack_rows(~np.asarray(opaque, dtype=bool))
+    agent_x, agent_y = int(agent_pos[0]), int(agent_pos[1])
+
+    if use_cache:
+        rows = _visible_rows_cached(width, agent_x, agent_y, transparent)
+    else:
+        rows = _visible_rows(width, agent_x, agent_y, transparent)
+
+    return unpack_rows(rows, width)
+
+
+def clear_visibility_cache():
+    """
+    Drop every memoized visibility mask
+    """
+
+    _visible_rows_cached.cache_clear()
+
+
+def compute_visibility_batch(
+    opaque: np.ndarray, agent_pos: tuple[int, int]
+) -> np.ndarray:
+    """
+    Batched version of `compute_visibility` for an (n, width, height) stack
+    of opacity bitmaps seen from the same position, such as agent views.
+    Rows of all the grids are swept at once, so width must be at most 62.
+    """
+
+    n, width, height = opaque.shape
+    assert width <= 62, "batched visibility supports grids up to 62 cells wide"
+
+    columns = np.arange(width, dtype=np.int64)
+    transparent = (~opaque).transpose(0, 2, 1).astype(np.int64) @ (1 << columns)
+
+    full = (1 << width) - 1
+    visible = np.zeros((n, height), dtype=np.int64)
+
+    # Same sweep as `_visible_rows`, on one integer per grid
+    seeds = np.full(n, 1 << int(agent_pos[0]), dtype=np.int64)
+    for j in range(int(agent_pos[1]), -1, -1):
+        through = transparent[:, j]
+        row = seeds | ((_fill(seeds, through, width, left=False) << 1) & full)
+        row = row | (_fill(row, through, width, left=True) >> 1)
+        visible[:, j] = row
+
+        lit = row & through
+        seeds = (lit | (lit << 1) | (lit >> 1)) & full
+
+    bits = (visible[:, :, None] >> columns) & 1
+    return bits.transpose(0, 2, 1).astype(bool)
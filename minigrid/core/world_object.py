@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Tuple
+from typing import TYPE_CHECKING, Any, Iterable, Tuple
 
 import numpy as np
 
@@ -19,6 +19,7 @@ from minigrid.utils.rendering import (
 )
 
 if TYPE_CHECKING:
+    from minigrid.core.grid import Grid
     from minigrid.minigrid_env import MiniGridEnv
 
 Point = Tuple[int, int]
@@ -32,6 +33,12 @@ class WorldObj:
     def __init__(self, type: str, color: str):
         assert type in OBJECT_TO_IDX, type
         assert color in COLOR_TO_IDX, color
+
+        # Grid and cell index currently holding this object. The grid is
+        # notified when the encoding of the object changes so that its
+        # array representation stays in sync.
+        self._grid_cell: tuple[Grid, int] | None = None
+
         self.type = type
         self.color = color
         self.contains = None
@@ -42,6 +49,27 @@ class WorldObj:
         # Current position of the object
         self.cur_pos: Point | None = None
 
+    @property
+    def color(self) -> str:
+        return self._color
+
+    @color.setter
+    def color(self, color: str):
+        self._color = color
+        self._encoding_changed()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # The grid holding the object restores the link when it is unpickled
+        state = self.__dict__.copy()
+        state["_grid_cell"] = None
+        return state
+
+    def _encoding_changed(self):
+        """Propagate a change of the object encoding to the grid holding it"""
+        if self._grid_cell is not None:
+            grid, idx = self._grid_cell
+            grid.refresh_cell(idx)
+
     def can_overlap(self) -> bool:
         """Can the agent overlap with this?"""
         return False
@@ -174,6 +202,24 @@ class Door(WorldObj):
         self.is_open = is_open
         self.is_locked = is_locked
 
+    @property
+    def is_open(self) -> bool:
+        return self._is_open
+
+    @is_open.setter
+    def is_open(self, is_open: bool):
+        self._is_open = is_open
+        self._encoding_changed()
+
+    @property
+    def is_locked(self) -> bool:
+        return self._is_locked
+
+    @is_locked.setter
+    def is_locked(self, is_locked: bool):
+        self._is_locked = is_locked
+        self._encoding_changed()
+
     def can_overlap(self):
         """The agent can only walk over this cell when the door is open"""
         return self.is_open
@@ -291,3 +337,32 @@ class Box(WorldObj):
         # Replace the box by its contents
         env.grid.set(pos[0], pos[1], self.contains)
         return True
+
+
+def get_objects_state(
+    objects: Iterable[WorldObj | None],
+) -> list[tuple[WorldObj, dict[str, Any]]]:
+    """
+    Copy the attributes of objects, and of the objects they contain, so that
+    they can be restored with `set_objects_state`. Walls never change and
+    are skipped.
+    """
+
+    saved = []
+    for obj in objects:
+        while obj is not None and type(obj) is not Wall:
+            attrs = obj.__dict__.copy()
+            del attrs["_grid_cell"]
+            saved.append((obj, attrs))
+            obj = obj.contains
+    return saved
+
+
+def set_objects_state(saved: list[tuple[WorldObj, dict[str, Any]]]):
+    """
+    Restore the attributes copied by `get_objects_state`. Grids holding the
+    objects are not notified.
+    """
+
+    for obj, attrs in saved:
+        obj.__dict__.update(attrs)
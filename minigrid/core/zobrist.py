@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from functools import lru_cache
+
+import numpy as np
+
+from minigrid.core.constants import COLOR_TO_IDX, OBJECT_TO_IDX, STATE_TO_IDX
+
+# Seed of the keys, fixed so that hashes agree between processes and runs
+ZOBRIST_SEED = 0x5A0B7157
+
+# Bounds of the encoding fields that have their own keys, other encodings
+# are mixed into the key of the cell with `splitmix64`
+ZOBRIST_CODE_BOUNDS = (len(OBJECT_TO_IDX), len(COLOR_TO_IDX), len(STATE_TO_IDX))
+
+NUM_ZOBRIST_CODES = int(np.prod(ZOBRIST_CODE_BOUNDS))
+
+MASK64 = 2**64 - 1
+
+
+def splitmix64(x: int) -> int:
+    """
+    Mix a 64-bit integer into a pseudorandom 64-bit integer
+    """
+
+    x = (x + 0x9E3779B97F4A7C15) & MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+
+def _random_keys(shape: tuple[int, ...], *stream: int) -> np.ndarray:
+    keys = np.random.PCG64([ZOBRIST_SEED, *stream]).random_raw(int(np.prod(shape)))
+    keys = keys.reshape(shape)
+    keys.flags.writeable = False
+    return keys
+
+
+@lru_cache(maxsize=None)
+def cell_keys(width: int, height: int) -> np.ndarray:
+    """
+    Keys of the cell contents of grids of the given size, a
+    (width * height, NUM_ZOBRIST_CODES) array indexed by the flat cell
+    index j * width + i and the code of the cell encoding
+    """
+
+    return _random_keys((width * height, NUM_ZOBRIST_CODES), 0, width, height)
+
+
+@lru_cache(maxsize=None)
+def agent_keys(width: int, height: int) -> np.ndarray:
+    """
+    Keys of the agent pose in grids of the given size, a
+    (width * height, 4) array indexed by the flat cell index and direction
+    """
+
+    return _random_keys((width * height, 4), 1, width, height)
+
+
+@lru_cache(maxsize=None)
+def carrying_keys() -> np.ndarray:
+    """
+    Keys of the carried object, a (1, NUM_ZOBRIST_CODES) array indexed by
+    the code of its encoding
+    """
+
+    return _random_keys((1, NUM_ZOBRIST_CODES), 2)
+
+
+def cell_key(keys: np.ndarray, idx: int, encoding: tuple[int, int, int]) -> int:
+    """
+    Key of the cell at flat index `idx` holding an object with the given
+    encoding, from a table of `cell_keys`
+    """
+
+    type_idx, color_idx, state = encoding
+    type_bound, color_bound, state_bound = ZOBRIST_CODE_BOUNDS
+    if type_idx < type_bound and color_idx < color_bound and state < state_bound:
+        return keys.item(
+            idx, (type_idx * color_bound + color_idx) * state_bound + state
+        )
+    return splitmix64(keys.item(idx, 0) ^ (type_idx << 32 | color_idx << 16 | state))
+
+
+def carrying_key(encoding: tuple[int, int, int]) -> int:
+    """
+    Key of a carried object with the given encoding
+    """
+
+    return cell_key(carrying_keys(), 0, encoding)
+
+
+def grid_cell_keys(keys: np.ndarray, state: np.ndarray) -> np.ndarray:
+    """
+    Keys of all the cells of a (width, height, 3) grid encoding, in flat
+    index order
+    """
+
+    encodings = state.transpose(1, 0, 2).reshape(-1, 3).astype(np.int64)
+    bounds = np.array(ZOBRIST_CODE_BOUNDS)
+    in_bounds = (encodings < bounds).all(axis=1)
+    codes = (encodings[:, 0] * bounds[1] + encodings[:, 1]) * bounds[2] + encodings[
+        :, 2
+    ]
+    cells = keys[np.arange(len(codes)), np.where(in_bounds, codes, 0)]
+    for idx in np.flatnonzero(~in_bounds).tolist():
+        cells[idx] = cell_key(keys, idx, tuple(encodings[idx].tolist()))
+    return cells
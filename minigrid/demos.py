@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterable, Iterator
+
+import gymnasium as gym
+import numpy as np
+
+from minigrid.core.tile_cache import load_npz_member
+from minigrid.utils.baby_ai_bot import BabyAIBot, BotStuckError, DisappearedBoxError
+
+# Number of seeds rolled out by each task of the process pool, and stored in
+# each shard file
+DEFAULT_SHARD_SIZE = 1000
+
+
+def rollout(env: gym.Env, seed: int, max_steps: int | None = None):
+    """
+    Roll out the bot in `env` reset with `seed`
+
+    Returns:
+        The observed images and directions and the actions taken at each
+        step, and the mission, or None if the bot failed to complete it,
+        including by getting stuck or opening a box. Other errors are raised.
+    """
+
+    obs, _ = env.reset(seed=seed)
+    bot = BabyAIBot(env)
+    max_steps = max_steps or env.unwrapped.max_steps
+    images, directions, actions = [], [], []
+    try:
+        for _ in range(max_steps):
+            action = bot.replan()
+            images.append(obs["image"])
+            directions.append(obs["direction"])
+            actions.append(action)
+            obs, reward, terminated, truncated, _ = env.step(action)
+            if terminated:
+                if reward <= 0:
+                    return None
+                break
+            if truncated:
+                return None
+        else:
+            return None
+    except (BotStuckError, DisappearedBoxError):
+        return None
+
+    return (
+        np.stack(images),
+        np.array(directions, dtype=np.int8),
+        np.array(actions, dtype=np.int8),
+        env.unwrapped.mission,
+    )
+
+
+def shard_path(directory: str, env_id: str, start: int, stop: int) -> str:
+    """
+    Path of the shard holding the demos of `env_id` for the seeds from
+    `start` to `stop` (excluded)
+    """
+
+    return os.path.join(directory, env_id, f"seeds_{start:09d}_{stop:09d}.npz")
+
+
+def shard_seed_range(path: str) -> range:
+    """
+    Range of the seeds of the shard `path`, named by `shard_path`
+    """
+
+    name = os.path.basename(path)[len("seeds_") : -len(".npz")]
+    start, stop = name.split("_")
+    return range(int(start), int(stop))
+
+
+def generate_shard(
+    env_id: str, seeds: Iterable[int], path: str, max_steps: int | None = None
+) -> dict[str, Any]:
+    """
+    Roll out the bot for each seed and write the successful episodes to the
+    shard `path`. The shard is written to a temporary file first and moved
+    into place when complete, so that interrupted runs leave no partial
+    shards behind.
+
+    Returns:
+        The number of demos, failed seeds and steps, and the generation time
+    """
+
+    start_time = time.perf_counter()
+    env = gym.make(env_id, disable_env_checker=True)
+    seeds = [int(seed) for seed in seeds]
+    episodes, demo_seeds, failed_seeds = [], [], []
+    for seed in seeds:
+        episode = rollout(env, seed, max_steps)
+        if episode is None:
+            failed_seeds.append(seed)
+        else:
+            episodes.append(episode)
+            demo_seeds.append(seed)
+    env.close()
+
+    # Missions are stored once per shard, episodes refer to them by index
+    mission_index: dict[str, int] = {}
+    mission_ids = [
+        mission_index.setdefault(mission, len(mission_index))
+        for _, _, _, mission in episodes
+    ]
+    missions = [mission.encode("utf8") for mission in mission_index]
+
+    view_shape = env.observation_space["image"].shape
+    lengths = [len(actions) for _, _, actions, _ in episodes]
+    arrays = dict(
+        env_id=np.array(env_id),
+        seeds=np.array(demo_seeds, dtype=np.int64),
+        failed_seeds=np.array(failed_seeds, dtype=np.int64),
+        episode_offsets=np.cumsum([0] + lengths, dtype=np.int64),
+        images=np.concatenate(
+            [images for images, _, _, _ in episodes]
+            or [np.zeros((0, *view_shape), dtype=np.uint8)]
+        ).astype(np.uint8),
+        directions=np.concatenate(
+            [directions for _, directions, _, _ in episodes] or [[]]
+        ).astype(np.int8),
+        actions=np.concatenate(
+            [actions for _, _, actions, _ in episodes] or [[]]
+        ).astype(np.int8),
+        mission_ids=np.array(mission_ids, dtype=np.int32),
+        mission_offsets=np.cumsum([0] + [len(m) for m in missions], dtype=np.int64),
+        missions=np.frombuffer(b"".join(missions), dtype=np.uint8),
+    )
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path[: -len(".npz")] + ".tmp.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+    return {
+        "num_demos": len(episodes),
+        "num_failed": len(failed_seeds),
+        "num_steps": sum(lengths),
+        "time": time.perf_counter() - start_time,
+    }
+
+
+class DemoShard:
+    """
+    Demos stored in a shard written by `generate_shard`, in columns: the
+    images, directions and actions of all the steps of all the episodes,
+    with `episode_offsets` delimiting the episodes, and the missions of the
+    episodes as indices into a table of the distinct missions. Columns are
+    memory-mapped when loaded.
+
+    Example:
+        >>> import tempfile
+        >>> from minigrid.demos import DemoShard, generate_shard
+        >>> path = tempfile.mktemp(suffix=".npz")
+        >>> _ = generate_shard("BabyAI-GoToRedBallGrey-v0", range(3), path)
+        >>> demos = DemoShard(path)
+        >>> len(demos), demos.seeds.tolist()
+        (3, [0, 1, 2])
+        >>> demo = demos[0]
+        >>> demo["images"].shape[1:], demo["mission"]
+        ((7, 7, 3), 'go to the red ball')
+    """
+
+    def __init__(self, path: str, mmap: bool = True):
+        self.path = path
+        with zipfile.ZipFile(path) as archive:
+
+            def load(name: str, mmap: bool = mmap) -> np.ndarray:
+                return load_npz_member(path, archive, name, mmap)
+
+            self.env_id: str = str(load("env_id", mmap=False))
+            self.seeds: np.ndarray = load("seeds", mmap=False)
+            self.failed_seeds: np.ndarray = load("failed_seeds", mmap=False)
+            self.episode_offsets: np.ndarray = load("episode_offsets", mmap=False)
+            self.images: np.ndarray = load("images")
+            self.directions: np.ndarray = load("directions")
+            self.actions: np.ndarray = load("actions")
+            self.mission_ids: np.ndarray = load("mission_ids", mmap=False)
+            mission_offsets = load("mission_offsets", mmap=False)
+            mission_bytes = load("missions", mmap=False).tobytes()
+
+        self.missions: list[str] = [
+            mission_bytes[start:end].decode("utf8")
+            for start, end in zip(mission_offsets[:-1], mission_offsets[1:])
+        ]
+
+    def __len__(self) -> int:
+        return len(self.seeds)
+
+    def __repr__(self) -> str:
+        return (
+            f"DemoShard(env_id={self.env_id!r}, demos={len(self)}, "
+            f"failed={len(self.failed_seeds)})"
+        )
+
+    def __getitem__(self, index: int) -> dict[str, Any]:
+        start, end = self.episode_offsets[index], self.episode_offsets[index + 1]
+        return {
+            "seed": int(self.seeds[index]),
+            "mission": self.missions[self.mission_ids[index]],
+            "images": self.images[start:end],
+            "directions": self.directions[start:end],
+            "actions": self.actions[start:end],
+        }
+
+
+def load_demos(directory: str, env_id: str) -> Iterator[DemoShard]:
+    """
+    Iterate over the shards of demos of `env_id` stored in `directory`, in
+    the order of their seeds. Shards whose seeds are all in another shard,
+    left by a run over fewer seeds, are skipped.
+    """
+
+    level_dir = os.path.join(directory, env_id)
+    paths = [
+        os.path.join(level_dir, name)
+        for name in os.listdir(level_dir)
+        if name.endswith(".npz") and not name.endswith(".tmp.npz")
+    ]
+    ranges = {path: shard_seed_range(path) for path in paths}
+    paths.sort(key=lambda path: (ranges[path].start, -ranges[path].stop))
+    stop = None
+    for path in paths:
+        if stop is None or ranges[path].stop > stop:
+            stop = ranges[path].stop
+            yield DemoShard(path)
+
+
+def generate_demos(
+    env_ids: Iterable[str],
+    seeds: range,
+    directory: str,
+    num_workers: int = 0,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    max_steps: int | None = None,
+    verbose: bool = True,
+) -> dict[str, dict[str, Any]]:
+    """
+    Generate bot demos of each level for the range of `seeds`, in shards of
+    `shard_size` seeds written to `directory`, rolled out by a pool of
+    `num_workers` processes, or in this process if `num_workers` is 0.
+
+    Shards already written for the same seeds are skipped, so that an
+    interrupted run resumes where it stopped when run again with the same
+    arguments.
+
+    Returns:
+        For each level, the number of demos, failed seeds and steps, the
+        failure rate, and the number of demos generated by this run and
+        per second
+    """
+
+    tasks = []
+    totals: dict[str, dict[str, Any]] = {}
+    for env_id in env_ids:
+        stats = dict(num_demos=0, num_failed=0, num_steps=0, new_demos=0, time=0.0)
+        totals[env_id] = stats
+        for start in range(seeds.start, seeds.stop, shard_size):
+            shard_seeds = range(start, min(start + shard_size, seeds.stop))
+            path = shard_path(directory, env_id, start, shard_seeds.stop)
+            if os.path.exists(path):
+                shard = DemoShard(path)
+                stats["num_demos"] += len(shard)
+                stats["num_failed"] += len(shard.failed_seeds)
+                stats["num_steps"] += int(shard.episode_offsets[-1])
+            else:
+                tasks.append((env_id, shard_seeds, path, max_steps))
+
+    def report(env_id: str):
+        stats = totals[env_id]
+        num_seeds = stats["num_demos"] + stats["num_failed"]
+        stats["failure_rate"] = stats["num_failed"] / max(num_seeds, 1)
+        stats["demos_per_sec"] = stats["new_demos"] / max(stats["time"], 1e-9)
+        if verbose:
+            print(
+                f"{env_id:<40} {stats['num_demos']:>9} demos "
+                f"{100 * stats['failure_rate']:6.2f}% failed "
+                f"{stats['demos_per_sec']:8.1f} demos/s"
+            )
+
+    def add(env_id: str, result: dict[str, Any]):
+        # Demos per second are counted in wall time since the start of the run
+        stats = totals[env_id]
+        for name in ("num_demos", "num_failed", "num_steps"):
+            stats[name] += result[name]
+        stats["new_demos"] += result["num_demos"]
+        stats["time"] = time.perf_counter() - start_time
+        report(env_id)
+
+    start_time = time.perf_counter()
+    if num_workers == 0:
+        for task in tasks:
+            add(task[0], generate_shard(*task))
+    else:
+        with ProcessPoolExecutor(num_workers) as pool:
+            futures = [(task[0], pool.submit(generate_shard, *task)) for task in tasks]
+            for env_id, future in futures:
+                add(env_id, future.result())
+
+    for env_id in totals:
+        report(env_id)
+    return totals
+
+
+def main(argv: list[str] | None = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Generate demonstrations of BabyAI levels with the bot"
+    )
+    parser.add_argument("env_id", nargs="+", help="gym environments to solve")
+    parser.add_argument(
+        "--out", help="directory to write the demos to", default="demos"
+    )
+    parser.add_argument(
+        "--seeds",
+        type=int,
+        nargs=2,
+        metavar=("START", "STOP"),
+        help="range of seeds to generate demos with",
+        default=(0, 1000),
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="number of worker processes, 0 to generate in this process",
+        default=os.cpu_count(),
+    )
+    parser.add_argument(
+        "--shard-size",
+        type=int,
+        help="number of seeds per shard file",
+        default=DEFAULT_SHARD_SIZE,
+    )
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        help="number of steps after which the bot fails, the episode limit by default",
+        default=None,
+    )
+
+    args = parser.parse_args(argv)
+    generate_demos(
+        args.env_id,
+        range(*args.seeds),
+        args.out,
+        num_workers=args.workers,
+        shard_size=args.shard_size,
+        max_steps=args.max_steps,
+    )
+
+
+if __name__ == "__main__":
+    main()
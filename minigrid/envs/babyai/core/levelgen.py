@@ -56,6 +56,11 @@ class LevelGen(RoomGridLevel):
             room_size=room_size, num_rows=num_rows, num_cols=num_cols, **kwargs
         )
 
+    def _gen_grid(self, width, height):
+        # Not left over from the previous episode
+        self.locked_room = None
+        super()._gen_grid(width, height)
+
     def gen_mission(self):
         if self._rand_float(0, 1) < self.locked_room_prob:
             self.add_locked_room()
@@ -139,6 +144,7 @@ class LevelGen(RoomGridLevel):
 
             # The description must match at least one object
             if len(objs) == 0:
+                self.reset_stats.count("rand_obj_retries")
                 continue
 
             # If no implicit unlocking is required
@@ -150,6 +156,7 @@ class LevelGen(RoomGridLevel):
                 )
 
                 if len(pos_not_locked) == 0:
+                    self.reset_stats.count("rand_obj_retries")
                     continue
 
             # Found a valid object description
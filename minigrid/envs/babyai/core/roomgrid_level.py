@@ -18,10 +18,13 @@ from minigrid.minigrid_env import MissionSpace
 
 class RejectSampling(Exception):
     """
-    Exception used for rejection sampling
+    Exception used for rejection sampling. `reason` identifies the kind of
+    rejection in `ResetStats`, it defaults to the message.
     """
 
-    pass
+    def __init__(self, message: str, reason: str | None = None):
+        super().__init__(message)
+        self.reason = reason or message
 
 
 class BabyAIMissionSpace(MissionSpace):
@@ -51,6 +54,8 @@ class RoomGridLevel(RoomGrid):
     of approximately similar difficulty.
     """
 
+    state_attrs = RoomGrid.state_attrs + ("instrs", "surface", "max_steps")
+
     def __init__(self, room_size=8, max_steps: int | None = None, **kwargs):
         mission_space = BabyAIMissionSpace()
 
@@ -91,8 +96,9 @@ class RoomGridLevel(RoomGrid):
         if action == self.actions.drop:
             self.update_objs_poss()
 
-        # If we've successfully completed the mission
-        status = self.instrs.verify(action)
+        # If we've successfully completed the mission, verified after the
+        # changes made by the action
+        status = self.instrs.verify(action, self.step_events)
 
         if status == "success":
             terminated = True
@@ -103,6 +109,15 @@ class RoomGridLevel(RoomGrid):
 
         return obs, reward, terminated, truncated, info
 
+    def get_state(self):
+        state = super().get_state()
+        state["verifier"] = self.instrs.get_verifier_state()
+        return state
+
+    def set_state(self, state):
+        super().set_state(state)
+        self.instrs.set_verifier_state(state["verifier"], self)
+
     def update_objs_poss(self, instr=None):
         if instr is None:
             instr = self.instrs
@@ -119,28 +134,33 @@ class RoomGridLevel(RoomGrid):
     def _gen_grid(self, width, height):
         # We catch RecursionError to deal with rare cases where
         # rejection sampling gets stuck in an infinite loop
+        stats = self.reset_stats
         while True:
             try:
-                super()._gen_grid(width, height)
+                with stats.phase("gen_rooms"):
+                    super()._gen_grid(width, height)
 
                 # Generate the mission
-                self.gen_mission()
+                with stats.phase("gen_mission"):
+                    self.gen_mission()
 
                 # Validate the instructions
-                self.validate_instrs(self.instrs)
+                with stats.phase("validate_instrs"):
+                    self.validate_instrs(self.instrs)
 
             except RecursionError as error:
-                print("Timeout during mission generation:", error)
+                stats.reject(f"timeout: {error}")
                 continue
 
             except RejectSampling as error:
-                print("Sampling rejected:", error)
+                stats.reject(error.reason)
                 continue
 
             break
 
         # Generate the surface form for the instructions
-        self.surface = self.instrs.surface(self)
+        with stats.phase("surface"):
+            self.surface = self.instrs.surface(self)
         self.mission = self.surface
 
     def validate_instrs(self, instr):
@@ -296,7 +316,10 @@ class RoomGridLevel(RoomGrid):
                 if (i, j) not in reachable:
                     if not raise_exc:
                         return False
-                    raise RejectSampling("unreachable object at " + str((i, j)))
+                    raise RejectSampling(
+                        "unreachable object at " + str((i, j)),
+                        reason="unreachable object",
+                    )
 
         # All objects reachable
         return True
@@ -7,9 +7,8 @@ from __future__ import annotations
 import os
 from abc import ABC, abstractmethod
 
-import numpy as np
-
 from minigrid.core.constants import COLOR_NAMES, DIR_TO_VEC
+from minigrid.core.events import Dropped, Moved, PickedUp, Toggled, Turned
 from minigrid.minigrid_env import MiniGridEnv
 
 # Object types we are allowed to describe in language
@@ -117,56 +116,54 @@ class ObjDesc:
 
         self.obj_poss = []
 
+        grid = env.grid
         agent_room = env.room_from_pos(*env.agent_pos)
 
-        for i in range(env.grid.width):
-            for j in range(env.grid.height):
-                cell = env.grid.get(i, j)
-                if cell is None:
+        if not use_location:
+            # we should keep tracking the same objects initially tracked only,
+            # at their current position in the grid
+            for obj in self.obj_set:
+                pos = grid.obj_pos(obj)
+                if pos is None:
                     continue
-
-                if not use_location:
-                    # we should keep tracking the same objects initially tracked only
-                    already_tracked = any([cell is obj for obj in self.obj_set])
-                    if not already_tracked:
-                        continue
-
-                # Check if object's type matches description
-                if self.type is not None and cell.type != self.type:
+                if self.type is not None and obj.type != self.type:
                     continue
-
-                # Check if object's color matches description
-                if self.color is not None and cell.color != self.color:
+                if self.color is not None and obj.color != self.color:
+                    continue
+                self.obj_poss.append(pos)
+            self.obj_poss.sort()
+            return self.obj_set, self.obj_poss
+
+        for i, j in grid.find(self.type, self.color):
+            cell = grid.get(i, j)
+
+            # Check if object's position matches description
+            if self.loc in ["left", "right", "front", "behind"]:
+                # Locations apply only to objects in the same room
+                # the agent starts in
+                if not agent_room.pos_inside(i, j):
                     continue
 
-                # Check if object's position matches description
-                if use_location and self.loc in ["left", "right", "front", "behind"]:
-                    # Locations apply only to objects in the same room
-                    # the agent starts in
-                    if not agent_room.pos_inside(i, j):
-                        continue
-
-                    # Direction from the agent to the object
-                    v = (i - env.agent_pos[0], j - env.agent_pos[1])
+                # Direction from the agent to the object
+                v = (i - env.agent_pos[0], j - env.agent_pos[1])
 
-                    # (d1, d2) is an oriented orthonormal basis
-                    d1 = DIR_TO_VEC[env.agent_dir]
-                    d2 = (-d1[1], d1[0])
+                # (d1, d2) is an oriented orthonormal basis
+                d1 = DIR_TO_VEC[env.agent_dir]
+                d2 = (-d1[1], d1[0])
 
-                    # Check if object's position matches with location
-                    pos_matches = {
-                        "left": dot_product(v, d2) < 0,
-                        "right": dot_product(v, d2) > 0,
-                        "front": dot_product(v, d1) > 0,
-                        "behind": dot_product(v, d1) < 0,
-                    }
+                # Check if object's position matches with location
+                pos_matches = {
+                    "left": dot_product(v, d2) < 0,
+                    "right": dot_product(v, d2) > 0,
+                    "front": dot_product(v, d1) > 0,
+                    "behind": dot_product(v, d1) < 0,
+                }
 
-                    if not (pos_matches[self.loc]):
-                        continue
+                if not (pos_matches[self.loc]):
+                    continue
 
-                if use_location:
-                    self.obj_set.append(cell)
-                self.obj_poss.append((i, j))
+            self.obj_set.append(cell)
+            self.obj_poss.append((i, j))
 
         return self.obj_set, self.obj_poss
 
@@ -195,15 +192,70 @@ class Instr(ABC):
         self.env = env
 
     @abstractmethod
-    def verify(self, action):
+    def verify(self, action, events=None):
         """
         Verify if the task described by the instruction is incomplete,
         complete with success or failed. The return value is a string,
         one of: 'success', 'failure' or 'continue'.
+        `events` are the changes made by the action (see
+        `MiniGridEnv.step_events`), when None the whole instruction is
+        verified.
         """
 
         raise NotImplementedError
 
+    def __getstate__(self):
+        # The environment is set again by `reset_verifier` or
+        # `set_verifier_state`
+        state = self.__dict__.copy()
+        state.pop("env", None)
+        return state
+
+    def _walk(self):
+        """
+        Iterate over the instruction, its sub-instructions and their object
+        descriptions
+        """
+
+        yield self
+        for value in vars(self).values():
+            if isinstance(value, Instr):
+                yield from value._walk()
+            elif isinstance(value, ObjDesc):
+                yield value
+
+    def get_verifier_state(self):
+        """
+        Copy the verification state of the instruction and its parts, to be
+        restored with `set_verifier_state`
+        """
+
+        state = []
+        for node in self._walk():
+            saved = {
+                key: list(value) if isinstance(value, list) else value
+                for key, value in vars(node).items()
+                if key != "env"
+            }
+            state.append((node, saved))
+        return state
+
+    def set_verifier_state(self, state, env):
+        """
+        Restore a state returned by `get_verifier_state`, verifying the
+        instruction in `env`
+        """
+
+        for node, saved in state:
+            node.__dict__.update(
+                {
+                    key: list(value) if isinstance(value, list) else value
+                    for key, value in saved.items()
+                }
+            )
+            if isinstance(node, Instr):
+                node.env = env
+
     def update_objs_poss(self):
         """
         Update the position of objects present in the instruction if needed
@@ -225,22 +277,46 @@ class ActionInstr(Instr, ABC):
         # Indicates that the action was completed on the last step
         self.lastStepMatch = False
 
-    def verify(self, action):
+    def verify(self, action, events=None):
         """
         Verifies actions, with and without the done action.
         """
 
         if not use_done_actions:
-            return self.verify_action(action)
+            return self.verify_events(action, events)
 
         if action == self.env.actions.done:
             if self.lastStepMatch:
                 return "success"
             return "failure"
 
-        res = self.verify_action(action)
+        res = self.verify_events(action, events)
         self.lastStepMatch = res == "success"
 
+    def verify_events(self, action, events):
+        """
+        Verify the action if the instruction subscribes to one of its events
+        """
+
+        if events is None or self.subscribes(events):
+            return self.verify_action(action)
+        return self.skip_action(action)
+
+    def subscribes(self, events):
+        """
+        Whether the changes made by an action may make `verify_action` return
+        something else than "continue", all of them by default
+        """
+
+        return True
+
+    def skip_action(self, action):
+        """
+        Result of an action whose events the instruction does not subscribe to
+        """
+
+        return "continue"
+
     @abstractmethod
     def verify_action(self):
         """
@@ -267,6 +343,19 @@ class OpenInstr(ActionInstr):
         # Identify set of possible matching objects in the environment
         self.desc.find_matching_objs(env)
 
+    def subscribes(self, events):
+        # The doors only open when toggled
+        return any(
+            isinstance(event, Toggled) and event.obj in self.desc.obj_set
+            for event in events
+        )
+
+    def skip_action(self, action):
+        # In strict mode, toggling another door fails even if it stays shut
+        if self.strict and action == self.env.actions.toggle:
+            return self.verify_action(action)
+        return "continue"
+
     def verify_action(self, action):
         # Only verify when the toggle action is performed
         if action != self.env.actions.toggle:
@@ -303,17 +392,38 @@ class GoToInstr(ActionInstr):
     def reset_verifier(self, env):
         super().reset_verifier(env)
 
+        # Result of the last verification and step it was made at
+        self.result = None
+        self.result_step = None
+
         # Identify set of possible matching objects in the environment
         self.desc.find_matching_objs(env)
 
+    def subscribes(self, events):
+        # The cell the agent faces only changes when it moves or turns
+        return any(isinstance(event, (Moved, Turned)) for event in events)
+
+    def skip_action(self, action):
+        # The agent faces the same cell as when verified at the previous step,
+        # and the positions of the objects are the same unless they were
+        # updated after a drop action (see `RoomGridLevel.step`)
+        if (
+            self.result_step != self.env.step_count - 1
+            or action == self.env.actions.drop
+        ):
+            return self.verify_action(action)
+        self.result_step = self.env.step_count
+        return self.result
+
     def verify_action(self, action):
-        # For each object position
-        for pos in self.desc.obj_poss:
-            # If the agent is next to (and facing) the object
-            if np.array_equal(pos, self.env.front_pos):
-                return "success"
+        # If the agent is next to (and facing) an object
+        if tuple(self.env.front_pos.tolist()) in self.desc.obj_poss:
+            self.result = "success"
+        else:
+            self.result = "continue"
+        self.result_step = self.env.step_count
 
-        return "continue"
+        return self.result
 
 
 class PickupInstr(ActionInstr):
@@ -340,6 +450,22 @@ class PickupInstr(ActionInstr):
         # Identify set of possible matching objects in the environment
         self.desc.find_matching_objs(env)
 
+    def subscribes(self, events):
+        return any(
+            isinstance(event, PickedUp) and event.obj in self.desc.obj_set
+            for event in events
+        )
+
+    def skip_action(self, action):
+        # In strict mode, the pickup action fails while carrying another
+        # object, even if nothing was picked up
+        if self.strict and action == self.env.actions.pickup:
+            return self.verify_action(action)
+
+        # To keep track of what was carried at the last time step
+        self.preCarrying = self.env.carrying
+        return "continue"
+
     def verify_action(self, action):
         # To keep track of what was carried at the last time step
         preCarrying = self.preCarrying
@@ -408,6 +534,21 @@ class PutNextInstr(ActionInstr):
                     return True
         return False
 
+    def subscribes(self, events):
+        return any(
+            isinstance(event, Dropped) and event.obj in self.desc_move.obj_set
+            for event in events
+        )
+
+    def skip_action(self, action):
+        # In strict mode, the pickup action fails while carrying an object
+        if self.strict and action == self.env.actions.pickup:
+            return self.verify_action(action)
+
+        # To keep track of what was carried at the last time step
+        self.preCarrying = self.env.carrying
+        return "continue"
+
     def verify_action(self, action):
         # To keep track of what was carried at the last time step
         preCarrying = self.preCarrying
@@ -464,9 +605,9 @@ class BeforeInstr(SeqInstr):
         self.a_done = False
         self.b_done = False
 
-    def verify(self, action):
+    def verify(self, action, events=None):
         if self.a_done == "success":
-            self.b_done = self.instr_b.verify(action)
+            self.b_done = self.instr_b.verify(action, events)
 
             if self.b_done == "failure":
                 return "failure"
@@ -474,16 +615,16 @@ class BeforeInstr(SeqInstr):
             if self.b_done == "success":
                 return "success"
         else:
-            self.a_done = self.instr_a.verify(action)
+            self.a_done = self.instr_a.verify(action, events)
             if self.a_done == "failure":
                 return "failure"
 
             if self.a_done == "success":
-                return self.verify(action)
+                return self.verify(action, events)
 
             # In strict mode, completing b first means failure
             if self.strict:
-                if self.instr_b.verify(action) == "success":
+                if self.instr_b.verify(action, events) == "success":
                     return "failure"
 
         return "continue"
@@ -505,9 +646,9 @@ class AfterInstr(SeqInstr):
         self.a_done = False
         self.b_done = False
 
-    def verify(self, action):
+    def verify(self, action, events=None):
         if self.b_done == "success":
-            self.a_done = self.instr_a.verify(action)
+            self.a_done = self.instr_a.verify(action, events)
 
             if self.a_done == "success":
                 return "success"
@@ -515,16 +656,16 @@ class AfterInstr(SeqInstr):
             if self.a_done == "failure":
                 return "failure"
         else:
-            self.b_done = self.instr_b.verify(action)
+            self.b_done = self.instr_b.verify(action, events)
             if self.b_done == "failure":
                 return "failure"
 
             if self.b_done == "success":
-                return self.verify(action)
+                return self.verify(action, events)
 
             # In strict mode, completing a first means failure
             if self.strict:
-                if self.instr_a.verify(action) == "success":
+                if self.instr_a.verify(action, events) == "success":
                     return "failure"
 
         return "continue"
@@ -551,12 +692,12 @@ class AndInstr(SeqInstr):
         self.a_done = False
         self.b_done = False
 
-    def verify(self, action):
+    def verify(self, action, events=None):
         if self.a_done != "success":
-            self.a_done = self.instr_a.verify(action)
+            self.a_done = self.instr_a.verify(action, events)
 
         if self.b_done != "success":
-            self.b_done = self.instr_b.verify(action)
+            self.b_done = self.instr_b.verify(action, events)
 
         if use_done_actions and action is self.env.actions.done:
             if self.a_done == "failure" and self.b_done == "failure":
@@ -63,6 +63,8 @@ class BlockedUnlockPickupEnv(RoomGrid):
 
     """
 
+    state_attrs = RoomGrid.state_attrs + ("obj",)
+
     def __init__(self, max_steps: int | None = None, **kwargs):
         mission_space = MissionSpace(
             mission_func=self._gen_mission,
@@ -1,15 +1,29 @@
 from __future__ import annotations
 
+from functools import lru_cache
 from operator import add
 
+import numpy as np
 from gymnasium.spaces import Discrete
 
+from minigrid.core.constants import OBJECT_TO_IDX
 from minigrid.core.grid import Grid
 from minigrid.core.mission import MissionSpace
 from minigrid.core.world_object import Ball, Goal
 from minigrid.minigrid_env import MiniGridEnv
 
 
+@lru_cache(maxsize=None)
+def _window_offsets(height: int) -> np.ndarray:
+    """
+    Offsets of the cells of a 3x3 window from its center, in a flattened
+    (width, height) array, column by column
+    """
+
+    dx, dy = np.divmod(np.arange(9), 3)
+    return (dx - 1) * height + (dy - 1)
+
+
 class DynamicObstaclesEnv(MiniGridEnv):
     """
     ## Description
@@ -69,6 +83,8 @@ class DynamicObstaclesEnv(MiniGridEnv):
 
     """
 
+    state_attrs = ("obstacles",)
+
     def __init__(
         self,
         size=8,
@@ -143,17 +159,10 @@ class DynamicObstaclesEnv(MiniGridEnv):
         not_clear = front_cell and front_cell.type != "goal"
 
         # Update obstacle positions
-        for i_obst in range(len(self.obstacles)):
-            old_pos = self.obstacles[i_obst].cur_pos
-            top = tuple(map(add, old_pos, (-1, -1)))
-
-            try:
-                self.place_obj(
-                    self.obstacles[i_obst], top=top, size=(3, 3), max_tries=100
-                )
-                self.grid.set(old_pos[0], old_pos[1], None)
-            except Exception:
-                pass
+        if self.legacy_place_obj:
+            self._move_obstacles_legacy()
+        else:
+            self._move_obstacles()
 
         # Update the agent's position/direction
         obs, reward, terminated, truncated, info = super().step(action)
@@ -165,3 +174,67 @@ class DynamicObstaclesEnv(MiniGridEnv):
             return obs, reward, terminated, truncated, info
 
         return obs, reward, terminated, truncated, info
+
+    def _move_obstacles(self):
+        """
+        Move each obstacle to one of the empty cells around it, drawn
+        uniformly. Obstacles without empty cells around them stay put.
+
+        The cells around all the obstacles are read from the grid encoding
+        at once. Obstacles then move in order, each one seeing the cells
+        freed and taken by the previous ones, which draws the same positions
+        as placing them one after the other with `place_obj`.
+        """
+
+        if not self.obstacles:
+            return
+
+        height = self.grid.height
+
+        # Obstacles are inside the outer walls, so the 3x3 windows around them
+        # are inside the grid. Cells are indexed as in the (width, height)
+        # encoding, and listed in the order `place_obj` draws from.
+        pos = [tuple(obst.cur_pos) for obst in self.obstacles]
+        centers = np.array([x * height + y for x, y in pos])
+        window_cells = centers[:, None] + _window_offsets(height)
+        types = self.grid.state[:, :, 0].ravel()
+        free = (types[window_cells] == OBJECT_TO_IDX["empty"]).tolist()
+        ax, ay = self.agent_pos
+        agent_cell = ax * height + ay
+
+        # Cells freed (True) or taken (False) by the obstacles moved so far
+        changed: dict[int, bool] = {agent_cell: False}
+        moves = []
+        for obst, (x, y), cells, cells_free in zip(
+            self.obstacles, pos, window_cells.tolist(), free
+        ):
+            candidates = [
+                cell
+                for cell, is_free in zip(cells, cells_free)
+                if changed.get(cell, is_free)
+            ]
+            if not candidates:
+                continue
+
+            cell = candidates[self._rand_int(0, len(candidates))]
+            changed[x * height + y] = True
+            changed[cell] = False
+            new_pos = (cell // height, cell % height)
+            moves.append(((x, y), new_pos))
+            obst.init_pos = new_pos
+            obst.cur_pos = new_pos
+
+        self.grid.move_objs(moves)
+
+    def _move_obstacles_legacy(self):
+        for i_obst in range(len(self.obstacles)):
+            old_pos = self.obstacles[i_obst].cur_pos
+            top = tuple(map(add, old_pos, (-1, -1)))
+
+            try:
+                self.place_obj(
+                    self.obstacles[i_obst], top=top, size=(3, 3), max_tries=100
+                )
+                self.grid.set(old_pos[0], old_pos[1], None)
+            except Exception:
+                pass
@@ -70,6 +70,8 @@ class FetchEnv(MiniGridEnv):
 
     """
 
+    state_attrs = ("targetType", "targetColor")
+
     def __init__(self, size=8, numObjs=3, max_steps: int | None = None, **kwargs):
         self.numObjs = numObjs
         self.obj_types = ["key", "ball"]
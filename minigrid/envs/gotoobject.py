@@ -63,6 +63,8 @@ class GoToObjectEnv(MiniGridEnv):
 
     """
 
+    state_attrs = ("target_pos",)
+
     def __init__(self, size=6, numObjs=2, max_steps: int | None = None, **kwargs):
         self.numObjs = numObjs
         self.size = size
@@ -71,6 +71,8 @@ class KeyCorridorEnv(RoomGrid):
 
     """
 
+    state_attrs = RoomGrid.state_attrs + ("obj",)
+
     def __init__(
         self,
         num_rows=3,
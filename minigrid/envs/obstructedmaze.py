@@ -77,6 +77,8 @@ class ObstructedMazeEnv(RoomGrid):
 
     """
 
+    state_attrs = RoomGrid.state_attrs + ("obj",)
+
     def __init__(
         self,
         num_rows,
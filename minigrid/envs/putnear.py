@@ -66,6 +66,8 @@ class PutNearEnv(MiniGridEnv):
 
     """
 
+    state_attrs = ("move_type", "moveColor", "target_pos")
+
     def __init__(self, size=6, numObjs=2, max_steps: int | None = None, **kwargs):
         self.size = size
         self.numObjs = numObjs
@@ -58,6 +58,8 @@ class RedBlueDoorEnv(MiniGridEnv):
 
     """
 
+    state_attrs = ("red_door", "blue_door")
+
     def __init__(self, size=8, max_steps: int | None = None, **kwargs):
         self.size = size
         mission_space = MissionSpace(mission_func=self._gen_mission)
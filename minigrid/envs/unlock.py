@@ -52,6 +52,8 @@ class UnlockEnv(RoomGrid):
 
     """
 
+    state_attrs = RoomGrid.state_attrs + ("door",)
+
     def __init__(self, max_steps: int | None = None, **kwargs):
         room_size = 6
         mission_space = MissionSpace(mission_func=self._gen_mission)
@@ -56,6 +56,8 @@ class UnlockPickupEnv(RoomGrid):
 
     """
 
+    state_attrs = RoomGrid.state_attrs + ("obj",)
+
     def __init__(self, max_steps: int | None = None, **kwargs):
         room_size = 6
         mission_space = MissionSpace(
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+import copy
 import hashlib
 import math
 from abc import abstractmethod
-from typing import Any, Iterable, SupportsFloat, TypeVar
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator, SupportsFloat, TypeVar
 
 import gymnasium as gym
 import numpy as np
@@ -13,10 +15,25 @@ from gymnasium import spaces
 from gymnasium.core import ActType, ObsType
 
 from minigrid.core.actions import Actions
-from minigrid.core.constants import COLOR_NAMES, DIR_TO_VEC, TILE_PIXELS
-from minigrid.core.grid import Grid
+from minigrid.core.constants import (
+    COLOR_NAMES,
+    DIR_TO_TUPLE,
+    DIR_TO_VEC,
+    OBJECT_TO_IDX,
+    TILE_PIXELS,
+)
+from minigrid.core.events import Dropped, Event, Moved, PickedUp, Toggled, Turned
+from minigrid.core.grid import EMPTY_ENCODING, Grid, _view_deltas
 from minigrid.core.mission import MissionSpace
-from minigrid.core.world_object import Point, WorldObj
+from minigrid.core.reset_stats import ResetStats
+from minigrid.core.visibility import compute_visibility
+from minigrid.core.world_object import (
+    Point,
+    WorldObj,
+    get_objects_state,
+    set_objects_state,
+)
+from minigrid.core.zobrist import agent_keys, carrying_key
 
 T = TypeVar("T")
 
@@ -31,6 +48,14 @@ class MiniGridEnv(gym.Env):
         "render_fps": 10,
     }
 
+    # Attributes set when generating an episode and read while stepping,
+    # saved and restored by `get_state` and `set_state`
+    state_attrs: tuple[str, ...] = ()
+
+    # Place objects by rejection sampling like earlier versions, which
+    # draws positions from a different stream of random numbers
+    legacy_place_obj: bool = False
+
     def __init__(
         self,
         mission_space: MissionSpace,
@@ -110,8 +135,23 @@ class MiniGridEnv(gym.Env):
         self.grid = Grid(width, height)
         self.carrying = None
 
+        # Changes made by the last action (see `minigrid.core.events`)
+        self.step_events: list[Event] = []
+
         # Rendering attributes
         self.render_mode = render_mode
+
+        # Counters and timings of the last reset
+        self.reset_stats = ResetStats()
+
+        # Depth of nested `skip_obs_image` blocks
+        self._obs_image_skips = 0
+
+        # State and view visibility mask of the last observation, from which
+        # `last_obs_world_mask` is computed the first time it is read
+        self._last_obs_view = None
+        self._last_obs_world_mask = None
+
         self.highlight = highlight
         self.tile_size = tile_size
         self.agent_pov = agent_pov
@@ -124,12 +164,23 @@ class MiniGridEnv(gym.Env):
     ) -> tuple[ObsType, dict[str, Any]]:
         super().reset(seed=seed)
 
+        stats = self.reset_stats = ResetStats()
+        stats.num_resets = 1
+        stats.recording = True
+
         # Reinitialize episode-specific variables
         self.agent_pos = (-1, -1)
         self.agent_dir = -1
 
-        # Generate a new random grid at the start of each episode
-        self._gen_grid(self.width, self.height)
+        # Generate a new random grid at the start of each episode, or build
+        # the level given in the options, e.g. by a `LevelBank`
+        level = options.get("level") if options else None
+        if level is None:
+            with stats.phase("gen_grid"):
+                self._gen_grid(self.width, self.height)
+        else:
+            with stats.phase("build_level"):
+                level.build(self)
 
         # These fields should be defined by _gen_grid
         assert (
@@ -138,12 +189,18 @@ class MiniGridEnv(gym.Env):
             else all(self.agent_pos >= 0) and self.agent_dir >= 0
         )
 
+        # Keep the agent pose as Python ints, which are cheaper to step with
+        # than NumPy scalars or arrays
+        self.agent_pos = (int(self.agent_pos[0]), int(self.agent_pos[1]))
+        self.agent_dir = int(self.agent_dir)
+
         # Check that the agent doesn't overlap with an object
         start_cell = self.grid.get(*self.agent_pos)
         assert start_cell is None or start_cell.can_overlap()
 
         # Item picked up, being carried, initially nothing
         self.carrying = None
+        self.step_events = []
 
         # Step count since episode start
         self.step_count = 0
@@ -152,22 +209,121 @@ class MiniGridEnv(gym.Env):
             self.render()
 
         # Return first observation
-        obs = self.gen_obs()
+        with stats.phase("gen_obs"):
+            obs = self.gen_obs()
+        stats.recording = False
 
         return obs, {}
 
     def hash(self, size=16):
         """Compute a hash that uniquely identifies the current state of the environment.
+
+        The agent pose is hashed as Python ints, so that a state has the same
+        hash however it was reached. Hashes computed by earlier versions,
+        which hashed the NumPy scalars or arrays holding the pose as text, do
+        not match these.
+
         :param size: Size of the hashing
         """
         sample_hash = hashlib.sha256()
 
-        to_encode = [self.grid.encode().tolist(), self.agent_pos, self.agent_dir]
+        agent_pos = tuple(int(v) for v in self.agent_pos)
+        to_encode = [self.grid.encode().tolist(), agent_pos, int(self.agent_dir)]
         for item in to_encode:
             sample_hash.update(str(item).encode("utf8"))
 
         return sample_hash.hexdigest()[:size]
 
+    @property
+    def state_hash(self) -> int:
+        """64-bit Zobrist hash of the current state of the environment.
+
+        The hash covers the grid encoding, the agent position and direction,
+        like `hash()`, and the encoding of the carried object. It is the XOR
+        of fixed random keys, one per (cell, encoding), agent pose and
+        carried encoding, and the grid part is updated in O(1) as cells
+        change, so reading it costs a few table lookups rather than hashing
+        the whole grid.
+
+        Equal states always have equal hashes, in any process. Keys are
+        uniformly random 64-bit integers, so two distinct states collide with
+        probability 2**-64, and a set of n distinct states contains a
+        collision with probability about n**2 / 2**65 (below 1e-7 for a
+        million states, about 3% for a billion). Hashes of grids of different
+        sizes use independent keys.
+        """
+
+        grid = self.grid
+        x, y = self.agent_pos
+        pose_key = agent_keys(grid.width, grid.height).item(
+            y * grid.width + x, self.agent_dir
+        )
+        state_hash = grid.zobrist_hash ^ pose_key
+        if self.carrying is not None:
+            state_hash ^= carrying_key(self.carrying.encode())
+        return state_hash
+
+    def get_state(self) -> dict[str, Any]:
+        """Capture the state of the environment, to be restored with `set_state`.
+
+        The snapshot holds the grid encoding, the objects of the grid and a
+        copy of their attributes, the agent position and direction, the
+        carried object, the step count, the mission and the state of the
+        random number generator. Objects are referenced rather than copied,
+        so snapshots are cheap to take and restore in the same process, and
+        can also be pickled.
+
+        Subclasses list the other attributes of an episode in `state_attrs`,
+        and extend both methods for state that needs more than a reference,
+        e.g.
+
+            def get_state(self):
+                state = super().get_state()
+                state["counters"] = dict(self.counters)
+                return state
+
+            def set_state(self, state):
+                super().set_state(state)
+                self.counters = dict(state["counters"])
+        """
+
+        return {
+            "grid": self.grid.snapshot(),
+            "agent_pos": copy.copy(self.agent_pos),
+            "agent_dir": self.agent_dir,
+            "carrying": self.carrying,
+            "carrying_state": get_objects_state([self.carrying]),
+            "step_count": self.step_count,
+            "mission": self.mission,
+            "np_random": self.np_random.bit_generator.state,
+            "attrs": {name: getattr(self, name) for name in self.state_attrs},
+        }
+
+    def set_state(self, state: dict[str, Any]):
+        """Restore a state captured by `get_state`.
+
+        Observations are not regenerated, call `gen_obs` if needed.
+        """
+
+        width, height = state["grid"][0].shape[:2]
+        if (self.grid.width, self.grid.height) != (width, height):
+            self.grid = Grid(width, height)
+        self.grid.restore(state["grid"])
+
+        self.agent_pos = copy.copy(state["agent_pos"])
+        self.agent_dir = state["agent_dir"]
+        self.carrying = state["carrying"]
+        set_objects_state(state["carrying_state"])
+        self.step_count = state["step_count"]
+        self.mission = state["mission"]
+        self.np_random.bit_generator.state = state["np_random"]
+        for name, value in state["attrs"].items():
+            setattr(self, name, value)
+
+        # The last observation was of another state
+        self._last_obs_view = None
+        self._last_obs_world_mask = None
+
     @property
     def steps_remaining(self):
         return self.max_steps - self.step_count
@@ -321,6 +477,12 @@ class MiniGridEnv(gym.Env):
         """
         Place an object at an empty position in the grid
 
+        The position is drawn uniformly among the empty cells of the
+        rectangle, other than the agent's, that `reject_fn` accepts.
+        `RecursionError` is raised when there is no such cell, or after
+        `max_tries` positions were rejected (after `max_tries` draws with
+        `legacy_place_obj`).
+
         :param top: top-left position of the rectangle where to place
         :param size: size of the rectangle where to place
         :param reject_fn: function to filter out potential positions
@@ -334,6 +496,62 @@ class MiniGridEnv(gym.Env):
         if size is None:
             size = (self.grid.width, self.grid.height)
 
+        if self.legacy_place_obj:
+            pos = self._sample_pos_legacy(top, size, reject_fn, max_tries)
+        else:
+            pos = self._sample_pos(top, size, reject_fn, max_tries)
+
+        self.grid.set(pos[0], pos[1], obj)
+
+        if obj is not None:
+            obj.init_pos = pos
+            obj.cur_pos = pos
+
+        return pos
+
+    def _sample_pos(self, top, size, reject_fn, max_tries) -> tuple[int, int]:
+        """
+        Sample a position uniformly among the empty cells of the rectangle
+        that are not under the agent and not rejected by `reject_fn`
+        """
+
+        x0, y0 = top
+        x1 = min(x0 + size[0], self.grid.width)
+        y1 = min(y0 + size[1], self.grid.height)
+
+        # Empty cells are those encoded as empty in the grid
+        free = self.grid.state[x0:x1, y0:y1, 0] == OBJECT_TO_IDX["empty"]
+        ax, ay = self.agent_pos
+        if x0 <= ax < x1 and y0 <= ay < y1:
+            free[ax - x0, ay - y0] = False
+        xs, ys = np.nonzero(free)
+        xs += x0
+        ys += y0
+
+        # Rejected cells are removed from the candidates, so that the accepted
+        # position is uniform among the cells `reject_fn` accepts
+        num_free = len(xs)
+        num_rejected = 0
+        while True:
+            if num_free == 0 or num_rejected > max_tries:
+                raise RecursionError("rejection sampling failed in place_obj")
+
+            self.reset_stats.count("place_obj_tries")
+            k = self._rand_int(0, num_free)
+            pos = (int(xs[k]), int(ys[k]))
+            if reject_fn is None or not reject_fn(self, pos):
+                return pos
+
+            num_rejected += 1
+            num_free -= 1
+            xs[k], ys[k] = xs[num_free], ys[num_free]
+
+    def _sample_pos_legacy(self, top, size, reject_fn, max_tries) -> tuple[int, int]:
+        """
+        Sample a position by drawing cells of the rectangle until one is
+        empty, not under the agent and not rejected by `reject_fn`
+        """
+
         num_tries = 0
 
         while True:
@@ -343,6 +561,7 @@ class MiniGridEnv(gym.Env):
                 raise RecursionError("rejection sampling failed in place_obj")
 
             num_tries += 1
+            self.reset_stats.count("place_obj_tries")
 
             pos = (
                 self._rand_int(top[0], min(top[0] + size[0], self.grid.width)),
@@ -361,15 +580,7 @@ class MiniGridEnv(gym.Env):
             if reject_fn and reject_fn(self, pos):
                 continue
 
-            break
-
-        self.grid.set(pos[0], pos[1], obj)
-
-        if obj is not None:
-            obj.init_pos = pos
-            obj.cur_pos = pos
-
-        return pos
+            return pos
 
     def put_obj(self, obj: WorldObj, i: int, j: int):
         """
@@ -512,9 +723,9 @@ class MiniGridEnv(gym.Env):
             return False
         vx, vy = coordinates
 
-        obs = self.gen_obs()
+        image, _ = self.gen_obs_image()
 
-        obs_grid, _ = Grid.decode(obs["image"])
+        obs_grid, _ = Grid.decode(image)
         obs_cell = obs_grid.get(vx, vy)
         world_cell = self.grid.get(x, y)
 
@@ -526,66 +737,18 @@ class MiniGridEnv(gym.Env):
         self, action: ActType
     ) -> tuple[ObsType, SupportsFloat, bool, bool, dict[str, Any]]:
         self.step_count += 1
+        self.step_events = []
 
-        reward = 0
-        terminated = False
-        truncated = False
-
-        # Get the position in front of the agent
-        fwd_pos = self.front_pos
-
-        # Get the contents of the cell in front of the agent
-        fwd_cell = self.grid.get(*fwd_pos)
-
-        # Rotate left
-        if action == self.actions.left:
-            self.agent_dir -= 1
-            if self.agent_dir < 0:
-                self.agent_dir += 4
-
-        # Rotate right
-        elif action == self.actions.right:
-            self.agent_dir = (self.agent_dir + 1) % 4
-
-        # Move forward
-        elif action == self.actions.forward:
-            if fwd_cell is None or fwd_cell.can_overlap():
-                self.agent_pos = tuple(fwd_pos)
-            if fwd_cell is not None and fwd_cell.type == "goal":
-                terminated = True
-                reward = self._reward()
-            if fwd_cell is not None and fwd_cell.type == "lava":
-                terminated = True
-
-        # Pick up an object
-        elif action == self.actions.pickup:
-            if fwd_cell and fwd_cell.can_pickup():
-                if self.carrying is None:
-                    self.carrying = fwd_cell
-                    self.carrying.cur_pos = np.array([-1, -1])
-                    self.grid.set(fwd_pos[0], fwd_pos[1], None)
-
-        # Drop an object
-        elif action == self.actions.drop:
-            if not fwd_cell and self.carrying:
-                self.grid.set(fwd_pos[0], fwd_pos[1], self.carrying)
-                self.carrying.cur_pos = fwd_pos
-                self.carrying = None
-
-        # Toggle/activate an object
-        elif action == self.actions.toggle:
-            if fwd_cell:
-                fwd_cell.toggle(self, fwd_pos)
-
-        # Done action (not used by default)
-        elif action == self.actions.done:
-            pass
-
-        else:
-            raise ValueError(f"Unknown action: {action}")
+        # Actions are dispatched by their integer value
+        if isinstance(action, np.ndarray):
+            action = action.item()
+        try:
+            handler = self._action_handlers[action]
+        except (KeyError, TypeError):
+            raise ValueError(f"Unknown action: {action}") from None
+        reward, terminated = getattr(self, handler)()
 
-        if self.step_count >= self.max_steps:
-            truncated = True
+        truncated = self.step_count >= self.max_steps
 
         if self.render_mode == "human":
             self.render()
@@ -594,6 +757,85 @@ class MiniGridEnv(gym.Env):
 
         return obs, reward, terminated, truncated, {}
 
+    def _front(self) -> tuple[tuple[int, int], WorldObj | None]:
+        """
+        Position of the cell in front of the agent, as a tuple of ints, and
+        its contents
+        """
+
+        x, y = self.agent_pos
+        dx, dy = DIR_TO_TUPLE[self.agent_dir]
+        fwd_pos = (x + dx, y + dy)
+        return fwd_pos, self.grid.get(*fwd_pos)
+
+    # Each action updates the environment, records the changes it made in
+    # `step_events` and returns the reward and whether the episode terminated
+
+    def _rotate_left(self) -> tuple[SupportsFloat, bool]:
+        self.agent_dir = (self.agent_dir - 1) % 4
+        self.step_events.append(Turned(self.agent_dir))
+        return 0, False
+
+    def _rotate_right(self) -> tuple[SupportsFloat, bool]:
+        self.agent_dir = (self.agent_dir + 1) % 4
+        self.step_events.append(Turned(self.agent_dir))
+        return 0, False
+
+    def _move_forward(self) -> tuple[SupportsFloat, bool]:
+        fwd_pos, fwd_cell = self._front()
+        if fwd_cell is None:
+            self.agent_pos = fwd_pos
+            self.step_events.append(Moved(fwd_pos))
+            return 0, False
+        if fwd_cell.can_overlap():
+            self.agent_pos = fwd_pos
+            self.step_events.append(Moved(fwd_pos))
+        if fwd_cell.type == "goal":
+            return self._reward(), True
+        if fwd_cell.type == "lava":
+            return 0, True
+        return 0, False
+
+    def _pickup(self) -> tuple[SupportsFloat, bool]:
+        fwd_pos, fwd_cell = self._front()
+        if fwd_cell and fwd_cell.can_pickup():
+            if self.carrying is None:
+                self.carrying = fwd_cell
+                self.carrying.cur_pos = np.array([-1, -1])
+                self.grid.set(fwd_pos[0], fwd_pos[1], None)
+                self.step_events.append(PickedUp(fwd_cell, fwd_pos))
+        return 0, False
+
+    def _drop(self) -> tuple[SupportsFloat, bool]:
+        fwd_pos, fwd_cell = self._front()
+        if not fwd_cell and self.carrying:
+            self.grid.set(fwd_pos[0], fwd_pos[1], self.carrying)
+            self.carrying.cur_pos = fwd_pos
+            self.step_events.append(Dropped(self.carrying, fwd_pos))
+            self.carrying = None
+        return 0, False
+
+    def _toggle(self) -> tuple[SupportsFloat, bool]:
+        fwd_pos, fwd_cell = self._front()
+        if fwd_cell and fwd_cell.toggle(self, fwd_pos):
+            self.step_events.append(Toggled(fwd_cell, fwd_pos))
+        return 0, False
+
+    def _done(self) -> tuple[SupportsFloat, bool]:
+        # Done action (not used by default)
+        return 0, False
+
+    # Handlers are looked up by name, so that subclasses can override them
+    _action_handlers = {
+        Actions.left: "_rotate_left",
+        Actions.right: "_rotate_right",
+        Actions.forward: "_move_forward",
+        Actions.pickup: "_pickup",
+        Actions.drop: "_drop",
+        Actions.toggle: "_toggle",
+        Actions.done: "_done",
+    }
+
     def gen_obs_grid(self, agent_view_size=None):
         """
         Generate the sub-grid observed by the agent.
@@ -602,17 +844,11 @@ class MiniGridEnv(gym.Env):
         if agent_view_size is None, self.agent_view_size is used
         """
 
-        topX, topY, botX, botY = self.get_view_exts(agent_view_size)
-
         agent_view_size = agent_view_size or self.agent_view_size
 
-        grid = self.grid.slice(topX, topY, agent_view_size, agent_view_size)
-
-        for i in range(self.agent_dir + 1):
-            grid = grid.rotate_left()
+        grid = self.grid.view(self.agent_pos, self.agent_dir, agent_view_size)
 
         # Process occluders and visibility
-        # Note that this incurs some performance cost
         if not self.see_through_walls:
             vis_mask = grid.process_vis(
                 agent_pos=(agent_view_size // 2, agent_view_size - 1)
@@ -631,15 +867,65 @@ class MiniGridEnv(gym.Env):
 
         return grid, vis_mask
 
+    def gen_obs_image(self, agent_view_size=None):
+        """
+        Generate the encoding of the sub-grid observed by the agent and its
+        visibility mask. This gives the same result as encoding the output of
+        `gen_obs_grid`, but works on the grid arrays directly.
+        if agent_view_size is None, self.agent_view_size is used
+        """
+
+        agent_view_size = agent_view_size or self.agent_view_size
+
+        if type(self).gen_obs_grid is not MiniGridEnv.gen_obs_grid:
+            # Respect subclasses customizing the observed grid
+            grid, vis_mask = self.gen_obs_grid(agent_view_size)
+            return grid.encode(vis_mask), vis_mask
+
+        image, opaque = self.grid.gather_view(
+            self.agent_pos, self.agent_dir, agent_view_size
+        )
+
+        agent_pos = agent_view_size // 2, agent_view_size - 1
+        if not self.see_through_walls:
+            vis_mask = compute_visibility(opaque, agent_pos)
+            image[~vis_mask] = 0
+        else:
+            vis_mask = np.ones(shape=opaque.shape, dtype=bool)
+
+        # The agent sees what it's carrying at its own position
+        if self.carrying:
+            image[agent_pos] = self.carrying.encode()
+        else:
+            image[agent_pos] = EMPTY_ENCODING
+
+        return image, vis_mask
+
     def gen_obs(self):
         """
         Generate the agent's view (partially observable, low-resolution encoding)
+
+        Inside `skip_obs_image` blocks, the image is left blank.
         """
 
-        grid, vis_mask = self.gen_obs_grid()
+        if self._obs_image_skips:
+            # Blank image, still in the observation space
+            size = self.agent_view_size
+            image = np.zeros((size, size, 3), dtype=np.uint8)
+            vis_mask = None
+        else:
+            # Encode the partially observable view into a numpy array
+            image, vis_mask = self.gen_obs_image()
 
-        # Encode the partially observable view into a numpy array
-        image = grid.encode(vis_mask)
+        self._last_obs_view = (
+            self.grid,
+            self.grid.version,
+            self.agent_pos,
+            self.agent_dir,
+            self.agent_view_size,
+            vis_mask,
+        )
+        self._last_obs_world_mask = None
 
         # Observations are dictionaries containing:
         # - an image (partially observable view of the environment)
@@ -649,6 +935,96 @@ class MiniGridEnv(gym.Env):
 
         return obs
 
+    @property
+    def last_obs_world_mask(self) -> np.ndarray:
+        """
+        Read-only (width, height) mask of the cells of the grid visible in the
+        last observation. It is computed once per observation, the first time
+        it is read, so that consumers such as the bot and the renderer can
+        merge it into their own masks with a single array operation. If the
+        image of the last observation was skipped, the mask is computed from
+        the state of the environment when it is first read.
+
+        Example:
+            >>> import gymnasium as gym
+            >>> env = gym.make("MiniGrid-Empty-5x5-v0")
+            >>> _ = env.reset(seed=0)
+            >>> env.unwrapped.last_obs_world_mask.astype(int).T
+            array([[0, 1, 1, 1, 1],
+                   [0, 1, 1, 1, 1],
+                   [0, 1, 1, 1, 1],
+                   [0, 1, 1, 1, 1],
+                   [0, 1, 1, 1, 1]])
+        """
+
+        if self._last_obs_world_mask is None:
+            assert self._last_obs_view is not None, "no observation generated yet"
+            _, _, agent_pos, agent_dir, view_size, vis_mask = self._last_obs_view
+            if vis_mask is None:
+                _, vis_mask = self.gen_obs_image(view_size)
+            mask = self._world_vis_mask(agent_pos, agent_dir, vis_mask)
+            mask.flags.writeable = False
+            self._last_obs_world_mask = mask
+        return self._last_obs_world_mask
+
+    def _world_vis_mask(self, agent_pos, agent_dir, vis_mask) -> np.ndarray:
+        """
+        Scatter the visibility mask of the view of an agent at `agent_pos`
+        facing `agent_dir` onto a (width, height) mask of the grid
+        """
+
+        # World coordinates of the visible cells of the agent's view area
+        dx, dy = _view_deltas(agent_dir, vis_mask.shape[0])
+        abs_i = agent_pos[0] + dx[vis_mask]
+        abs_j = agent_pos[1] + dy[vis_mask]
+        inside = (
+            (abs_i >= 0) & (abs_i < self.width) & (abs_j >= 0) & (abs_j < self.height)
+        )
+
+        mask = np.zeros(shape=(self.width, self.height), dtype=bool)
+        mask[abs_i[inside], abs_j[inside]] = True
+        return mask
+
+    def _obs_state_unchanged(self) -> bool:
+        """
+        Whether the grid and agent pose are those of the last observation
+        """
+
+        if self._last_obs_view is None:
+            return False
+        grid, version, agent_pos, agent_dir, view_size, _ = self._last_obs_view
+        return (
+            grid is self.grid
+            and version == self.grid.version
+            and tuple(agent_pos) == tuple(self.agent_pos)
+            and agent_dir == self.agent_dir
+            and view_size == self.agent_view_size
+        )
+
+    @contextmanager
+    def skip_obs_image(self) -> Iterator[None]:
+        """
+        Leave blank (all zeros) the `image` of the observations generated in
+        the block, for callers that do not use it. This skips computing the
+        agent view, which takes most of the time of a step in small
+        environments. Wrappers that replace the image, such as
+        `FullyObsWrapper`, step and reset the environment in such a block.
+
+        Example:
+            >>> import gymnasium as gym
+            >>> env = gym.make("MiniGrid-Empty-5x5-v0")
+            >>> with env.unwrapped.skip_obs_image():
+            ...     obs, _ = env.reset(seed=0)
+            >>> int(obs["image"].max()), obs["direction"]
+            (0, 0)
+        """
+
+        self._obs_image_skips += 1
+        try:
+            yield
+        finally:
+            self._obs_image_skips -= 1
+
     def get_pov_render(self, tile_size):
         """
         Render an agent's POV observation for visualization
@@ -669,46 +1045,24 @@ class MiniGridEnv(gym.Env):
         """
         Render a non-paratial observation for visualization
         """
-        # Compute which cells are visible to the agent
-        _, vis_mask = self.gen_obs_grid()
-
-        # Compute the world coordinates of the bottom-left corner
-        # of the agent's view area
-        f_vec = self.dir_vec
-        r_vec = self.right_vec
-        top_left = (
-            self.agent_pos
-            + f_vec * (self.agent_view_size - 1)
-            - r_vec * (self.agent_view_size // 2)
-        )
-
-        # Mask of which cells to highlight
-        highlight_mask = np.zeros(shape=(self.width, self.height), dtype=bool)
-
-        # For each cell in the visibility mask
-        for vis_j in range(0, self.agent_view_size):
-            for vis_i in range(0, self.agent_view_size):
-                # If this cell is not visible, don't highlight it
-                if not vis_mask[vis_i, vis_j]:
-                    continue
-
-                # Compute the world coordinates of this cell
-                abs_i, abs_j = top_left - (f_vec * vis_j) + (r_vec * vis_i)
-
-                if abs_i < 0 or abs_i >= self.width:
-                    continue
-                if abs_j < 0 or abs_j >= self.height:
-                    continue
-
-                # Mark this cell to be highlighted
-                highlight_mask[abs_i, abs_j] = True
+        # Mask of which cells to highlight: the cells visible to the agent,
+        # as in the last observation unless the state changed since
+        highlight_mask = None
+        if highlight:
+            if self._obs_state_unchanged():
+                highlight_mask = self.last_obs_world_mask
+            else:
+                _, vis_mask = self.gen_obs_image()
+                highlight_mask = self._world_vis_mask(
+                    self.agent_pos, self.agent_dir, vis_mask
+                )
 
         # Render the whole grid
         img = self.grid.render(
             tile_size,
             self.agent_pos,
             self.agent_dir,
-            highlight_mask=highlight_mask if highlight else None,
+            highlight_mask=highlight_mask,
         )
 
         return img
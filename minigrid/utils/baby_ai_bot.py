@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+from collections import deque
+
 import numpy as np
 
+from minigrid.core.constants import OBJECT_TO_IDX, STATE_TO_IDX
 from minigrid.core.world_object import WorldObj
 from minigrid.envs.babyai.core.verifier import (
     AfterInstr,
@@ -28,6 +31,108 @@ class DisappearedBoxError(Exception):
         return repr(self.value)
 
 
+class BotStuckError(AssertionError):
+    """
+    Error that's thrown when the bot cannot make progress on the mission,
+    e.g. with nothing left to explore or no object matching a description.
+    It is an AssertionError, as the bot used to assert that this does not
+    happen.
+    """
+
+
+class _SearchField:
+    """Breadth first search from a set of initial states, expanded as far as
+    the queries made to it need.
+
+    Positions are visited in the same order whatever the query, which only
+    decides where the search stops. Queries made on the same grid, visibility
+    mask and initial states can then share a search: each one scans the
+    positions already visited before expanding the search further.
+
+    Args:
+        grid: the grid to search
+        expandable (list): `expandable[i][j]` is True for the positions
+            whose neighbors can be visited
+        initial_states (list): (i, j, di, dj) states to start from
+
+    """
+
+    def __init__(self, grid, expandable, initial_states):
+        self.grid = grid
+        self.expandable = expandable
+
+        # Positions are only queued the first time they are reached, which
+        # visits them in the same order as queueing every state and skipping
+        # the positions already visited
+        self.queue = deque()
+        self.previous_pos = dict()
+        for i, j, di, dj in initial_states:
+            if (i, j) not in self.previous_pos:
+                self.previous_pos[(i, j)] = None
+                self.queue.append((i, j, di, dj))
+
+        # Visited positions, in order
+        self.order = []
+
+    def _visit_next(self):
+        """Visit the next position, or return None if the search is over."""
+        if not self.queue:
+            return None
+
+        i, j, di, dj = self.queue.popleft()
+        self.order.append((i, j))
+
+        # Location to which the bot can get without turning
+        # are put in the queue first
+        if self.expandable[i][j]:
+            previous_pos = self.previous_pos
+            width, height = self.grid.width, self.grid.height
+            for k, l in ((di, dj), (dj, di), (-dj, -di), (-di, -dj)):
+                next_pos = (i + k, j + l)
+                if next_pos in previous_pos:
+                    continue
+                if 0 <= next_pos[0] < width and 0 <= next_pos[1] < height:
+                    previous_pos[next_pos] = (i, j)
+                    self.queue.append((*next_pos, k, l))
+        return i, j
+
+    def search(self, accept_fn):
+        """Find the first visited position satisfying `accept_fn`.
+
+        Returns:
+            path (list): positions from the accepted one back to the initial
+                one, or None if no position is accepted
+            pos (int, int): the accepted position
+            num_steps (int): the number of positions tried
+
+        """
+        cells, width = self.grid.grid, self.grid.width
+        order = self.order
+        num_steps = 0
+        while True:
+            if num_steps < len(order):
+                pos = order[num_steps]
+            else:
+                pos = self._visit_next()
+                if pos is None:
+                    return None, None, num_steps
+            num_steps += 1
+
+            # If we reached a position satisfying the acceptance condition
+            if accept_fn(pos, cells[pos[1] * width + pos[0]]):
+                path = []
+                while pos:
+                    path.append(pos)
+                    pos = self.previous_pos[pos]
+                return path, path[0], num_steps
+
+    def visited(self):
+        """All the positions reachable from the initial states, in order."""
+        while self._visit_next() is not None:
+            pass
+        return self.order
+
+
 def manhattan_distance(pos, target):
     return np.abs(target[0] - pos[0]) + np.abs(target[1] - pos[1])
 
@@ -517,6 +622,17 @@ class ExploreSubgoal(Subgoal):
         _, door_pos, _ = self.bot._shortest_path(
             unopened_unlocked_door, try_with_blockers=True
         )
+
+        # Then a locked door whose key we carry or have seen, otherwise
+        # going to a locked door may send us exploring for its key through
+        # the same door, resulting in an infinite loop as well.
+        def unopened_door_with_known_key(pos, cell):
+            return unopened_door(pos, cell) and self.bot._key_is_known(cell.color)
+
+        if not door_pos:
+            _, door_pos, _ = self.bot._shortest_path(
+                unopened_door_with_known_key, try_with_blockers=True
+            )
         if not door_pos:
             # Try to find a locker door if an unlocked one is not available.
             _, door_pos, _ = self.bot._shortest_path(
@@ -540,7 +656,7 @@ class ExploreSubgoal(Subgoal):
             self.bot.stack.append(GoNextToSubgoal(self.bot, door_obj, reason="Open"))
             return
 
-        assert False, "0nothing left to explore"
+        raise BotStuckError("nothing left to explore")
 
     def is_exploratory(self):
         return True
@@ -599,6 +715,14 @@ class BabyAIBot:
         # performed by this bot
         self.bfs_step_counter = 0
 
+        # Incremented when cells of the visibility mask are newly seen
+        self.vis_version = 0
+
+        # Searches from the current agent state, shared by the queries made
+        # until the grid or the visibility mask changes
+        self._search_fields = {}
+        self._search_version = None
+
     def replan(self, action_taken=None):
         """Replan and suggest an action.
 
@@ -650,7 +774,9 @@ class BabyAIBot:
     def _find_obj_pos(self, obj_desc, adjacent=False):
         """Find the position of the closest visible object matching a given description."""
 
-        assert len(obj_desc.obj_set) > 0
+        if not obj_desc.obj_set:
+            # e.g. the object is hidden in a box
+            raise BotStuckError("no object matches the description")
 
         best_distance_to_obj = 999
         best_pos = None
@@ -711,32 +837,19 @@ class BabyAIBot:
     def _process_obs(self):
         """Parse the contents of an observation/image and update our state."""
 
-        grid, vis_mask = self.mission.unwrapped.gen_obs_grid()
-
-        view_size = self.mission.unwrapped.agent_view_size
-        pos = self.mission.unwrapped.agent_pos
-        f_vec = self.mission.unwrapped.dir_vec
-        r_vec = self.mission.unwrapped.right_vec
-
-        # Compute the absolute coordinates of the top-left corner
-        # of the agent's view area
-        top_left = pos + f_vec * (view_size - 1) - r_vec * (view_size // 2)
-
-        # Mark everything in front of us as visible
-        for vis_j in range(0, view_size):
-            for vis_i in range(0, view_size):
-                if not vis_mask[vis_i, vis_j]:
-                    continue
-
-                # Compute the world coordinates of this cell
-                abs_i, abs_j = top_left - (f_vec * vis_j) + (r_vec * vis_i)
-
-                if abs_i < 0 or abs_i >= self.vis_mask.shape[0]:
-                    continue
-                if abs_j < 0 or abs_j >= self.vis_mask.shape[1]:
-                    continue
-
-                self.vis_mask[abs_i, abs_j] = True
+        # Mark everything in front of us as visible, reusing the mask of the
+        # last observation unless the state was changed since
+        env = self.mission.unwrapped
+        if env._obs_state_unchanged():
+            visible = env.last_obs_world_mask
+        else:
+            _, vis_mask = env.gen_obs_image()
+            visible = env._world_vis_mask(env.agent_pos, env.agent_dir, vis_mask)
+        newly_seen = visible & ~self.vis_mask
+        num_newly_seen = int(np.count_nonzero(newly_seen))
+        if num_newly_seen:
+            self.vis_mask |= newly_seen
+            self.vis_version += num_newly_seen
 
     def _remember_current_state(self):
         self.prev_agent_pos = self.mission.unwrapped.agent_pos
@@ -761,6 +874,34 @@ class BabyAIBot:
                 return distance
             distance += 1
 
+    def _key_is_known(self, color):
+        """Whether we carry a key of the given color or have seen one."""
+        carrying = self.mission.unwrapped.carrying
+        if carrying and carrying.type == "key" and carrying.color == color:
+            return True
+        grid = self.mission.unwrapped.grid
+        return any(self.vis_mask[pos] for pos in grid.find("key", color))
+
+    def _expandable(self, ignore_blockers):
+        """Passability of every cell, as nested lists indexed by [i][j].
+
+        The neighbors of a cell are visited if it was visually observed and
+        it is empty, an open door or, when `ignore_blockers` is set, any
+        other object than a wall or a closed door.
+
+        """
+        state = self.mission.unwrapped.grid.state
+        types = state[:, :, 0]
+        if ignore_blockers:
+            passable = types != OBJECT_TO_IDX["wall"]
+        else:
+            passable = types == OBJECT_TO_IDX["empty"]
+        door = types == OBJECT_TO_IDX["door"]
+        passable &= ~door
+        passable |= door & (state[:, :, 2] == STATE_TO_IDX["open"])
+        passable &= self.vis_mask
+        return passable.tolist()
+
     def _breadth_first_search(self, initial_states, accept_fn, ignore_blockers):
         """Performs breadth first search.
 
@@ -769,59 +910,52 @@ class BabyAIBot:
         going straight over turning.
 
         """
-        self.bfs_counter += 1
-
-        queue = [(state, None) for state in initial_states]
-        grid = self.mission.unwrapped.grid
-        previous_pos = dict()
-
-        while len(queue) > 0:
-            state, prev_pos = queue[0]
-            queue = queue[1:]
-            i, j, di, dj = state
-
-            if (i, j) in previous_pos:
-                continue
-
-            self.bfs_step_counter += 1
-
-            cell = grid.get(i, j)
-            previous_pos[(i, j)] = prev_pos
-
-            # If we reached a position satisfying the acceptance condition
-            if accept_fn((i, j), cell):
-                path = []
-                pos = (i, j)
-                while pos:
-                    path.append(pos)
-                    pos = previous_pos[pos]
-                return path, (i, j), previous_pos
+        field = _SearchField(
+            self.mission.unwrapped.grid,
+            self._expandable(ignore_blockers),
+            [tuple(int(x) for x in state) for state in initial_states],
+        )
+        return self._search(field, accept_fn)
 
-            # If this cell was not visually observed, don't expand from it
-            if not self.vis_mask[i, j]:
-                continue
+    def _search(self, field, accept_fn):
+        """Query a search field and count the search in the bot statistics."""
+        self.bfs_counter += 1
+        path, pos, num_steps = field.search(accept_fn)
+        self.bfs_step_counter += num_steps
+        return path, pos, field.previous_pos
 
-            if cell:
-                if cell.type == "wall":
-                    continue
-                # If this is a door
-                elif cell.type == "door":
-                    # If the door is closed, don't visit neighbors
-                    if not cell.is_open:
-                        continue
-                elif not ignore_blockers:
-                    continue
+    def _search_field(self, ignore_blockers):
+        """The search from the current agent state, shared between queries.
 
-            # Location to which the bot can get without turning
-            # are put in the queue first
-            for k, l in [(di, dj), (dj, di), (-dj, -di), (-di, -dj)]:
-                next_pos = (i + k, j + l)
-                next_dir_vec = (k, l)
-                next_state = (*next_pos, *next_dir_vec)
-                queue.append((next_state, (i, j)))
+        Searches are memoized by grid version and visibility mask version.
+        The search with blockers starts from all the positions reachable
+        without blockers.
 
-        # Path not found
-        return None, None, previous_pos
+        """
+        env = self.mission.unwrapped
+        version = (env.grid, env.grid.version, self.vis_version)
+        if self._search_version is None or any(
+            a is not b and a != b for a, b in zip(version, self._search_version)
+        ):
+            self._search_fields = {}
+            self._search_version = version
+
+        i, j = env.agent_pos
+        di, dj = env.dir_vec
+        key = (int(i), int(j), int(di), int(dj), ignore_blockers)
+        field = self._search_fields.get(key)
+        if field is None:
+            if ignore_blockers:
+                initial_states = [
+                    (i, j, 1, 0) for i, j in self._search_field(False).visited()
+                ]
+            else:
+                initial_states = [key[:4]]
+            field = _SearchField(
+                env.grid, self._expandable(ignore_blockers), initial_states
+            )
+            self._search_fields[key] = field
+        return field
 
     def _shortest_path(self, accept_fn, try_with_blockers=False):
         """
@@ -829,20 +963,15 @@ class BabyAIBot:
         Prefers the paths that avoid blockers for as long as possible.
         """
 
-        # Initial states to visit (BFS)
-        initial_states = [
-            (*self.mission.unwrapped.agent_pos, *self.mission.unwrapped.dir_vec)
-        ]
-
         path = finish = None
         with_blockers = False
-        path, finish, previous_pos = self._breadth_first_search(
-            initial_states, accept_fn, ignore_blockers=False
+        path, finish, previous_pos = self._search(
+            self._search_field(ignore_blockers=False), accept_fn
         )
         if not path and try_with_blockers:
             with_blockers = True
-            path, finish, _ = self._breadth_first_search(
-                [(i, j, 1, 0) for i, j in previous_pos], accept_fn, ignore_blockers=True
+            path, finish, _ = self._search(
+                self._search_field(ignore_blockers=True), accept_fn
             )
             if path:
                 # `path` now contains the path to a cell that is reachable without
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import math
+from functools import lru_cache
 
 import numpy as np
 
@@ -22,28 +23,58 @@ def downsample(img, factor):
     return img
 
 
+@lru_cache(maxsize=None)
+def pixel_coords(height: int, width: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Normalized coordinates of the pixel centers of an image, as two
+    (height, width) arrays of x and y in [0, 1]
+    """
+
+    xs = (np.arange(width) + 0.5) / width
+    ys = (np.arange(height) + 0.5) / height
+    xs, ys = np.meshgrid(xs, ys)
+    xs.flags.writeable = False
+    ys.flags.writeable = False
+    return xs, ys
+
+
 def fill_coords(img, fn, color):
     """
-    Fill pixels of an image with coordinates matching a filter function
+    Fill pixels of an image with coordinates matching a filter function.
+
+    The filter is evaluated once on the coordinate arrays of all the pixels,
+    and should return a boolean mask, which the `point_in_*` shapes do.
+    Filters that only take scalar coordinates are evaluated pixel by pixel.
     """
 
-    for y in range(img.shape[0]):
-        for x in range(img.shape[1]):
-            yf = (y + 0.5) / img.shape[0]
-            xf = (x + 0.5) / img.shape[1]
-            if fn(xf, yf):
-                img[y, x] = color
+    xs, ys = pixel_coords(img.shape[0], img.shape[1])
+    try:
+        mask = fn(xs, ys)
+    except (TypeError, ValueError):
+        # E.g. `x < 0.5 and y < 0.5`, which is ambiguous for arrays
+        mask = None
+    if not isinstance(mask, np.ndarray) or mask.shape != xs.shape:
+        mask = np.zeros(xs.shape, dtype=bool)
+        for y in range(img.shape[0]):
+            for x in range(img.shape[1]):
+                yf = (y + 0.5) / img.shape[0]
+                xf = (x + 0.5) / img.shape[1]
+                mask[y, x] = bool(fn(xf, yf))
+    img[mask.astype(bool, copy=False)] = color
 
     return img
 
 
 def rotate_fn(fin, cx, cy, theta):
+    cos = math.cos(-theta)
+    sin = math.sin(-theta)
+
     def fout(x, y):
         x = x - cx
         y = y - cy
 
-        x2 = cx + x * math.cos(-theta) - y * math.sin(-theta)
-        y2 = cy + y * math.cos(-theta) + x * math.sin(-theta)
+        x2 = cx + x * cos - y * sin
+        y2 = cy + y * cos + x * sin
 
         return fin(x2, y2)
 
@@ -62,21 +93,19 @@ def point_in_line(x0, y0, x1, y1, r):
     ymin = min(y0, y1) - r
     ymax = max(y0, y1) + r
 
-    def fn(x, y):
-        # Fast, early escape test
-        if x < xmin or x > xmax or y < ymin or y > ymax:
-            return False
+    p0x, p0y = p0.astype(np.float64)
+    dir_x, dir_y = dir.astype(np.float64)
 
-        q = np.array([x, y])
-        pq = q - p0
+    def fn(x, y):
+        in_box = (x >= xmin) & (x <= xmax) & (y >= ymin) & (y <= ymax)
 
         # Closest point on line
-        a = np.dot(pq, dir)
-        a = np.clip(a, 0, dist)
-        p = p0 + a * dir
+        a = np.clip((x - p0x) * dir_x + (y - p0y) * dir_y, 0, dist)
+        px = p0x + a * dir_x
+        py = p0y + a * dir_y
 
-        dist_to_line = np.linalg.norm(q - p)
-        return dist_to_line <= r
+        dist_to_line = np.sqrt((x - px) ** 2 + (y - py) ** 2)
+        return in_box & (dist_to_line <= r)
 
     return fn
 
@@ -90,7 +119,7 @@ def point_in_circle(cx, cy, r):
 
 def point_in_rect(xmin, xmax, ymin, ymax):
     def fn(x, y):
-        return x >= xmin and x <= xmax and y >= ymin and y <= ymax
+        return (x >= xmin) & (x <= xmax) & (y >= ymin) & (y <= ymax)
 
     return fn
 
@@ -100,25 +129,31 @@ def point_in_triangle(a, b, c):
     b = np.array(b, dtype=np.float32)
     c = np.array(c, dtype=np.float32)
 
-    def fn(x, y):
-        v0 = c - a
-        v1 = b - a
-        v2 = np.array((x, y)) - a
+    v0 = c - a
+    v1 = b - a
 
-        # Compute dot products
-        dot00 = np.dot(v0, v0)
-        dot01 = np.dot(v0, v1)
-        dot02 = np.dot(v0, v2)
-        dot11 = np.dot(v1, v1)
-        dot12 = np.dot(v1, v2)
+    # Compute the dot products that do not depend on the point
+    dot00 = np.dot(v0, v0)
+    dot01 = np.dot(v0, v1)
+    dot11 = np.dot(v1, v1)
+    inv_denom = 1 / (dot00 * dot11 - dot01 * dot01)
+
+    ax, ay = a.astype(np.float64)
+    v0x, v0y = v0.astype(np.float64)
+    v1x, v1y = v1.astype(np.float64)
+
+    def fn(x, y):
+        v2x = x - ax
+        v2y = y - ay
+        dot02 = v0x * v2x + v0y * v2y
+        dot12 = v1x * v2x + v1y * v2y
 
         # Compute barycentric coordinates
-        inv_denom = 1 / (dot00 * dot11 - dot01 * dot01)
         u = (dot11 * dot02 - dot01 * dot12) * inv_denom
         v = (dot00 * dot12 - dot01 * dot02) * inv_denom
 
         # Check if point is in triangle
-        return (u >= 0) and (v >= 0) and (u + v) < 1
+        return (u >= 0) & (v >= 0) & ((u + v) < 1)
 
     return fn
 
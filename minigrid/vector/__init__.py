@@ -0,0 +1,6 @@
+from __future__ import annotations
+
+from minigrid.vector.batched import MiniGridVectorEnv
+from minigrid.vector.shared_memory import SharedMemoryVectorEnv
+
+__all__ = ["MiniGridVectorEnv", "SharedMemoryVectorEnv"]
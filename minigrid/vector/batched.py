@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+from typing import Any, Sequence
+
+import gymnasium as gym
+import numpy as np
+from gymnasium.vector.utils import batch_space
+
+from minigrid.core.actions import Actions
+from minigrid.core.constants import DIR_TO_VEC, OBJECT_TO_IDX
+from minigrid.core.grid import EMPTY_ENCODING, WALL_ENCODING, _view_offsets
+from minigrid.core.visibility import compute_visibility_batch
+from minigrid.envs import (
+    CrossingEnv,
+    DoorKeyEnv,
+    EmptyEnv,
+    FourRoomsEnv,
+    LavaGapEnv,
+    MultiRoomEnv,
+)
+from minigrid.minigrid_env import MiniGridEnv
+
+EMPTY = OBJECT_TO_IDX["empty"]
+DOOR = OBJECT_TO_IDX["door"]
+KEY = OBJECT_TO_IDX["key"]
+BOX = OBJECT_TO_IDX["box"]
+GOAL = OBJECT_TO_IDX["goal"]
+LAVA = OBJECT_TO_IDX["lava"]
+
+# Object types the agent can always walk over (doors depend on their state)
+CAN_OVERLAP = np.zeros(256, dtype=bool)
+CAN_OVERLAP[[EMPTY, OBJECT_TO_IDX["floor"], GOAL, LAVA]] = True
+
+# Object types the agent can pick up
+CAN_PICKUP = np.zeros(256, dtype=bool)
+CAN_PICKUP[[KEY, OBJECT_TO_IDX["ball"], BOX]] = True
+
+DIR_X = np.array([int(v[0]) for v in DIR_TO_VEC])
+DIR_Y = np.array([int(v[1]) for v in DIR_TO_VEC])
+
+# Environment families whose dynamics are fully captured by the grid encoding
+SUPPORTED_ENVS = (
+    EmptyEnv,
+    FourRoomsEnv,
+    DoorKeyEnv,
+    LavaGapEnv,
+    CrossingEnv,
+    MultiRoomEnv,
+)
+
+
+class MiniGridVectorEnv(gym.vector.VectorEnv):
+    """
+    Batched MiniGrid engine stepping N environments as one array.
+
+    The grids of all the sub-environments are held in a single
+    (num_envs, width, height, 3) encoding, next to arrays of agent
+    positions, directions and carried objects. `step` applies the
+    `MiniGridEnv.step` rules (turning, moving, picking up, dropping and
+    toggling doors, keys and boxes, goal and lava termination) with NumPy
+    operations over the whole batch, and produces the partial observations
+    of all agents at once.
+
+    Levels are still generated by the `_gen_grid` of one regular
+    environment per slot, so resets follow the usual seeding rules: slot
+    `i` is reset with `seed + i`. Sub-environments reset automatically on
+    the step after they terminate or are truncated, like gymnasium's
+    default `next-step` autoreset mode.
+
+    Only environment families without per-step logic beyond the base
+    `MiniGridEnv.step` are supported: Empty, FourRooms, DoorKey, LavaGap,
+    Crossing and MultiRoom. Boxes have no contents in these families, so
+    toggling one simply removes it.
+
+    Example:
+        >>> import numpy as np
+        >>> from minigrid.vector import MiniGridVectorEnv
+        >>> envs = MiniGridVectorEnv("MiniGrid-Empty-8x8-v0", num_envs=16)
+        >>> obs, _ = envs.reset(seed=0)
+        >>> obs["image"].shape
+        (16, 7, 7, 3)
+        >>> obs, reward, terminated, truncated, _ = envs.step(np.full(16, 2))
+        >>> reward.shape
+        (16,)
+    """
+
+    metadata: dict[str, Any] = {"render_modes": []}
+
+    def __init__(self, env_id: str, num_envs: int, **kwargs):
+        assert num_envs > 0
+
+        self.envs: list[MiniGridEnv] = []
+        for _ in range(num_envs):
+            env = gym.make(env_id, disable_env_checker=True, **kwargs).unwrapped
+            if not isinstance(env, SUPPORTED_ENVS):
+                raise ValueError(
+                    f"{env_id} is not supported by MiniGridVectorEnv, supported "
+                    f"environments are {[cls.__name__ for cls in SUPPORTED_ENVS]}"
+                )
+            self.envs.append(env)
+
+        template = self.envs[0]
+        self.env_id = env_id
+        self.num_envs = num_envs
+        self.width = template.width
+        self.height = template.height
+        self.agent_view_size = template.agent_view_size
+        self.see_through_walls = template.see_through_walls
+
+        self.single_observation_space = template.observation_space
+        self.single_action_space = template.action_space
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+        self.action_space = batch_space(self.single_action_space, num_envs)
+
+        autoreset_mode = getattr(gym.vector, "AutoresetMode", None)
+        if autoreset_mode is not None:
+            self.metadata = {
+                **self.metadata,
+                "autoreset_mode": autoreset_mode.NEXT_STEP,
+            }
+        self.closed = False
+
+        # Grids are padded with walls so that agent views never go out of
+        # bounds, and flattened so that cells can be addressed by one index
+        pad = self.agent_view_size
+        self._pad = pad
+        self._plane = self.height + 2 * pad
+        self._grids = np.empty(
+            (num_envs, self.width + 2 * pad, self._plane, 3), dtype=np.uint8
+        )
+        self._grids[:] = WALL_ENCODING
+        self._cells = self._grids.reshape(-1, 3)
+        self._env_offset = np.arange(num_envs) * (self.width + 2 * pad) * self._plane
+        self._dir_offset = DIR_X * self._plane + DIR_Y
+
+        # Cells seen by an agent facing each direction, relative to the agent
+        self._view_offsets = np.stack(
+            [_view_offsets(d, self.agent_view_size, self._plane) for d in range(4)]
+        )
+
+        self.agent_pos = np.zeros((num_envs, 2), dtype=np.int64)
+        self.agent_dir = np.zeros(num_envs, dtype=np.int64)
+        self.carrying = np.empty((num_envs, 3), dtype=np.uint8)
+        self.carrying[:] = EMPTY_ENCODING
+        self.step_count = np.zeros(num_envs, dtype=np.int64)
+        self.max_steps = np.array([env.max_steps for env in self.envs])
+        self.missions: list[str] = [""] * num_envs
+
+        self._needs_reset = np.zeros(num_envs, dtype=bool)
+
+    def _load(self, index: int):
+        """
+        Copy the state of the sub-environment `index` into the batch arrays
+        """
+
+        env = self.envs[index]
+        if (env.grid.width, env.grid.height) != (self.width, self.height):
+            raise ValueError(
+                "all the grids of a MiniGridVectorEnv must have the same size, "
+                f"got {(env.grid.width, env.grid.height)} for environment {index}"
+            )
+
+        pad = self._pad
+        self._grids[index, pad : pad + self.width, pad : pad + self.height] = (
+            env.grid.state
+        )
+        self.agent_pos[index] = env.agent_pos
+        self.agent_dir[index] = env.agent_dir
+        self.carrying[index] = EMPTY_ENCODING
+        self.step_count[index] = 0
+        self.missions[index] = env.mission
+
+    def reset(
+        self,
+        *,
+        seed: int | Sequence[int | None] | None = None,
+        options: dict[str, Any] | None = None,
+    ) -> tuple[dict[str, Any], dict[str, Any]]:
+        if seed is None or isinstance(seed, int):
+            seeds = [None if seed is None else seed + i for i in range(self.num_envs)]
+        else:
+            seeds = list(seed)
+            assert len(seeds) == self.num_envs
+
+        for index, env_seed in enumerate(seeds):
+            self.envs[index].reset(seed=env_seed, options=options)
+            self._load(index)
+        self._needs_reset[:] = False
+
+        return self._gen_obs(), {}
+
+    def step(
+        self, actions: np.ndarray
+    ) -> tuple[dict[str, Any], np.ndarray, np.ndarray, np.ndarray, dict[str, Any]]:
+        actions = np.asarray(actions)
+        reward = np.zeros(self.num_envs, dtype=np.float64)
+        terminated = np.zeros(self.num_envs, dtype=bool)
+
+        # Sub-environments that finished on the previous step are reset
+        # instead of being stepped
+        resetting = self._needs_reset
+        for index in np.flatnonzero(resetting).tolist():
+            self.envs[index].reset()
+            self._load(index)
+        active = ~resetting
+
+        self.step_count += active
+
+        pos_idx = (
+            self._env_offset
+            + (self.agent_pos[:, 0] + self._pad) * self._plane
+            + (self.agent_pos[:, 1] + self._pad)
+        )
+        fwd_idx = pos_idx + self._dir_offset[self.agent_dir]
+        fwd_cell = self._cells[fwd_idx]
+        fwd_type, fwd_color, fwd_state = fwd_cell[:, 0], fwd_cell[:, 1], fwd_cell[:, 2]
+        carrying_nothing = self.carrying[:, 0] == EMPTY
+
+        # Rotate left and right
+        left = active & (actions == Actions.left)
+        right = active & (actions == Actions.right)
+        self.agent_dir[left] = (self.agent_dir[left] - 1) % 4
+        self.agent_dir[right] = (self.agent_dir[right] + 1) % 4
+
+        # Move forward
+        forward = active & (actions == Actions.forward)
+        fwd_open_door = (fwd_type == DOOR) & (fwd_state == 0)
+        move = forward & (CAN_OVERLAP[fwd_type] | fwd_open_door)
+        self.agent_pos[move, 0] += DIR_X[self.agent_dir[move]]
+        self.agent_pos[move, 1] += DIR_Y[self.agent_dir[move]]
+        goal = forward & (fwd_type == GOAL)
+        reward[goal] = 1 - 0.9 * (self.step_count[goal] / self.max_steps[goal])
+        terminated |= goal | (forward & (fwd_type == LAVA))
+
+        # Pick up an object
+        pickup = active & (actions == Actions.pickup)
+        pickup &= CAN_PICKUP[fwd_type] & carrying_nothing
+        self.carrying[pickup] = fwd_cell[pickup]
+        self._cells[fwd_idx[pickup]] = EMPTY_ENCODING
+
+        # Drop an object
+        drop = active & (actions == Actions.drop)
+        drop &= (fwd_type == EMPTY) & ~carrying_nothing
+        self._cells[fwd_idx[drop]] = self.carrying[drop]
+        self.carrying[drop] = EMPTY_ENCODING
+
+        # Toggle doors and boxes
+        toggle = active & (actions == Actions.toggle)
+        door = toggle & (fwd_type == DOOR)
+        has_key = (self.carrying[:, 0] == KEY) & (self.carrying[:, 1] == fwd_color)
+        unlock = door & (fwd_state == 2) & has_key
+        self._cells[fwd_idx[unlock], 2] = 0
+        flip = door & (fwd_state < 2)
+        self._cells[fwd_idx[flip], 2] = 1 - fwd_state[flip]
+        self._cells[fwd_idx[toggle & (fwd_type == BOX)]] = EMPTY_ENCODING
+
+        truncated = active & (self.step_count >= self.max_steps)
+        terminated &= active
+        self._needs_reset = terminated | truncated
+
+        return self._gen_obs(), reward, terminated, truncated, {}
+
+    def _gen_obs(self) -> dict[str, Any]:
+        """
+        Generate the partial observations of all the agents
+        """
+
+        size = self.agent_view_size
+        pos_idx = (
+            self._env_offset
+            + (self.agent_pos[:, 0] + self._pad) * self._plane
+            + (self.agent_pos[:, 1] + self._pad)
+        )
+        view_idx = self._view_offsets[self.agent_dir] + pos_idx[:, None, None]
+        image = self._cells.take(view_idx, axis=0)
+
+        agent_pos = (size // 2, size - 1)
+        if not self.see_through_walls:
+            view_type, view_state = image[..., 0], image[..., 2]
+            opaque = (view_type == OBJECT_TO_IDX["wall"]) | (
+                (view_type == DOOR) & (view_state != 0)
+            )
+            vis_mask = compute_visibility_batch(opaque, agent_pos)
+            image[~vis_mask] = 0
+
+        # The agents see what they carry at their own position
+        image[:, agent_pos[0], agent_pos[1]] = self.carrying
+
+        return {
+            "image": image,
+            "direction": self.agent_dir.copy(),
+            "mission": tuple(self.missions),
+        }
+
+    def close_extras(self, **kwargs: Any):
+        for env in self.envs:
+            env.close()
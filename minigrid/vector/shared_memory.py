@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import traceback
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Sequence
+
+import gymnasium as gym
+import numpy as np
+from gymnasium import spaces
+from gymnasium.vector.utils import CloudpickleWrapper, batch_space
+
+
+def _worker(
+    env_fns: CloudpickleWrapper,
+    env_indices: list[int],
+    pipe,
+    parent_pipe,
+    shm_name: str,
+    image_shape: tuple[int, ...],
+):
+    """
+    Worker loop hosting the sub-environments `env_indices`.
+
+    Observations are written to the shared image and direction buffers, and
+    only the small per-step values go through the pipe. Missions are sent
+    back only when they differ from the last one sent for the same slot.
+    """
+
+    parent_pipe.close()
+    shm = SharedMemory(name=shm_name)
+    image = np.ndarray(image_shape, dtype=np.uint8, buffer=shm.buf)
+    direction = np.ndarray(
+        image_shape[:2], dtype=np.int64, buffer=shm.buf, offset=image.nbytes
+    )
+
+    envs = [env_fn() for env_fn in env_fns.fn]
+    missions: list[str | None] = [None] * len(envs)
+    needs_reset = [False] * len(envs)
+
+    def write(slot: int, k: int, obs: dict[str, Any], changed: dict[int, str]):
+        image[slot, env_indices[k]] = obs["image"]
+        direction[slot, env_indices[k]] = obs["direction"]
+        if obs["mission"] != missions[k]:
+            missions[k] = obs["mission"]
+            changed[env_indices[k]] = obs["mission"]
+
+    try:
+        while True:
+            try:
+                command, data = pipe.recv()
+            except EOFError:
+                # The main process closed the pipe without sending `close`
+                break
+
+            if command == "reset":
+                seeds, options, slot = data
+                infos, changed = [], {}
+                for k, env in enumerate(envs):
+                    obs, info = env.reset(seed=seeds[k], options=options)
+                    write(slot, k, obs, changed)
+                    infos.append(info)
+                    needs_reset[k] = False
+                pipe.send(((infos, changed), True))
+
+            elif command == "step":
+                actions, slot = data
+                results, changed = [], {}
+                for k, env in enumerate(envs):
+                    if needs_reset[k]:
+                        # Next-step autoreset
+                        obs, info = env.reset()
+                        reward, terminated, truncated = 0.0, False, False
+                    else:
+                        obs, reward, terminated, truncated, info = env.step(actions[k])
+                    needs_reset[k] = terminated or truncated
+                    write(slot, k, obs, changed)
+                    results.append((reward, terminated, truncated, info))
+                pipe.send(((results, changed), True))
+
+            elif command == "close":
+                pipe.send((None, True))
+                break
+
+            else:
+                raise RuntimeError(f"Unknown command {command!r}")
+
+    except (KeyboardInterrupt, Exception):
+        pipe.send((traceback.format_exc(), False))
+
+    finally:
+        # The views must be released before the shared memory can be closed
+        image = direction = None
+        shm.close()
+        for env in envs:
+            env.close()
+
+
+class SharedMemoryVectorEnv(gym.vector.VectorEnv):
+    """
+    Multiprocess vector environment exchanging observations through shared
+    memory.
+
+    Sub-environments are spread over `num_workers` processes. Instead of
+    pickling observation dicts through pipes like gymnasium's
+    `AsyncVectorEnv`, workers write the `image` and `direction` of every
+    observation in place into a `multiprocessing.shared_memory` ring buffer
+    of `num_slots` frames. Missions are fixed during an episode, so they are
+    only sent back when they change, and the pipes otherwise carry actions,
+    rewards, termination flags and infos.
+
+    With `copy=False`, the returned `image` and `direction` arrays are views
+    of the ring buffer, they remain valid for the next `num_slots - 1` calls
+    to `step` or `reset`.
+
+    The sub-environments must have MiniGrid observations (a dict with
+    `image`, `direction` and `mission`). Slot `i` is reset with `seed + i`,
+    and sub-environments reset automatically on the step after they
+    terminate or are truncated, like gymnasium's default `next-step`
+    autoreset mode.
+
+    Example:
+        >>> import gymnasium as gym
+        >>> import numpy as np
+        >>> from minigrid.vector import SharedMemoryVectorEnv
+        >>> envs = SharedMemoryVectorEnv(
+        ...     [lambda: gym.make("MiniGrid-Empty-8x8-v0")] * 4, num_workers=2
+        ... )
+        >>> obs, _ = envs.reset(seed=0)
+        >>> obs["image"].shape
+        (4, 7, 7, 3)
+        >>> obs, reward, terminated, truncated, _ = envs.step(np.full(4, 2))
+        >>> reward.shape
+        (4,)
+        >>> envs.close()
+    """
+
+    metadata: dict[str, Any] = {"render_modes": []}
+
+    def __init__(
+        self,
+        env_fns: Sequence[Callable[[], gym.Env]],
+        num_workers: int | None = None,
+        num_slots: int = 2,
+        copy: bool = True,
+        context: str | None = None,
+    ):
+        assert len(env_fns) > 0
+        assert num_slots > 0
+
+        self.num_envs = len(env_fns)
+        self.num_workers = min(self.num_envs, num_workers or os.cpu_count() or 1)
+        self.num_slots = num_slots
+        self.copy = copy
+
+        dummy_env = env_fns[0]()
+        self.single_observation_space = dummy_env.observation_space
+        self.single_action_space = dummy_env.action_space
+        dummy_env.close()
+        del dummy_env
+
+        if not (
+            isinstance(self.single_observation_space, spaces.Dict)
+            and {"image", "direction", "mission"}
+            <= set(self.single_observation_space.spaces)
+        ):
+            raise ValueError(
+                "SharedMemoryVectorEnv requires MiniGrid observations with "
+                "`image`, `direction` and `mission` keys"
+            )
+        self.observation_space = batch_space(
+            self.single_observation_space, self.num_envs
+        )
+        self.action_space = batch_space(self.single_action_space, self.num_envs)
+
+        autoreset_mode = getattr(gym.vector, "AutoresetMode", None)
+        if autoreset_mode is not None:
+            self.metadata = {
+                **self.metadata,
+                "autoreset_mode": autoreset_mode.NEXT_STEP,
+            }
+
+        # The shared memory is created before the workers are started, so that
+        # they use the resource tracker of this process
+        image_shape = (
+            num_slots,
+            self.num_envs,
+            *self.single_observation_space["image"].shape,
+        )
+        image_size = int(np.prod(image_shape))
+        direction_size = np.dtype(np.int64).itemsize * num_slots * self.num_envs
+        self._shm = SharedMemory(create=True, size=image_size + direction_size)
+        self._image = np.ndarray(image_shape, dtype=np.uint8, buffer=self._shm.buf)
+        self._direction = np.ndarray(
+            image_shape[:2],
+            dtype=np.int64,
+            buffer=self._shm.buf,
+            offset=self._image.nbytes,
+        )
+        self._slot = 0
+        self.missions: list[str] = [""] * self.num_envs
+
+        ctx = mp.get_context(context)
+        self._worker_indices = [
+            indices.tolist()
+            for indices in np.array_split(np.arange(self.num_envs), self.num_workers)
+        ]
+        self._pipes, self._processes = [], []
+        for indices in self._worker_indices:
+            parent_pipe, child_pipe = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker,
+                name=f"SharedMemoryVectorEnv-worker-{indices[0]}",
+                args=(
+                    CloudpickleWrapper([env_fns[i] for i in indices]),
+                    indices,
+                    child_pipe,
+                    parent_pipe,
+                    self._shm.name,
+                    image_shape,
+                ),
+                daemon=True,
+            )
+            process.start()
+            child_pipe.close()
+            self._pipes.append(parent_pipe)
+            self._processes.append(process)
+        self.closed = False
+
+    def _receive(self) -> list[Any]:
+        """
+        Collect the replies of all the workers, raising worker errors
+        """
+
+        results = []
+        errors = []
+        for indices, pipe in zip(self._worker_indices, self._pipes):
+            result, success = pipe.recv()
+            if success:
+                results.append(result)
+            else:
+                errors.append(f"Worker of environments {indices} failed:\n{result}")
+        if errors:
+            self.close(terminate=True)
+            raise RuntimeError("\n".join(errors))
+        return results
+
+    def _next_slot(self) -> int:
+        slot = self._slot
+        self._slot = (slot + 1) % self.num_slots
+        return slot
+
+    def _gen_obs(self, slot: int) -> dict[str, Any]:
+        image = self._image[slot]
+        direction = self._direction[slot]
+        if self.copy:
+            image, direction = image.copy(), direction.copy()
+        return {"image": image, "direction": direction, "mission": tuple(self.missions)}
+
+    def reset(
+        self,
+        *,
+        seed: int | Sequence[int | None] | None = None,
+        options: dict[str, Any] | None = None,
+    ) -> tuple[dict[str, Any], dict[str, Any]]:
+        if seed is None or isinstance(seed, int):
+            seeds = [None if seed is None else seed + i for i in range(self.num_envs)]
+        else:
+            seeds = list(seed)
+            assert len(seeds) == self.num_envs
+
+        slot = self._next_slot()
+        for indices, pipe in zip(self._worker_indices, self._pipes):
+            pipe.send(("reset", ([seeds[i] for i in indices], options, slot)))
+
+        infos: dict[str, Any] = {}
+        for indices, (env_infos, changed) in zip(self._worker_indices, self._receive()):
+            for i, info in zip(indices, env_infos):
+                infos = self._add_info(infos, info, i)
+            for i, mission in changed.items():
+                self.missions[i] = mission
+
+        return self._gen_obs(slot), infos
+
+    def step(
+        self, actions: np.ndarray
+    ) -> tuple[dict[str, Any], np.ndarray, np.ndarray, np.ndarray, dict[str, Any]]:
+        actions = np.asarray(actions).tolist()
+        slot = self._next_slot()
+        for indices, pipe in zip(self._worker_indices, self._pipes):
+            pipe.send(("step", ([actions[i] for i in indices], slot)))
+
+        reward = np.zeros(self.num_envs, dtype=np.float64)
+        terminated = np.zeros(self.num_envs, dtype=bool)
+        truncated = np.zeros(self.num_envs, dtype=bool)
+        infos: dict[str, Any] = {}
+        for indices, (results, changed) in zip(self._worker_indices, self._receive()):
+            for i, (rew, term, trunc, info) in zip(indices, results):
+                reward[i], terminated[i], truncated[i] = rew, term, trunc
+                infos = self._add_info(infos, info, i)
+            for i, mission in changed.items():
+                self.missions[i] = mission
+
+        return self._gen_obs(slot), reward, terminated, truncated, infos
+
+    def close_extras(self, terminate: bool = False, **kwargs: Any):
+        if not terminate:
+            for pipe, process in zip(self._pipes, self._processes):
+                if process.is_alive():
+                    pipe.send(("close", None))
+            for pipe, process in zip(self._pipes, self._processes):
+                if process.is_alive():
+                    try:
+                        pipe.recv()
+                    except EOFError:
+                        pass
+
+        # Workers also stop when their pipe is closed, in case termination
+        # signals are handled by the process they were forked from
+        for pipe, process in zip(self._pipes, self._processes):
+            if terminate and process.is_alive():
+                process.terminate()
+            pipe.close()
+        for process in self._processes:
+            process.join()
+
+        self._image = self._direction = None
+        self._shm.close()
+        self._shm.unlink()
+
+    def __del__(self):
+        if not getattr(self, "closed", True):
+            self.close(terminate=True)
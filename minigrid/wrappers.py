@@ -1,14 +1,18 @@
 from __future__ import annotations
 
 import math
-from typing import Any
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Callable, Mapping
 
 import gymnasium as gym
 import numpy as np
 from gymnasium import logger, spaces
 from gymnasium.core import ActionWrapper, ObservationWrapper, ObsType, Wrapper
+from gymnasium.wrappers import OrderEnforcing, PassiveEnvChecker, TimeLimit
 
 from minigrid.core.constants import COLOR_TO_IDX, OBJECT_TO_IDX, STATE_TO_IDX
+from minigrid.core.level_bank import LevelBank
 from minigrid.core.world_object import Goal
 
 
@@ -41,6 +45,8 @@ class ReseedWrapper(Wrapper):
         [4, 5, 7, 9, 0, 1, 8, 9, 2, 3]
     """
 
+    passes_obs_image = True
+
     def __init__(self, env, seeds=(0,), seed_idx=0):
         """A wrapper that always regenerate an environment with the same set of seeds.
 
@@ -65,6 +71,61 @@ class ReseedWrapper(Wrapper):
         return self.env.reset(seed=seed, options=options)
 
 
+class LevelBankWrapper(Wrapper):
+    """
+    Wrapper to reset an environment from a `LevelBank` of pregenerated
+    levels instead of generating them.
+
+    Resetting with a seed of the bank builds the level generated with that
+    seed, which gives the same episode as regenerating it, and seeds missing
+    from the bank are generated as usual. Resetting without a seed goes
+    through the levels of the bank in order.
+
+    Example:
+        >>> import tempfile
+        >>> import gymnasium as gym
+        >>> from minigrid.core.level_bank import LevelBank
+        >>> from minigrid.wrappers import LevelBankWrapper
+        >>> path = tempfile.mktemp(suffix=".npz")
+        >>> bank = LevelBank.generate("MiniGrid-KeyCorridorS3R1-v0", [0, 1], path)
+        >>> env = gym.make("MiniGrid-KeyCorridorS3R1-v0")
+        >>> obs, _ = env.reset(seed=1)
+        >>> banked_env = LevelBankWrapper(gym.make("MiniGrid-KeyCorridorS3R1-v0"), bank)
+        >>> banked_obs, _ = banked_env.reset(seed=1)
+        >>> bool((obs["image"] == banked_obs["image"]).all())
+        True
+    """
+
+    passes_obs_image = True
+
+    def __init__(self, env, bank: LevelBank | str, level_idx: int = 0):
+        """A wrapper that resets the environment from a bank of levels.
+
+        Args:
+            env: The environment to apply the wrapper
+            bank: The bank of levels, or the path of its archive
+            level_idx: Index of the level to use for the first reset without
+                a seed
+        """
+        super().__init__(env)
+        self.bank = LevelBank(bank) if isinstance(bank, str) else bank
+        self.level_idx = level_idx
+
+    def reset(
+        self, *, seed: int | None = None, options: dict[str, Any] | None = None
+    ) -> tuple[ObsType, dict[str, Any]]:
+        if seed is None:
+            index = self.level_idx
+            self.level_idx = (self.level_idx + 1) % len(self.bank)
+            seed = int(self.bank.seeds[index])
+        else:
+            index = self.bank.index(seed)
+
+        if index is not None:
+            options = {**(options or {}), "level": self.bank[index]}
+        return self.env.reset(seed=seed, options=options)
+
+
 class ActionBonus(gym.Wrapper):
     """
     Wrapper which adds an exploration bonus.
@@ -92,6 +153,8 @@ class ActionBonus(gym.Wrapper):
         1.0
     """
 
+    passes_obs_image = True
+
     def __init__(self, env):
         """A wrapper that adds an exploration bonus to less visited (state,action) pairs.
 
@@ -152,6 +215,8 @@ class PositionBonus(Wrapper):
         0.7071067811865475
     """
 
+    passes_obs_image = True
+
     def __init__(self, env, scale=1):
         """A wrapper that adds an exploration bonus to less visited positions.
 
@@ -184,6 +249,69 @@ class PositionBonus(Wrapper):
         return obs, reward, terminated, truncated, info
 
 
+# Wrappers added by `gym.make` that pass the observations through without
+# using their image (the env checker only checks that they are in the
+# observation space, which blank images are)
+IMAGE_PASSING_WRAPPERS: tuple[type[Wrapper], ...] = (
+    OrderEnforcing,
+    PassiveEnvChecker,
+    TimeLimit,
+)
+
+
+def passes_obs_image(wrapper: Wrapper) -> bool:
+    """
+    Whether `wrapper` passes the observations through without using their
+    image: it is one of `IMAGE_PASSING_WRAPPERS`, or its class sets
+    `passes_obs_image = True` itself, as subclasses may use the image.
+    """
+
+    wrapper_type = type(wrapper)
+    return wrapper_type in IMAGE_PASSING_WRAPPERS or bool(
+        vars(wrapper_type).get("passes_obs_image", False)
+    )
+
+
+class ImageReplacingWrapper(ObservationWrapper):
+    """
+    Base class of the observation wrappers that replace the `image` of the
+    observations, declaring that they do not need the partial image computed
+    by the environment. The environment then leaves it blank while stepping
+    and resetting (see `MiniGridEnv.skip_obs_image`), which saves computing
+    the agent view, but only if every wrapper between this wrapper and the
+    environment passes the observations through without using their image
+    (see `passes_obs_image`).
+    """
+
+    def __init__(self, env):
+        super().__init__(env)
+
+        inner = self.env
+        while isinstance(inner, Wrapper) and passes_obs_image(inner):
+            inner = inner.env
+        self.skips_obs_image = not isinstance(inner, Wrapper) and hasattr(
+            inner, "skip_obs_image"
+        )
+
+    def reset(
+        self, *, seed: int | None = None, options: dict[str, Any] | None = None
+    ) -> tuple[ObsType, dict[str, Any]]:
+        if not self.skips_obs_image:
+            return super().reset(seed=seed, options=options)
+
+        with self.unwrapped.skip_obs_image():
+            obs, info = self.env.reset(seed=seed, options=options)
+        return self.observation(obs), info
+
+    def step(self, action):
+        if not self.skips_obs_image:
+            return super().step(action)
+
+        with self.unwrapped.skip_obs_image():
+            obs, reward, terminated, truncated, info = self.env.step(action)
+        return self.observation(obs), reward, terminated, truncated, info
+
+
 class ImgObsWrapper(ObservationWrapper):
     """
     Use the image as the only observation output, no language/mission.
@@ -214,6 +342,44 @@ class ImgObsWrapper(ObservationWrapper):
         return obs["image"]
 
 
+# Number of bits per cell of one-hot encodings: one per object type, color
+# and state, in that order
+ONE_HOT_BITS = len(OBJECT_TO_IDX) + len(COLOR_TO_IDX) + len(STATE_TO_IDX)
+
+# Offset of the bits of the type, color and state of a cell
+_ONE_HOT_OFFSETS = np.array(
+    [0, len(OBJECT_TO_IDX), len(OBJECT_TO_IDX) + len(COLOR_TO_IDX)]
+)
+
+
+def one_hot_encode(image: np.ndarray) -> np.ndarray:
+    """
+    One-hot encoding of an encoded image, or of a batch of them: an array of
+    shape (..., 3) becomes a uint8 array of shape (..., ONE_HOT_BITS) with
+    the bits of the type, color and state of each cell set
+
+    Example:
+        >>> import numpy as np
+        >>> from minigrid.wrappers import one_hot_encode
+        >>> images = np.zeros((4, 7, 7, 3), dtype=np.uint8)
+        >>> images[:, 3, 6] = (5, 4, 0)
+        >>> one_hot = one_hot_encode(images)
+        >>> one_hot.shape
+        (4, 7, 7, 20)
+        >>> np.flatnonzero(one_hot[0, 3, 6])
+        array([ 5, 15, 17])
+    """
+
+    image = np.asarray(image)
+    out = np.zeros(image.shape[:-1] + (ONE_HOT_BITS,), dtype=np.uint8)
+
+    # Set the bits of all the cells at once, in the flattened output
+    bits = image.reshape(-1, 3).astype(np.intp) + _ONE_HOT_OFFSETS
+    rows = np.arange(len(bits))[:, None]
+    out.reshape(-1, ONE_HOT_BITS)[rows, bits] = 1
+    return out
+
+
 class OneHotPartialObsWrapper(ObservationWrapper):
     """
     Wrapper to get a one-hot encoding of a partially observable
@@ -257,34 +423,21 @@ class OneHotPartialObsWrapper(ObservationWrapper):
 
         obs_shape = env.observation_space["image"].shape
 
-        # Number of bits per cell
-        num_bits = len(OBJECT_TO_IDX) + len(COLOR_TO_IDX) + len(STATE_TO_IDX)
-
         new_image_space = spaces.Box(
-            low=0, high=255, shape=(obs_shape[0], obs_shape[1], num_bits), dtype="uint8"
+            low=0,
+            high=255,
+            shape=(obs_shape[0], obs_shape[1], ONE_HOT_BITS),
+            dtype="uint8",
         )
         self.observation_space = spaces.Dict(
             {**self.observation_space.spaces, "image": new_image_space}
         )
 
     def observation(self, obs):
-        img = obs["image"]
-        out = np.zeros(self.observation_space.spaces["image"].shape, dtype="uint8")
-
-        for i in range(img.shape[0]):
-            for j in range(img.shape[1]):
-                type = img[i, j, 0]
-                color = img[i, j, 1]
-                state = img[i, j, 2]
+        return {**obs, "image": one_hot_encode(obs["image"])}
 
-                out[i, j, type] = 1
-                out[i, j, len(OBJECT_TO_IDX) + color] = 1
-                out[i, j, len(OBJECT_TO_IDX) + len(COLOR_TO_IDX) + state] = 1
 
-        return {**obs, "image": out}
-
-
-class RGBImgObsWrapper(ObservationWrapper):
+class RGBImgObsWrapper(ImageReplacingWrapper):
     """
     Wrapper to use fully observable RGB image as observation,
     This can be used to have the agent to solve the gridworld in pixel space.
@@ -331,7 +484,7 @@ class RGBImgObsWrapper(ObservationWrapper):
         return {**obs, "image": rgb_img}
 
 
-class RGBImgPartialObsWrapper(ObservationWrapper):
+class RGBImgPartialObsWrapper(ImageReplacingWrapper):
     """
     Wrapper to use partially observable RGB image as observation.
     This can be used to have the agent to solve the gridworld in pixel space.
@@ -380,10 +533,14 @@ class RGBImgPartialObsWrapper(ObservationWrapper):
         return {**obs, "image": rgb_img_partial}
 
 
-class FullyObsWrapper(ObservationWrapper):
+class FullyObsWrapper(ImageReplacingWrapper):
     """
     Fully observable gridworld using a compact grid encoding instead of the agent view.
 
+    The image is copied from the encoding maintained by the grid. With
+    `reuse_buffer=True`, it is written to the same array at every step
+    instead of a new one, so that it must be copied to be kept.
+
     Example:
         >>> import gymnasium as gym
         >>> import matplotlib.pyplot as plt
@@ -398,9 +555,11 @@ class FullyObsWrapper(ObservationWrapper):
         (11, 11, 3)
     """
 
-    def __init__(self, env):
+    def __init__(self, env, reuse_buffer: bool = False):
         super().__init__(env)
 
+        self.reuse_buffer = reuse_buffer
+
         new_image_space = spaces.Box(
             low=0,
             high=255,
@@ -415,17 +574,79 @@ class FullyObsWrapper(ObservationWrapper):
         self.observation_space = spaces.Dict(
             {**self.observation_space.spaces, "image": new_image_space}
         )
+        self._buffer = np.empty(new_image_space.shape, dtype=np.uint8)
 
     def observation(self, obs):
         env = self.unwrapped
-        full_grid = env.grid.encode()
-        full_grid[env.agent_pos[0]][env.agent_pos[1]] = np.array(
-            [OBJECT_TO_IDX["agent"], COLOR_TO_IDX["red"], env.agent_dir]
-        )
+        if self.reuse_buffer:
+            full_grid = self._buffer
+            full_grid[...] = env.grid.state
+        else:
+            full_grid = env.grid.encode()
+        x, y = env.agent_pos
+        full_grid[x, y] = (OBJECT_TO_IDX["agent"], COLOR_TO_IDX["red"], env.agent_dir)
 
         return {**obs, "image": full_grid}
 
 
+# Number of mission strings whose encoding is kept, shared by all the
+# wrappers encoding missions
+MISSION_CACHE_SIZE = 1024
+
+# Code of each byte of a mission string in `FlatObsWrapper`: letters, space
+# and comma, 255 for the characters that are not available
+_CHAR_CODES = np.full(256, 255, dtype=np.uint8)
+_CHAR_CODES[np.frombuffer(b"abcdefghijklmnopqrstuvwxyz ,", dtype=np.uint8)] = range(28)
+
+
+@lru_cache(maxsize=MISSION_CACHE_SIZE)
+def _encode_mission_chars(mission: str, max_len: int) -> np.ndarray:
+    """
+    One-hot encoding of the characters of a mission as a flat read-only
+    array of `max_len * 28` bits
+    """
+
+    assert len(mission) <= max_len, f"mission string too long ({len(mission)} chars)"
+    mission = mission.lower()
+
+    # Characters outside of ASCII are encoded as bytes above 127, which
+    # have no code
+    codes = _CHAR_CODES[np.frombuffer(mission.encode("utf8"), dtype=np.uint8)]
+    if (codes == 255).any():
+        ch = next(ch for ch in mission if not ("a" <= ch <= "z" or ch in " ,"))
+        raise ValueError(f"Character {ch} is not available in mission string.")
+
+    str_array = np.zeros((max_len, 28), dtype=np.uint8)
+    str_array[np.arange(len(codes)), codes] = 1
+    str_array.flags.writeable = False
+    return str_array.ravel()
+
+
+@lru_cache(maxsize=MISSION_CACHE_SIZE)
+def _word_indices_cache(
+    words: tuple[tuple[str, int], ...]
+) -> Callable[[str, int], tuple[int, ...]]:
+    """
+    Cached conversion of strings to the word indices of
+    `DictObservationSpaceWrapper.string_to_indices`, shared by the wrappers
+    with the same vocabulary
+    """
+
+    word_dict = dict(words)
+
+    @lru_cache(maxsize=MISSION_CACHE_SIZE)
+    def word_indices(string: str, offset: int) -> tuple[int, ...]:
+        indices = []
+        # adding space before and after commas
+        for word in string.replace(",", " , ").split():
+            if word not in word_dict:
+                raise ValueError(f"Unknown word: {word}")
+            indices.append(word_dict[word] + offset)
+        return tuple(indices)
+
+    return word_indices
+
+
 class DictObservationSpaceWrapper(ObservationWrapper):
     """
     Transforms the observation space (that has a textual component) to a fully numerical observation space,
@@ -471,6 +692,30 @@ class DictObservationSpaceWrapper(ObservationWrapper):
             }
         )
 
+    @property
+    def word_dict(self) -> Mapping[str, int]:
+        """
+        Vocabulary of the missions, read-only as the conversions of strings
+        are cached: assign another dictionary to change it
+        """
+
+        return MappingProxyType(self._word_dict)
+
+    @word_dict.setter
+    def word_dict(self, word_dict: Mapping[str, int]):
+        self._word_dict = dict(word_dict)
+        self._word_indices = _word_indices_cache(tuple(self._word_dict.items()))
+
+    def __getstate__(self) -> dict[str, Any]:
+        # The cached conversion is found again from the vocabulary
+        state = self.__dict__.copy()
+        del state["_word_indices"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]):
+        self.__dict__.update(state)
+        self.word_dict = self._word_dict
+
     @staticmethod
     def get_minigrid_words():
         colors = ["red", "green", "blue", "yellow", "purple", "grey"]
@@ -536,15 +781,7 @@ class DictObservationSpaceWrapper(ObservationWrapper):
         """
         Convert a string to a list of indices.
         """
-        indices = []
-        # adding space before and after commas
-        string = string.replace(",", " , ")
-        for word in string.split():
-            if word in self.word_dict.keys():
-                indices.append(self.word_dict[word] + offset)
-            else:
-                raise ValueError(f"Unknown word: {word}")
-        return indices
+        return list(self._word_indices(string, offset))
 
     def observation(self, obs):
         obs["mission"] = self.string_to_indices(obs["mission"])
@@ -559,6 +796,11 @@ class FlatObsWrapper(ObservationWrapper):
     Encode mission strings using a one-hot scheme,
     and combine these with observed images into one flat array.
 
+    The encodings of the most recent missions are cached and shared by all
+    the wrappers. With `reuse_buffer=True`, observations are written to the
+    same array at every step instead of a new one, so that they must be
+    copied to be kept.
+
     This wrapper is not applicable to BabyAI environments, given that these have their own language component.
 
     Example:
@@ -572,11 +814,12 @@ class FlatObsWrapper(ObservationWrapper):
         (2835,)
     """
 
-    def __init__(self, env, maxStrLen: int = 96):
+    def __init__(self, env, maxStrLen: int = 96, reuse_buffer: bool = False):
         super().__init__(env)
 
         self.maxStrLen = maxStrLen
         self.numCharCodes = 28
+        self.reuse_buffer = reuse_buffer
 
         img_size = np.prod(env.observation_space["image"].shape)
         self.observation_space = spaces.Box(
@@ -586,47 +829,22 @@ class FlatObsWrapper(ObservationWrapper):
             dtype="uint8",
         )
 
-        self.cachedStr: str = None
+        self._img_size = int(img_size)
+        self._buffer = np.empty(self.observation_space.shape, dtype=np.uint8)
 
     def observation(self, obs):
-        image = obs["image"]
-        mission = obs["mission"]
-
-        # Cache the last-encoded mission string
-        if mission != self.cachedStr:
-            assert (
-                len(mission) <= self.maxStrLen
-            ), f"mission string too long ({len(mission)} chars)"
-            mission = mission.lower()
-
-            str_array = np.zeros(
-                shape=(self.maxStrLen, self.numCharCodes), dtype="uint8"
-            )
-            # as `numCharCodes` < 255 then we can use `uint8`
-
-            for idx, ch in enumerate(mission):
-                if "a" <= ch <= "z":
-                    chNo = ord(ch) - ord("a")
-                elif ch == " ":
-                    chNo = ord("z") - ord("a") + 1
-                elif ch == ",":
-                    chNo = ord("z") - ord("a") + 2
-                else:
-                    raise ValueError(
-                        f"Character {ch} is not available in mission string."
-                    )
-                assert chNo < self.numCharCodes, f"{ch} : {chNo:d}"
-                str_array[idx, chNo] = 1
-
-            self.cachedStr = mission
-            self.cachedArray = str_array
-
-        obs = np.concatenate((image.flatten(), self.cachedArray.flatten()))
+        if self.reuse_buffer:
+            out = self._buffer
+        else:
+            out = np.empty_like(self._buffer)
 
-        return obs
+        out[: self._img_size] = obs["image"].reshape(-1)
+        out[self._img_size :] = _encode_mission_chars(obs["mission"], self.maxStrLen)
+
+        return out
 
 
-class ViewSizeWrapper(ObservationWrapper):
+class ViewSizeWrapper(ImageReplacingWrapper):
     """
     Wrapper to customize the agent field of view size.
     This cannot be used with fully observable wrappers.
@@ -665,10 +883,8 @@ class ViewSizeWrapper(ObservationWrapper):
     def observation(self, obs):
         env = self.unwrapped
 
-        grid, vis_mask = env.gen_obs_grid(self.agent_view_size)
-
         # Encode the partially observable view into a numpy array
-        image = grid.encode(vis_mask)
+        image, _ = env.gen_obs_image(self.agent_view_size)
 
         return {**obs, "image": image}
 
@@ -726,12 +942,23 @@ class DirectionObsWrapper(ObservationWrapper):
         return obs
 
 
-class SymbolicObsWrapper(ObservationWrapper):
+# Id of the object in `SymbolicObsWrapper` for each type index of the grid
+# encoding, -1 for empty cells
+_SYMBOLIC_IDS = np.arange(256, dtype=np.int64)
+_SYMBOLIC_IDS[OBJECT_TO_IDX["empty"]] = -1
+
+
+class SymbolicObsWrapper(ImageReplacingWrapper):
     """
     Fully observable grid with a symbolic state representation.
     The symbol is a triple of (X, Y, IDX), where X and Y are
     the coordinates on the grid, and IDX is the id of the object.
 
+    The ids are read from the encoding maintained by the grid and written
+    next to cached coordinates. With `reuse_buffer=True`, the image is
+    written to the same array at every step instead of a new one, so that
+    it must be copied to be kept.
+
     Example:
         >>> import gymnasium as gym
         >>> from minigrid.wrappers import SymbolicObsWrapper
@@ -745,9 +972,11 @@ class SymbolicObsWrapper(ObservationWrapper):
         (11, 11, 3)
     """
 
-    def __init__(self, env):
+    def __init__(self, env, reuse_buffer: bool = False):
         super().__init__(env)
 
+        self.reuse_buffer = reuse_buffer
+
         new_image_space = spaces.Box(
             low=0,
             high=max(OBJECT_TO_IDX.values()),
@@ -762,21 +991,17 @@ class SymbolicObsWrapper(ObservationWrapper):
             {**self.observation_space.spaces, "image": new_image_space}
         )
 
-    def observation(self, obs):
-        objects = np.array(
-            [
-                OBJECT_TO_IDX[o.type] if o is not None else -1
-                for o in self.unwrapped.grid.grid
-            ]
-        )
-        agent_pos = self.env.unwrapped.agent_pos
+        # Coordinates of the cells, the ids are filled in at every step
         ncol, nrow = self.unwrapped.width, self.unwrapped.height
-        grid = np.mgrid[:ncol, :nrow]
-        _objects = np.transpose(objects.reshape(1, nrow, ncol), (0, 2, 1))
+        self._buffer = np.zeros((ncol, nrow, 3), dtype=np.int64)
+        self._buffer[:, :, :2] = np.mgrid[:ncol, :nrow].transpose(1, 2, 0)
 
-        grid = np.concatenate([grid, _objects])
-        grid = np.transpose(grid, (1, 2, 0))
-        grid[agent_pos[0], agent_pos[1], 2] = OBJECT_TO_IDX["agent"]
+    def observation(self, obs):
+        env = self.unwrapped
+        grid = self._buffer if self.reuse_buffer else self._buffer.copy()
+        grid[:, :, 2] = _SYMBOLIC_IDS[env.grid.state[:, :, 0]]
+        x, y = env.agent_pos
+        grid[x, y, 2] = OBJECT_TO_IDX["agent"]
         obs["image"] = grid
 
         return obs
@@ -790,6 +1015,8 @@ class StochasticActionWrapper(ActionWrapper):
     Else, a random action is sampled from the action space.
     """
 
+    passes_obs_image = True
+
     def __init__(self, env=None, prob=0.9, random_action=None):
         super().__init__(env)
         self.prob = prob
@@ -831,18 +1058,20 @@ class NoDeath(Wrapper):
         >>>
         >>>
         >>> env = gym.make("MiniGrid-Dynamic-Obstacles-5x5-v0")
-        >>> _, _ = env.reset(seed=2)
+        >>> _, _ = env.reset(seed=9)
         >>> _, reward, term, *_ = env.step(2)
         >>> reward, term
         (-1, True)
         >>>
         >>> env = NoDeath(env, no_death_types=("ball",), death_cost=-1.0)
-        >>> _, _ = env.reset(seed=2)
+        >>> _, _ = env.reset(seed=9)
         >>> _, reward, term, *_ = env.step(2)
         >>> reward, term
         (-2.0, False)
     """
 
+    passes_obs_image = True
+
     def __init__(self, env, no_death_types: tuple[str, ...], death_cost: float = -1.0):
         """A wrapper to prevent death in specific cells.
 
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 import gymnasium as gym
+import numpy as np
 import pytest
 
+from minigrid.minigrid_env import MiniGridEnv
 from minigrid.utils.baby_ai_bot import BabyAIBot
 
 # see discussion starting here: https://github.com/Farama-Foundation/Minigrid/pull/381#issuecomment-1646800992
@@ -56,3 +58,133 @@ def test_bot(env_id):
         curr_seed += 1
 
     env.close()
+
+
+@pytest.mark.parametrize("legacy_place_obj", [False, True])
+def test_bot_explores_doors_with_known_keys(legacy_place_obj, monkeypatch):
+    """
+    When exploring, the bot should open locked doors whose key it has seen
+    before other locked doors. In UnlockToUnlock, going to the door whose key
+    lies behind the other door used to send it exploring through that same
+    door forever.
+    """
+    monkeypatch.setattr(MiniGridEnv, "legacy_place_obj", legacy_place_obj)
+    env = gym.make("BabyAI-UnlockToUnlock-v0")
+    for seed in range(10):
+        env.reset(seed=seed)
+        expert = BabyAIBot(env)
+        for _step in range(env.unwrapped.max_steps):
+            _, reward, terminated, truncated, _ = env.step(expert.replan())
+            if terminated or truncated:
+                break
+        assert terminated and reward > 0
+
+    env.close()
+
+
+def test_bot_after_set_state():
+    """
+    A bot planning from a restored state should see what the agent sees in
+    that state, not in the state of the last observation.
+    """
+    env = gym.make("BabyAI-GoToLocal-v0")
+    env.reset(seed=0)
+    state = env.unwrapped.get_state()
+    env.reset(seed=1)
+    for action in (0, 0, 2):
+        env.step(action)
+
+    env.unwrapped.set_state(state)
+    expert = BabyAIBot(env)
+    expert.replan()
+
+    env.unwrapped.gen_obs()
+    assert np.array_equal(expert.vis_mask, env.unwrapped.last_obs_world_mask)
+    env.close()
+
+
+def reference_shortest_path(bot, accept_fn, try_with_blockers=False):
+    """Textbook BFS over the whole grid, as originally done by the bot."""
+    env = bot.mission.unwrapped
+
+    def bfs(initial_states, ignore_blockers):
+        queue = [(state, None) for state in initial_states]
+        previous_pos = dict()
+        while queue:
+            (i, j, di, dj), prev_pos = queue.pop(0)
+            if (i, j) in previous_pos:
+                continue
+            cell = env.grid.get(i, j)
+            previous_pos[(i, j)] = prev_pos
+            if accept_fn((i, j), cell):
+                path = []
+                pos = (i, j)
+                while pos:
+                    path.append(pos)
+                    pos = previous_pos[pos]
+                return path, (i, j), previous_pos
+            if not bot.vis_mask[i, j]:
+                continue
+            if cell:
+                if cell.type == "wall":
+                    continue
+                elif cell.type == "door":
+                    if not cell.is_open:
+                        continue
+                elif not ignore_blockers:
+                    continue
+            for k, l in [(di, dj), (dj, di), (-dj, -di), (-di, -dj)]:
+                queue.append(((i + k, j + l, k, l), (i, j)))
+        return None, None, previous_pos
+
+    path, finish, previous_pos = bfs([(*env.agent_pos, *env.dir_vec)], False)
+    with_blockers = False
+    if not path and try_with_blockers:
+        with_blockers = True
+        path, finish, _ = bfs([(i, j, 1, 0) for i, j in previous_pos], True)
+        if path:
+            pos = path[-1]
+            extra_path = []
+            while pos:
+                extra_path.append(pos)
+                pos = previous_pos[pos]
+            path = path + extra_path[1:]
+    if path:
+        path = path[::-1][1:]
+    return path, finish, with_blockers
+
+
+@pytest.mark.parametrize(
+    "env_id",
+    ["BabyAI-KeyCorridor-v0", "BabyAI-UnlockToUnlock-v0", "BabyAI-BossLevel-v0"],
+)
+def test_bot_shortest_path(env_id):
+    """
+    The searches of the bot, shared between queries, should find the same
+    paths as a full search for every query.
+    """
+    env = gym.make(env_id)
+    env.reset(seed=0)
+    expert = BabyAIBot(env)
+    rng = np.random.default_rng(0)
+    width, height = env.unwrapped.width, env.unwrapped.height
+
+    for _step in range(150):
+        action = expert.replan()
+        targets = [tuple(rng.integers((width, height)).tolist()) for _ in range(3)]
+        queries = [
+            lambda pos, cell: not expert.vis_mask[pos],
+            lambda pos, cell: cell is not None and cell.type == "door",
+            lambda pos, cell: cell is not None and cell.type in ("ball", "box", "key"),
+        ] + [lambda pos, cell, target=target: pos == target for target in targets]
+        for accept_fn in queries:
+            for try_with_blockers in [False, True]:
+                assert expert._shortest_path(
+                    accept_fn, try_with_blockers
+                ) == reference_shortest_path(expert, accept_fn, try_with_blockers)
+
+        _, _, terminated, _, _ = env.step(action)
+        if terminated:
+            break
+
+    env.close()
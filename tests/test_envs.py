@@ -10,8 +10,13 @@ import pytest
 from gymnasium.envs.registration import EnvSpec
 from gymnasium.utils.env_checker import check_env, data_equivalence
 
+from minigrid.core.actions import Actions
+from minigrid.core.constants import DIR_TO_VEC, OBJECT_TO_IDX
+from minigrid.core.events import Dropped, PickedUp, Turned
 from minigrid.core.grid import Grid
 from minigrid.core.mission import MissionSpace
+from minigrid.core.reset_stats import ResetStats
+from minigrid.envs import EmptyEnv
 from tests.utils import all_testing_env_specs, assert_equals
 
 CHECK_ENV_IGNORE_WARNINGS = [
@@ -166,6 +171,406 @@ def test_max_steps_argument(env_spec):
     env.close()
 
 
+@pytest.mark.parametrize(
+    "env_spec",
+    all_testing_env_specs,
+    ids=[spec.id for spec in all_testing_env_specs],
+)
+def test_get_set_state(env_spec):
+    """Test that restoring a snapshot replays the same transitions, in the same
+    environment and, after pickling the snapshot, in another one."""
+    env = env_spec.make(disable_env_checker=True).unwrapped
+    env.reset(seed=SEED)
+    env.action_space.seed(SEED)
+
+    for _ in range(10):
+        _, _, terminated, truncated, _ = env.step(env.action_space.sample())
+        if terminated or truncated:
+            env.reset()
+
+    state = env.get_state()
+    actions = [env.action_space.sample() for _ in range(30)]
+
+    def rollout(env):
+        transitions = []
+        for action in actions:
+            transitions.append(env.step(action))
+            if transitions[-1][2] or transitions[-1][3]:
+                break
+        return transitions, env.hash()
+
+    expected = rollout(env)
+
+    env.set_state(state)
+    assert data_equivalence(rollout(env), expected)
+
+    other_env = env_spec.make(disable_env_checker=True).unwrapped
+    other_env.reset(seed=SEED + 1)
+    other_env.set_state(pickle.loads(pickle.dumps(state)))
+    assert data_equivalence(rollout(other_env), expected)
+
+    env.close()
+    other_env.close()
+
+
+def test_hash_pose_types():
+    """Test that env.hash() does not depend on the types holding the pose."""
+    env = gym.make("MiniGrid-Empty-8x8-v0").unwrapped
+    env.reset(seed=SEED)
+    assert env.hash() == "c05e70522952fab1"
+    for agent_pos, agent_dir in [
+        (np.array([1, 1]), np.int64(0)),
+        ((np.int64(1), np.int64(1)), 0),
+        ([1, 1], np.array(0)),
+    ]:
+        env.agent_pos, env.agent_dir = agent_pos, agent_dir
+        assert env.hash() == "c05e70522952fab1"
+    env.close()
+
+
+@pytest.mark.parametrize(
+    "env_spec",
+    all_testing_env_specs,
+    ids=[spec.id for spec in all_testing_env_specs],
+)
+def test_state_hash(env_spec):
+    """Test that the incremental state hash agrees with state equality and
+    with a hash of the grid computed from scratch."""
+    env = env_spec.make(disable_env_checker=True).unwrapped
+    env.reset(seed=SEED)
+    env.action_space.seed(SEED)
+
+    hashes = {}
+    states = {}
+    for step in range(100):
+        carrying = env.carrying.encode() if env.carrying else None
+        state = (
+            env.grid.encode().tobytes(),
+            tuple(env.agent_pos),
+            env.agent_dir,
+            carrying,
+        )
+        assert hashes.setdefault(state, env.state_hash) == env.state_hash
+        assert states.setdefault(env.state_hash, state) == state
+
+        if step % 10 == 0:
+            decoded, _ = Grid.decode(env.grid.encode())
+            assert decoded.zobrist_hash == env.grid.zobrist_hash
+
+        _, _, terminated, truncated, _ = env.step(env.action_space.sample())
+        if terminated or truncated:
+            env.reset()
+
+    snapshot, state_hash = env.get_state(), env.state_hash
+    env.reset(seed=SEED + 1)
+    env.set_state(snapshot)
+    assert env.state_hash == state_hash
+
+    env.close()
+
+
+def test_step_action_types():
+    """Test that actions are dispatched by their integer value, whatever their
+    type, and that unknown actions are rejected."""
+    env = gym.make("MiniGrid-DoorKey-5x5-v0").unwrapped
+    results = []
+    for action in [2, np.int64(2), np.array(2), Actions.forward, 2.0]:
+        env.reset(seed=SEED)
+        results.append(env.step(action))
+        assert isinstance(env.agent_pos[0], int)
+    for result in results[1:]:
+        assert data_equivalence(result, results[0])
+
+    for action in [-1, len(Actions), "forward", None]:
+        with pytest.raises(ValueError):
+            env.step(action)
+
+    env.close()
+
+
+def test_step_overridden_handlers():
+    """Test that step calls the action handlers overridden by subclasses."""
+
+    class SlipperyEnv(EmptyEnv):
+        def _move_forward(self):
+            self.moves += 1
+            return super()._move_forward()
+
+        def _toggle(self):
+            return 0.5, True
+
+    env = SlipperyEnv(size=5)
+    env.reset(seed=SEED)
+    env.moves = 0
+    env.step(Actions.forward)
+    assert env.moves == 1 and tuple(env.agent_pos) == (2, 1)
+    _, reward, terminated, _, _ = env.step(Actions.toggle)
+    assert reward == 0.5 and terminated
+    env.close()
+
+
+def test_step_events():
+    """Test that actions record events only when they change the state."""
+    env = gym.make("MiniGrid-DoorKey-5x5-v0").unwrapped
+    env.reset(seed=SEED)
+    key_pos = tuple(int(v) for v in env.grid.find("key")[0])
+    key = env.grid.get(*key_pos)
+
+    # Facing a wall, nothing changes
+    env.agent_pos, env.agent_dir = (1, 1), 3
+    for action in (Actions.forward, Actions.pickup, Actions.drop, Actions.toggle):
+        env.step(action)
+        assert env.step_events == []
+    env.step(Actions.left)
+    assert env.step_events == [Turned(2)]
+
+    env.agent_pos = (key_pos[0], key_pos[1] - 1)
+    env.agent_dir = 1
+    env.step(Actions.pickup)
+    assert env.step_events == [PickedUp(key, key_pos)]
+    env.step(Actions.drop)
+    assert env.step_events == [Dropped(key, key_pos)]
+    env.step(Actions.toggle)
+    assert env.step_events == []
+    env.close()
+
+
+def reference_world_mask(env):
+    """Map each visible cell of the agent view to the world, one at a time."""
+    _, vis_mask = env.gen_obs_grid()
+    view_size = env.agent_view_size
+    f_vec, r_vec = env.dir_vec, env.right_vec
+    top_left = env.agent_pos + f_vec * (view_size - 1) - r_vec * (view_size // 2)
+    mask = np.zeros((env.width, env.height), dtype=bool)
+    for vis_j in range(view_size):
+        for vis_i in range(view_size):
+            abs_i, abs_j = top_left - f_vec * vis_j + r_vec * vis_i
+            if 0 <= abs_i < env.width and 0 <= abs_j < env.height:
+                mask[abs_i, abs_j] |= vis_mask[vis_i, vis_j]
+    return mask
+
+
+@pytest.mark.parametrize("env_id", ["MiniGrid-DoorKey-8x8-v0", "BabyAI-BossLevel-v0"])
+def test_last_obs_world_mask(env_id):
+    """Test that the world visibility mask of the last observation matches the
+    view visibility mask mapped cell by cell, also when the image is skipped."""
+    env = gym.make(env_id).unwrapped
+    env.reset(seed=SEED)
+    env.action_space.seed(SEED)
+    for step in range(100):
+        if step % 3:
+            env.step(env.action_space.sample())
+        else:
+            with env.skip_obs_image():
+                env.step(env.action_space.sample())
+        mask = env.last_obs_world_mask
+        np.testing.assert_array_equal(mask, reference_world_mask(env))
+        assert env.last_obs_world_mask is mask
+        assert not mask.flags.writeable
+
+    # Rendering after the state changed does not highlight a stale mask
+    env.agent_dir = (env.agent_dir + 1) % 4
+    highlighted = env.get_full_render(True, 8)
+    env.gen_obs()
+    np.testing.assert_array_equal(highlighted, env.get_full_render(True, 8))
+    env.close()
+
+
+@pytest.mark.parametrize("legacy", [False, True])
+def test_dynamic_obstacles_move(legacy):
+    """Test that obstacles move to empty neighbouring cells, or stay put when
+    there are none, and that the grid follows them."""
+    env = gym.make("MiniGrid-Dynamic-Obstacles-16x16-v0").unwrapped
+    env.legacy_place_obj = legacy
+    env.reset(seed=SEED)
+    empty = OBJECT_TO_IDX["empty"]
+
+    for _ in range(100):
+        before = [tuple(obst.cur_pos) for obst in env.obstacles]
+        grid_before = env.grid.encode()
+        agent_pos = tuple(env.agent_pos)
+        _, _, terminated, truncated, _ = env.step(env.actions.left)
+
+        for (x, y), obst in zip(before, env.obstacles):
+            new_x, new_y = obst.cur_pos
+            assert env.grid.get(new_x, new_y) is obst
+            if (new_x, new_y) == (x, y):
+                free = grid_before[x - 1 : x + 2, y - 1 : y + 2, 0] == empty
+                if max(abs(agent_pos[0] - x), abs(agent_pos[1] - y)) <= 1:
+                    free[agent_pos[0] - x + 1, agent_pos[1] - y + 1] = False
+                assert not free.any()
+            else:
+                assert max(abs(new_x - x), abs(new_y - y)) == 1
+                assert (new_x, new_y) != agent_pos
+
+        balls = env.grid.state[..., 0] == OBJECT_TO_IDX["ball"]
+        assert balls.sum() == len(env.obstacles)
+        decoded, _ = Grid.decode(env.grid.encode())
+        assert decoded.zobrist_hash == env.grid.zobrist_hash
+
+        if terminated or truncated:
+            env.reset()
+
+    env.close()
+
+
+def test_find_matching_objs():
+    """Test that object descriptions match the objects found by scanning the grid."""
+    from minigrid.envs.babyai.core.verifier import ObjDesc
+
+    env = gym.make("BabyAI-GoToLocal-v0").unwrapped
+    for seed in range(10):
+        env.reset(seed=seed)
+        room = env.room_from_pos(*env.agent_pos)
+        d1 = DIR_TO_VEC[env.agent_dir]
+        d2 = (-d1[1], d1[0])
+        for obj_type in ["ball", "box", "key", "door", None]:
+            for color in [None, "red", "grey"]:
+                for loc in [None, "left", "right", "front", "behind"]:
+                    desc = ObjDesc(obj_type, color, loc)
+                    objs, poss = desc.find_matching_objs(env)
+                    expected = []
+                    for i in range(env.grid.width):
+                        for j in range(env.grid.height):
+                            cell = env.grid.get(i, j)
+                            if cell is None or obj_type not in (None, cell.type):
+                                continue
+                            if color not in (None, cell.color):
+                                continue
+                            v = (i - env.agent_pos[0], j - env.agent_pos[1])
+                            if loc is not None and not (
+                                room.pos_inside(i, j)
+                                and {
+                                    "left": np.dot(v, d2) < 0,
+                                    "right": np.dot(v, d2) > 0,
+                                    "front": np.dot(v, d1) > 0,
+                                    "behind": np.dot(v, d1) < 0,
+                                }[loc]
+                            ):
+                                continue
+                            expected.append((cell, (i, j)))
+                    assert list(zip(objs, poss)) == expected
+
+                    # Tracked objects are found where they are moved to
+                    if objs:
+                        env.grid.set(*poss[0], None)
+                        _, tracked = desc.find_matching_objs(env, use_location=False)
+                        assert tracked == poss[1:]
+                        env.grid.set(*poss[0], objs[0])
+                        _, tracked = desc.find_matching_objs(env, use_location=False)
+                        assert tracked == poss
+    env.close()
+
+
+@pytest.mark.parametrize(
+    "env_id",
+    [
+        "BabyAI-GoToLocal-v0",
+        "BabyAI-PickupLoc-v0",
+        "BabyAI-Open-v0",
+        "BabyAI-PutNextLocal-v0",
+        "BabyAI-SynthSeq-v0",
+        "BabyAI-OpenDoorsOrderN4Debug-v0",
+        "BabyAI-PickupDistDebug-v0",
+    ],
+)
+def test_babyai_verifier_events(env_id, monkeypatch):
+    """Test that verifying instructions after the events they subscribe to
+    gives the same results as verifying them after every action."""
+    from minigrid.envs.babyai.core.verifier import ActionInstr
+    from minigrid.utils.baby_ai_bot import BabyAIBot
+
+    def rollouts():
+        results = []
+        for seed in range(3):
+            env = gym.make(env_id)
+            env.reset(seed=seed)
+            rng = np.random.default_rng(seed)
+
+            # Random actions, then the bot completes the mission
+            actions = rng.integers(len(Actions) - 1, size=8).tolist()
+            for step in range(200):
+                if step < len(actions):
+                    action = actions[step]
+                else:
+                    if step == len(actions):
+                        bot = BabyAIBot(env)
+                    action = bot.replan()
+                _, reward, terminated, truncated, _ = env.step(action)
+                results.append((action, reward, terminated, truncated))
+                if terminated or truncated:
+                    break
+            env.close()
+        return results
+
+    results = rollouts()
+    assert any(reward > 0 for _, reward, _, _ in results)
+    monkeypatch.setattr(
+        ActionInstr, "verify_events", lambda self, action, _: self.verify_action(action)
+    )
+    assert rollouts() == results
+
+
+def test_babyai_verifier_skipped_events():
+    """Test that instructions skipping events keep track of the state changes
+    that happened while they were not verified."""
+    from minigrid.core.events import Moved, PickedUp, Turned
+    from minigrid.envs.babyai.core.verifier import GoToInstr, ObjDesc, PickupInstr
+
+    env = gym.make("BabyAI-GoToObj-v0").unwrapped
+    env.reset(seed=0)
+    obj = env.grid.get(*env.instrs.desc.obj_poss[0])
+    desc = ObjDesc(obj.type, obj.color)
+
+    # The object was picked up while the instruction was not verified, so
+    # picking up again does not complete it
+    pos = env.instrs.desc.obj_poss[0]
+    pickup = PickupInstr(desc)
+    pickup.reset_verifier(env)
+    assert pickup.verify(Actions.forward, [Moved((1, 1))]) == "continue"
+    env.carrying = obj
+    assert pickup.verify(Actions.left, [Turned(3)]) == "continue"
+    assert pickup.verify(Actions.pickup, [PickedUp(obj, pos)]) == "continue"
+    env.carrying = None
+
+    # The result of the last verification is only reused at the next step
+    goto = GoToInstr(ObjDesc(obj.type, obj.color))
+    goto.reset_verifier(env)
+    x, y = goto.desc.obj_poss[0]
+    env.agent_pos, env.agent_dir = (x - 1, y), 0
+    assert goto.verify(Actions.forward, [Moved((x - 1, y))]) == "success"
+    env.step_count += 1
+    assert goto.verify(Actions.toggle, []) == "success"
+    env.step_count += 2
+    env.agent_dir = 2
+    assert goto.verify(Actions.toggle, []) == "continue"
+    env.close()
+
+
+def test_reset_stats(capsys):
+    """Test that resets record generator stats instead of printing rejections."""
+    env = gym.make("BabyAI-GoToLocal-v0")
+    total = ResetStats()
+    for seed in range(20):
+        env.reset(seed=seed)
+        stats = env.unwrapped.reset_stats
+        assert stats.num_resets == 1
+        assert stats.counters["place_obj_tries"] > 0
+        assert stats.counters["gen_retries"] == sum(stats.rejections.values())
+        assert stats.phase_times["gen_grid"] >= stats.phase_times["gen_mission"] > 0
+        total += stats
+    assert total.num_resets == 20
+    assert total.rejections["unreachable object"] > 0
+    assert capsys.readouterr().out == ""
+
+    # Generation methods called while stepping are not counted
+    env = gym.make("MiniGrid-Dynamic-Obstacles-8x8-v0")
+    env.reset(seed=0)
+    counters = dict(env.unwrapped.reset_stats.counters)
+    env.step(Actions.forward)
+    assert env.unwrapped.reset_stats.counters == counters
+
+
 @pytest.mark.parametrize(
     "env_spec",
     all_testing_env_specs,
@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import pickle
+
+import gymnasium as gym
+import numpy as np
+import pytest
+
+from minigrid.core.constants import OBJECT_TO_IDX
+from minigrid.core.grid import Grid
+from minigrid.core.visibility import compute_visibility, compute_visibility_batch
+from minigrid.core.world_object import Ball, Door, Goal, Key, Wall, WorldObj
+
+
+def make_grid(width: int = 7, height: int = 5, seed: int = 0) -> Grid:
+    rng = np.random.default_rng(seed)
+    grid = Grid(width, height)
+    grid.wall_rect(0, 0, width, height)
+    makers = [
+        lambda: None,
+        lambda: Wall(),
+        lambda: Ball("red"),
+        lambda: Key("yellow"),
+        lambda: Door("blue", is_open=bool(rng.integers(2))),
+        lambda: Goal(),
+    ]
+    for i in range(1, width - 1):
+        for j in range(1, height - 1):
+            grid.set(i, j, makers[rng.integers(len(makers))]())
+    return grid
+
+
+def reference_encode(grid: Grid) -> np.ndarray:
+    array = np.zeros((grid.width, grid.height, 3), dtype=np.uint8)
+    for i in range(grid.width):
+        for j in range(grid.height):
+            v = grid.get(i, j)
+            array[i, j] = (OBJECT_TO_IDX["empty"], 0, 0) if v is None else v.encode()
+    return array
+
+
+def test_grid_state_follows_objects():
+    grid = make_grid()
+    np.testing.assert_array_equal(grid.encode(), reference_encode(grid))
+
+    door = Door("green", is_locked=True)
+    grid.set(2, 2, door)
+    assert tuple(grid.state[2, 2]) == door.encode()
+
+    # Mutating an object in place updates the grid encoding
+    door.is_locked = False
+    door.is_open = True
+    assert tuple(grid.state[2, 2]) == door.encode()
+    door.color = "red"
+    assert tuple(grid.state[2, 2]) == door.encode()
+
+    # Objects removed from the grid no longer write to it
+    grid.set(2, 2, None)
+    door.is_open = False
+    np.testing.assert_array_equal(grid.encode(), reference_encode(grid))
+
+    with pytest.raises(ValueError):
+        grid.state[0, 0] = 0
+
+
+@pytest.mark.parametrize("top", [(0, 0), (-3, -2), (4, 1), (-2, 3), (5, 4)])
+def test_grid_slice_and_rotate(top):
+    grid = make_grid()
+    sub = grid.slice(*top, 5, 6)
+    for i in range(5):
+        for j in range(6):
+            x, y = top[0] + i, top[1] + j
+            if 0 <= x < grid.width and 0 <= y < grid.height:
+                assert sub.get(i, j) is grid.get(x, y)
+            else:
+                assert isinstance(sub.get(i, j), Wall)
+    np.testing.assert_array_equal(sub.encode(), reference_encode(sub))
+
+    rotated = sub.rotate_left()
+    assert (rotated.width, rotated.height) == (sub.height, sub.width)
+    for i in range(sub.width):
+        for j in range(sub.height):
+            assert rotated.get(j, sub.width - 1 - i) is sub.get(i, j)
+    np.testing.assert_array_equal(rotated.encode(), reference_encode(rotated))
+
+
+def test_grid_zobrist_hash_lazy():
+    """Test that the hash is only computed when read, and then kept up to date
+    as cells change."""
+    grid = make_grid()
+    view = grid.slice(1, 1, 5, 3)
+    assert grid._cell_keys is None and view._cell_keys is None
+
+    tracked = make_grid()
+    tracked.zobrist_hash
+    for other in (grid, tracked):
+        other.set(1, 1, Key("red"))
+        other.set(2, 1, None)
+        other.move_objs([((1, 1), (2, 1))])
+    assert grid._cell_keys is None
+    assert tracked._cell_keys is not None
+    assert tracked.zobrist_hash == grid.zobrist_hash
+    assert tracked.zobrist_hash != make_grid().zobrist_hash
+
+
+def test_grid_version():
+    """Test that every change to the grid bumps its version, and that stepping
+    an environment does not compute the hash of its grid."""
+    grid = make_grid()
+    versions = [grid.version]
+    grid.set(1, 1, Key("red"))
+    versions.append(grid.version)
+    grid.refresh_cell(grid.width + 1)
+    versions.append(grid.version)
+    grid.move_objs([((1, 1), (2, 1))])
+    versions.append(grid.version)
+    grid.restore(make_grid().snapshot())
+    versions.append(grid.version)
+    assert versions == sorted(set(versions))
+
+    env = gym.make("MiniGrid-Dynamic-Obstacles-16x16-v0").unwrapped
+    env.reset(seed=0)
+    for action in [2, 0, 2, 1, 2]:
+        env.step(action)
+    env.get_frame(highlight=True)
+    assert env.grid._cell_keys is None
+
+
+def test_grid_contains():
+    grid = make_grid()
+    ball = Ball("purple")
+    grid.set(1, 1, ball)
+    assert ball in grid
+    assert ("purple", "ball") in grid
+    assert (None, "ball") in grid
+    assert ("purple", "key") not in grid
+    assert ("red", "empty") not in grid
+    assert WorldObj("box", "red") not in grid
+
+
+def test_grid_find():
+    grid = make_grid(9, 7, seed=1)
+    for obj_type in [None, "ball", "door", "wall", "box", "empty", "sofa"]:
+        for color in [None, "red", "blue", "grey", "pink"]:
+            expected = [
+                (i, j)
+                for i in range(grid.width)
+                for j in range(grid.height)
+                if grid.get(i, j) is not None
+                and obj_type in (None, grid.get(i, j).type)
+                and color in (None, grid.get(i, j).color)
+            ]
+            assert grid.find(obj_type, color) == expected
+
+    key = Key("purple")
+    assert grid.obj_pos(key) is None
+    grid.set(3, 2, key)
+    assert grid.find("key", "purple") == [(3, 2)]
+    assert grid.obj_pos(key) == (3, 2)
+    assert make_grid(9, 7, seed=1).obj_pos(key) is None
+    grid.set(3, 2, None)
+    assert grid.find("key", "purple") == []
+    assert grid.obj_pos(key) is None
+
+
+def test_grid_encode_vis_mask():
+    grid = make_grid(9, 9, seed=3)
+    vis_mask = np.random.default_rng(0).integers(0, 2, (9, 9)).astype(bool)
+
+    expected = np.where(vis_mask[:, :, None], reference_encode(grid), 0)
+    encoded = grid.encode(vis_mask)
+    assert encoded.dtype == np.uint8
+    np.testing.assert_array_equal(encoded, expected)
+
+    # Invisible cells decode as unseen
+    decoded, decoded_mask = Grid.decode(encoded)
+    np.testing.assert_array_equal(decoded_mask, vis_mask)
+    np.testing.assert_array_equal(decoded.encode(decoded_mask), encoded)
+
+
+def reference_process_vis(opaque: np.ndarray, agent_pos) -> np.ndarray:
+    width, height = opaque.shape
+    mask = np.zeros(shape=(width, height), dtype=bool)
+    mask[agent_pos[0], agent_pos[1]] = True
+    for j in reversed(range(0, height)):
+        for i in range(0, width - 1):
+            if not mask[i, j] or opaque[i, j]:
+                continue
+            mask[i + 1, j] = True
+            if j > 0:
+                mask[i + 1, j - 1] = True
+                mask[i, j - 1] = True
+        for i in reversed(range(1, width)):
+            if not mask[i, j] or opaque[i, j]:
+                continue
+            mask[i - 1, j] = True
+            if j > 0:
+                mask[i - 1, j - 1] = True
+                mask[i, j - 1] = True
+    return mask
+
+
+@pytest.mark.parametrize("width,height", [(3, 3), (7, 7), (11, 5), (70, 4)])
+@pytest.mark.parametrize("use_cache", [True, False])
+def test_compute_visibility(width, height, use_cache):
+    rng = np.random.default_rng(width * height)
+    for density in (0.0, 0.2, 0.5):
+        for _ in range(20):
+            opaque = rng.random((width, height)) < density
+            agent_pos = (int(rng.integers(width)), int(rng.integers(height)))
+            np.testing.assert_array_equal(
+                compute_visibility(opaque, agent_pos, use_cache=use_cache),
+                reference_process_vis(opaque, agent_pos),
+            )
+
+
+def test_grid_process_vis():
+    grid = make_grid(7, 7, seed=5)
+    opaque = np.array(
+        [
+            [v is not None and not v.see_behind() for v in col]
+            for col in [[grid.get(i, j) for j in range(7)] for i in range(7)]
+        ]
+    )
+    expected = reference_process_vis(opaque, (3, 6))
+
+    mask = grid.process_vis((3, 6))
+    np.testing.assert_array_equal(mask, expected)
+    for i, j in zip(*np.nonzero(~mask)):
+        assert grid.get(i, j) is None
+    np.testing.assert_array_equal(grid.encode(), reference_encode(grid))
+
+
+@pytest.mark.parametrize("view_size", [3, 7, 11])
+def test_grid_gather_view(view_size):
+    grid = make_grid(9, 6, seed=view_size)
+    for agent_dir in range(4):
+        for x in range(grid.width):
+            for y in range(grid.height):
+                # Reference: slice the view extents and rotate them
+                topX, topY = {
+                    0: (x, y - view_size // 2),
+                    1: (x - view_size // 2, y),
+                    2: (x - view_size + 1, y - view_size // 2),
+                    3: (x - view_size // 2, y - view_size + 1),
+                }[agent_dir]
+                expected = grid.slice(topX, topY, view_size, view_size)
+                for _ in range(agent_dir + 1):
+                    expected = expected.rotate_left()
+
+                view = grid.view((x, y), agent_dir, view_size)
+                np.testing.assert_array_equal(view.encode(), expected.encode())
+                np.testing.assert_array_equal(view._opaque, expected._opaque)
+                for a, b in zip(view.grid, expected.grid):
+                    assert a is b or (isinstance(a, Wall) and isinstance(b, Wall))
+
+
+def test_grid_copy_after_padding():
+    grid = make_grid(6, 6)
+    grid.gather_view((2, 2), 0, 7)
+    for other in (grid.copy(), pickle.loads(pickle.dumps(grid))):
+        assert other == grid
+        door = Door("red")
+        other.set(1, 1, door)
+        door.is_open = True
+        state, _ = other.gather_view((1, 2), 3, 3)
+        assert tuple(state[1, 1]) == door.encode()
+        assert other != grid
+
+
+def test_compute_visibility_batch():
+    rng = np.random.default_rng(1)
+    opaque = rng.random((50, 7, 7)) < 0.3
+    masks = compute_visibility_batch(opaque, (3, 6))
+    for grid_opaque, mask in zip(opaque, masks):
+        np.testing.assert_array_equal(mask, reference_process_vis(grid_opaque, (3, 6)))
+
+
+@pytest.mark.parametrize("tile_size", [8, 13])
+def test_grid_render_atlas(tile_size):
+    rng = np.random.default_rng(tile_size)
+    grid = make_grid(9, 6, seed=tile_size)
+    for agent_dir in (None, 0, 1, 2, 3):
+        agent_pos = (int(rng.integers(9)), int(rng.integers(6)))
+        highlight_mask = rng.random((9, 6)) < 0.5
+        for mask in (None, highlight_mask):
+            np.testing.assert_array_equal(
+                grid.render(tile_size, agent_pos, agent_dir, mask),
+                grid._render_cells(tile_size, agent_pos, agent_dir, mask),
+            )
+
+    # Encodings outside of the atlas are rendered cell by cell
+    grid.set(1, 1, Ball("red"))
+    grid.get(1, 1).encode = lambda: (OBJECT_TO_IDX["ball"], 0, 9)
+    grid.refresh_cell(grid.width + 1)
+    assert grid.tile_codes() is None
+    assert grid.render(tile_size, (1, 1), 0).shape == (6 * tile_size, 9 * tile_size, 3)
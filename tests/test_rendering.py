@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import math
+
+import gymnasium as gym
+import numpy as np
+import pytest
+
+from minigrid.core.grid import Grid
+from minigrid.core.tile_cache import TileCache
+from minigrid.utils.rendering import (
+    fill_coords,
+    pixel_coords,
+    point_in_circle,
+    point_in_line,
+    point_in_rect,
+    point_in_triangle,
+    rotate_fn,
+)
+
+SHAPES = [
+    point_in_rect(0.12, 0.88, 0.47, 0.53),
+    point_in_circle(0.56, 0.28, 0.19),
+    point_in_line(0.1, 0.3, 0.3, 0.6, r=0.03),
+    point_in_triangle((0.12, 0.19), (0.87, 0.50), (0.12, 0.81)),
+    rotate_fn(
+        point_in_triangle((0.12, 0.19), (0.87, 0.50), (0.12, 0.81)),
+        cx=0.5,
+        cy=0.5,
+        theta=0.5 * math.pi * 3,
+    ),
+]
+
+
+@pytest.mark.parametrize("fn", SHAPES)
+def test_fill_coords_matches_pixel_loop(fn):
+    img = np.zeros((24, 30, 3), dtype=np.uint8)
+    fill_coords(img, fn, (255, 0, 0))
+
+    # The shapes still accept scalar coordinates
+    expected = np.zeros_like(img)
+    for y in range(img.shape[0]):
+        for x in range(img.shape[1]):
+            if fn((x + 0.5) / img.shape[1], (y + 0.5) / img.shape[0]):
+                expected[y, x] = (255, 0, 0)
+
+    np.testing.assert_array_equal(img, expected)
+    assert img.any()
+
+
+@pytest.mark.parametrize(
+    "fn",
+    [
+        lambda x, y: x < 0.5 and y < 0.5,
+        lambda x, y: math.hypot(x - 0.5, y - 0.5) < 0.3,
+        lambda x, y: True,
+    ],
+)
+def test_fill_coords_scalar_filters(fn):
+    """Test that filters written for scalar coordinates still work."""
+    img = np.zeros((24, 30, 3), dtype=np.uint8)
+    fill_coords(img, fn, (255, 0, 0))
+
+    expected = np.zeros_like(img)
+    for y in range(img.shape[0]):
+        for x in range(img.shape[1]):
+            if fn((x + 0.5) / img.shape[1], (y + 0.5) / img.shape[0]):
+                expected[y, x] = (255, 0, 0)
+
+    np.testing.assert_array_equal(img, expected)
+    assert img.any()
+
+
+def test_pixel_coords():
+    xs, ys = pixel_coords(2, 4)
+    np.testing.assert_allclose(xs[0], [0.125, 0.375, 0.625, 0.875])
+    np.testing.assert_allclose(ys[:, 0], [0.25, 0.75])
+    assert not xs.flags.writeable
+
+
+def test_tile_cache_eviction():
+    cache = TileCache(max_tiles=3)
+    for i in range(4):
+        cache[(None, False, i)] = np.zeros((i + 1, i + 1, 3), dtype=np.uint8)
+    assert (None, False, 0) not in cache and len(cache) == 3
+    assert cache.evictions == 1
+    assert cache.nbytes == 3 * (4 + 9 + 16)
+
+    # Lookups refresh the entries
+    assert cache.get((None, False, 1)) is not None
+    assert cache.get((None, False, 0)) is None
+    cache[(None, False, 4)] = np.zeros((1, 1, 3), dtype=np.uint8)
+    assert (None, False, 1) in cache and (None, False, 2) not in cache
+    assert (cache.hits, cache.misses, cache.evictions) == (1, 1, 2)
+
+    cache = TileCache(max_bytes=100)
+    for i in range(4):
+        cache[(None, False, i)] = np.zeros((4, 4, 3), dtype=np.uint8)
+    assert len(cache) == 2 and cache.nbytes == 96
+
+
+def test_tile_cache_bounds_atlases(monkeypatch):
+    """Test that the tile atlases are counted against the bounds of the cache
+    and dropped by `clear`."""
+    env = gym.make("MiniGrid-DoorKey-6x6-v0")
+    env.reset(seed=0)
+    tile_sizes = [8, 12, 16, 24, 32, 48]
+    monkeypatch.setattr(Grid, "tile_cache", TileCache())
+    expected = [env.unwrapped.get_frame(tile_size=size) for size in tile_sizes]
+    assert all(Grid.tile_cache.get_atlas(size) for size in tile_sizes)
+    nbytes = Grid.tile_cache.nbytes
+    tile_bytes = sum(Grid.tile_cache[key].nbytes for key in Grid.tile_cache)
+    assert nbytes > tile_bytes
+
+    Grid.tile_cache.clear()
+    assert Grid.tile_cache.nbytes == 0
+    assert not any(Grid.tile_cache.get_atlas(size) for size in tile_sizes)
+
+    max_bytes = nbytes // 4
+    monkeypatch.setattr(Grid, "tile_cache", TileCache(max_bytes=max_bytes))
+    for _ in range(2):
+        for size, frame in zip(tile_sizes, expected):
+            np.testing.assert_array_equal(
+                env.unwrapped.get_frame(tile_size=size), frame
+            )
+            assert Grid.tile_cache.nbytes <= max_bytes
+    assert Grid.tile_cache.evictions > 0
+
+
+def test_tile_cache_warm_and_persist(tmp_path, monkeypatch):
+    monkeypatch.setattr(Grid, "tile_cache", TileCache())
+
+    env = gym.make("MiniGrid-DoorKey-6x6-v0")
+    env.reset(seed=0)
+    env.action_space.seed(0)
+    Grid.tile_cache.warm([8, 16], [env])
+    assert len(Grid.tile_cache) > 0
+    warmed = len(Grid.tile_cache)
+    misses = Grid.tile_cache.misses
+
+    # Frames only use warmed tiles, whatever the agent does
+    for _ in range(100):
+        env.unwrapped.get_frame(tile_size=8)
+        env.unwrapped.get_frame(tile_size=16, agent_pov=True)
+        _, _, terminated, truncated, _ = env.step(env.action_space.sample())
+        if terminated or truncated:
+            break
+    assert Grid.tile_cache.misses == misses
+    assert len(Grid.tile_cache) == warmed
+
+    path = tmp_path / "tiles.npz"
+    Grid.tile_cache.save(str(path))
+    loaded = TileCache()
+    loaded.load(str(path))
+    assert len(loaded) == warmed
+    for key in Grid.tile_cache:
+        tile = loaded[key]
+        assert isinstance(tile, np.memmap)
+        np.testing.assert_array_equal(tile, Grid.tile_cache[key])
+
+    # Frames rendered from the loaded tiles are unchanged
+    expected = env.unwrapped.get_frame(tile_size=16)
+    monkeypatch.setattr(Grid, "tile_cache", loaded)
+    np.testing.assert_array_equal(env.unwrapped.get_frame(tile_size=16), expected)
+    assert loaded.misses == 0
@@ -2,11 +2,15 @@ from __future__ import annotations
 
 import gymnasium as gym
 import numpy as np
+import pytest
 from pytest_mock import MockerFixture
 
+from minigrid import demos
 from minigrid.benchmark import benchmark
+from minigrid.demos import generate_demos, load_demos, main
 from minigrid.manual_control import ManualControl
 from minigrid.minigrid_env import MiniGridEnv
+from minigrid.utils.baby_ai_bot import BotStuckError
 
 
 def test_benchmark():
@@ -15,6 +19,71 @@ def test_benchmark():
     benchmark(env_id, num_resets=10, num_frames=100)
 
 
+def test_generate_demos(tmp_path, mocker: MockerFixture):
+    "Test that demos replay the bot episodes and that generation resumes"
+    env_id = "BabyAI-GoToLocal-v0"
+    totals = generate_demos([env_id], range(5), str(tmp_path), shard_size=2)
+    assert totals[env_id]["num_demos"] + totals[env_id]["num_failed"] == 5
+
+    shards = list(load_demos(str(tmp_path), env_id))
+    assert [len(shard) + len(shard.failed_seeds) for shard in shards] == [2, 2, 1]
+    env = gym.make(env_id)
+    for shard in shards:
+        assert shard.images.dtype == np.uint8 and shard.actions.dtype == np.int8
+        assert len(shard.missions) == len(set(shard.missions))
+        for i in range(len(shard)):
+            demo = shard[i]
+            obs, _ = env.reset(seed=demo["seed"])
+            assert obs["mission"] == demo["mission"]
+            for image, direction, action in zip(
+                demo["images"], demo["directions"], demo["actions"]
+            ):
+                assert np.array_equal(obs["image"], image)
+                assert obs["direction"] == direction
+                obs, reward, terminated, _, _ = env.step(action)
+            assert terminated and reward > 0
+    env.close()
+
+    # Shards already written are not generated again
+    (tmp_path / env_id / "seeds_000000002_000000004.npz").unlink()
+    spy = mocker.spy(demos, "generate_shard")
+    argv = [env_id, "--seeds", "0", "5", "--shard-size", "2", "--out", str(tmp_path)]
+    main(argv + ["--workers", "0"])
+    assert [call.args[2] for call in spy.call_args_list] == [
+        str(tmp_path / env_id / "seeds_000000002_000000004.npz")
+    ]
+    main(argv + ["--workers", "0"])
+    assert spy.call_count == 1
+    assert len(list(load_demos(str(tmp_path), env_id))) == 3
+
+    # The last shard of a run over fewer seeds is completed
+    totals = generate_demos([env_id], range(8), str(tmp_path), shard_size=2)
+    assert totals[env_id]["num_demos"] + totals[env_id]["num_failed"] == 8
+    assert [list(call.args[1]) for call in spy.call_args_list[1:]] == [
+        [4, 5],
+        [6, 7],
+    ]
+    seeds = [
+        seed
+        for shard in load_demos(str(tmp_path), env_id)
+        for seed in [*shard.seeds, *shard.failed_seeds]
+    ]
+    assert sorted(seeds) == list(range(8))
+
+
+def test_rollout_errors(mocker: MockerFixture):
+    "Test that rollouts fail when the bot is stuck, and raise other errors"
+    env = gym.make("BabyAI-GoToLocal-v0")
+    assert demos.rollout(env, 0) is not None
+    replan = mocker.patch.object(demos.BabyAIBot, "replan")
+    replan.side_effect = BotStuckError("nothing left to explore")
+    assert demos.rollout(env, 0) is None
+    replan.side_effect = KeyError("color")
+    with pytest.raises(KeyError):
+        demos.rollout(env, 0)
+    env.close()
+
+
 def test_manual_control(mocker: MockerFixture):
     class FakeRandomKeyboardEvent:
         active_actions = ["left", "right", "up", " ", "pageup", "pagedown"]
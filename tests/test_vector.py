@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import gymnasium as gym
+import numpy as np
+import pytest
+
+from minigrid.vector import MiniGridVectorEnv, SharedMemoryVectorEnv
+
+NUM_ENVS = 4
+NUM_STEPS = 300
+
+
+@pytest.mark.parametrize(
+    "env_id",
+    [
+        "MiniGrid-Empty-Random-6x6-v0",
+        "MiniGrid-FourRooms-v0",
+        "MiniGrid-DoorKey-5x5-v0",
+        "MiniGrid-LavaGapS5-v0",
+        "MiniGrid-LavaCrossingS9N1-v0",
+        "MiniGrid-SimpleCrossingS9N2-v0",
+        "MiniGrid-MultiRoom-N2-S4-v0",
+    ],
+)
+def test_vector_env_matches_single_envs(env_id):
+    envs = MiniGridVectorEnv(env_id, num_envs=NUM_ENVS)
+    singles = [gym.make(env_id).unwrapped for _ in range(NUM_ENVS)]
+
+    obs, _ = envs.reset(seed=7)
+    single_obs = [env.reset(seed=7 + i)[0] for i, env in enumerate(singles)]
+    needs_reset = [False] * NUM_ENVS
+
+    rng = np.random.default_rng(0)
+    for _ in range(NUM_STEPS):
+        for i in range(NUM_ENVS):
+            np.testing.assert_array_equal(obs["image"][i], single_obs[i]["image"])
+            assert obs["direction"][i] == single_obs[i]["direction"]
+            assert obs["mission"][i] == single_obs[i]["mission"]
+        assert envs.observation_space.contains(obs)
+
+        actions = rng.integers(0, envs.single_action_space.n, NUM_ENVS)
+        obs, reward, terminated, truncated, _ = envs.step(actions)
+
+        for i, env in enumerate(singles):
+            if needs_reset[i]:
+                # Next-step autoreset
+                single_obs[i], _ = env.reset()
+                needs_reset[i] = False
+                assert (reward[i], terminated[i], truncated[i]) == (0, False, False)
+                continue
+
+            single_obs[i], rew, term, trunc, _ = env.step(int(actions[i]))
+            assert (reward[i], terminated[i], truncated[i]) == (rew, term, trunc)
+            needs_reset[i] = term or trunc
+
+    envs.close()
+
+
+def test_vector_env_unsupported():
+    with pytest.raises(ValueError, match="not supported"):
+        MiniGridVectorEnv("MiniGrid-Dynamic-Obstacles-5x5-v0", num_envs=2)
+
+
+@pytest.mark.parametrize("copy", [True, False])
+def test_shared_memory_vector_env_matches_single_envs(copy):
+    # Missions change between episodes in GoToDoor
+    env_id = "BabyAI-GoToDoor-v0"
+    envs = SharedMemoryVectorEnv(
+        [lambda: gym.make(env_id)] * NUM_ENVS, num_workers=3, num_slots=2, copy=copy
+    )
+    singles = [gym.make(env_id).unwrapped for _ in range(NUM_ENVS)]
+
+    obs, _ = envs.reset(seed=7)
+    single_obs = [env.reset(seed=7 + i)[0] for i, env in enumerate(singles)]
+    needs_reset = [False] * NUM_ENVS
+
+    rng = np.random.default_rng(0)
+    for _ in range(100):
+        for i in range(NUM_ENVS):
+            np.testing.assert_array_equal(obs["image"][i], single_obs[i]["image"])
+            assert obs["direction"][i] == single_obs[i]["direction"]
+            assert obs["mission"][i] == single_obs[i]["mission"]
+        assert envs.observation_space.contains(obs)
+
+        actions = rng.integers(0, envs.single_action_space.n, NUM_ENVS)
+        obs, reward, terminated, truncated, _ = envs.step(actions)
+
+        for i, env in enumerate(singles):
+            if needs_reset[i]:
+                single_obs[i], _ = env.reset()
+                needs_reset[i] = False
+                assert (reward[i], terminated[i], truncated[i]) == (0, False, False)
+                continue
+
+            single_obs[i], rew, term, trunc, _ = env.step(int(actions[i]))
+            assert (reward[i], terminated[i], truncated[i]) == (rew, term, trunc)
+            needs_reset[i] = term or trunc
+
+    envs.close()
+    assert all(not process.is_alive() for process in envs._processes)
+
+
+def test_shared_memory_vector_env_worker_error():
+    envs = SharedMemoryVectorEnv(
+        [lambda: gym.make("MiniGrid-Empty-5x5-v0")] * 2, num_workers=2
+    )
+    envs.reset(seed=0)
+    with pytest.raises(RuntimeError, match="failed"):
+        envs.step(np.array([0, 100]))
+    assert envs.closed
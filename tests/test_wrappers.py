@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import math
+import pickle
 import warnings
 
 import gymnasium as gym
@@ -8,7 +9,8 @@ import numpy as np
 import pytest
 
 from minigrid.core.actions import Actions
-from minigrid.core.constants import OBJECT_TO_IDX
+from minigrid.core.constants import COLOR_TO_IDX, OBJECT_TO_IDX, STATE_TO_IDX
+from minigrid.core.level_bank import LevelBank
 from minigrid.envs import EmptyEnv
 from minigrid.wrappers import (
     ActionBonus,
@@ -17,6 +19,7 @@ from minigrid.wrappers import (
     FlatObsWrapper,
     FullyObsWrapper,
     ImgObsWrapper,
+    LevelBankWrapper,
     NoDeath,
     OneHotPartialObsWrapper,
     PositionBonus,
@@ -26,6 +29,7 @@ from minigrid.wrappers import (
     StochasticActionWrapper,
     SymbolicObsWrapper,
     ViewSizeWrapper,
+    one_hot_encode,
 )
 from tests.utils import all_testing_env_specs, assert_equals, minigrid_testing_env_specs
 
@@ -81,6 +85,41 @@ def test_reseed_wrapper(env_spec):
     unwrapped_env.close()
 
 
+@pytest.mark.parametrize(
+    "env_spec", all_testing_env_specs, ids=[spec.id for spec in all_testing_env_specs]
+)
+def test_level_bank_wrapper(env_spec, tmp_path):
+    """
+    Test that resetting from a LevelBank gives the same episodes as
+    regenerating the levels.
+    """
+    bank = LevelBank.generate(env_spec.id, SEEDS[:2], str(tmp_path / "bank.npz"))
+    generated_env = env_spec.make()
+    env = LevelBankWrapper(env_spec.make(), str(tmp_path / "bank.npz"))
+    env.action_space.seed(0)
+
+    # Resetting without a seed starts from the first level of the bank. Some
+    # levels depend on the previous ones, reset both environments in the
+    # order the bank was generated in.
+    for seed in [None, *SEEDS[1:]]:
+        obs, _ = env.reset(seed=seed)
+        generated_obs, _ = generated_env.reset(seed=seed or SEEDS[0])
+        assert_equals(obs, generated_obs)
+        assert env.unwrapped.hash() == generated_env.unwrapped.hash()
+        if seed in SEEDS[:2]:
+            assert obs["mission"] == bank.missions[bank.index(seed)]
+
+        for time_step in range(20):
+            action = env.action_space.sample()
+            step = env.step(action)
+            assert_equals(step, generated_env.step(action), f"[{time_step}] ")
+            if step[2] or step[3]:
+                break
+
+    env.close()
+    generated_env.close()
+
+
 @pytest.mark.parametrize("env_id", ["MiniGrid-Empty-16x16-v0"])
 def test_position_bonus_wrapper(env_id):
     env = gym.make(env_id)
@@ -260,6 +299,56 @@ def test_agent_sees_method(wrapper):
         assert np.array_equal(obs1[key], obs2[key])
 
 
+@pytest.mark.parametrize(
+    "wrapper",
+    [
+        RGBImgObsWrapper,
+        RGBImgPartialObsWrapper,
+        FullyObsWrapper,
+        SymbolicObsWrapper,
+        ViewSizeWrapper,
+    ],
+)
+def test_image_replacing_wrappers(wrapper):
+    """Test that wrappers replacing the image skip computing the partial one,
+    without changing their observations nor those of the environment used
+    directly."""
+    env = wrapper(gym.make("MiniGrid-DoorKey-8x8-v0"))
+    assert env.skips_obs_image
+    reference = wrapper(gym.make("MiniGrid-DoorKey-8x8-v0"))
+    reference.skips_obs_image = False
+
+    actions = np.random.default_rng(0).integers(0, 6, NUM_STEPS).tolist()
+    obs, _ = env.reset(seed=SEEDS[0])
+    assert_equals(obs, reference.reset(seed=SEEDS[0])[0])
+    for action in actions:
+        assert_equals(env.step(action), reference.step(action))
+    inner_obs, _ = env.env.reset(seed=SEEDS[0])
+    assert_equals(inner_obs, reference.env.reset(seed=SEEDS[0])[0])
+
+    # Wrappers in between may use the image, unless they declare otherwise
+    assert not wrapper(OneHotPartialObsWrapper(env.env)).skips_obs_image
+    assert wrapper(PositionBonus(env.env)).skips_obs_image
+
+    class ImageReader(gym.Wrapper):
+        def step(self, action):
+            obs, *rest = self.env.step(action)
+            assert obs["image"].any()
+            return obs, *rest
+
+    class ImageReadingBonus(PositionBonus):
+        step = ImageReader.step
+
+    for inner in (ImageReader(env.env), ImageReadingBonus(env.env)):
+        reader = wrapper(inner)
+        assert not reader.skips_obs_image
+        reader.reset(seed=SEEDS[0])
+        reader.step(0)
+
+    env.close()
+    reference.close()
+
+
 @pytest.mark.parametrize("view_size", [5, 7, 9])
 def test_viewsize_wrapper(view_size):
     env = gym.make("MiniGrid-Empty-5x5-v0")
@@ -361,6 +450,144 @@ def test_dict_observation_space_doesnt_clash_with_one_hot():
     env.close()
 
 
+def test_one_hot_encode():
+    num_types, num_colors = len(OBJECT_TO_IDX), len(COLOR_TO_IDX)
+    rng = np.random.default_rng(0)
+    images = np.stack(
+        [
+            rng.integers(0, num_types, (4, 7, 7)),
+            rng.integers(0, num_colors, (4, 7, 7)),
+            rng.integers(0, len(STATE_TO_IDX), (4, 7, 7)),
+        ],
+        axis=-1,
+    ).astype(np.uint8)
+
+    expected = np.zeros((4, 7, 7, 20), dtype=np.uint8)
+    for n, i, j in np.ndindex(4, 7, 7):
+        type, color, state = images[n, i, j]
+        expected[n, i, j, type] = 1
+        expected[n, i, j, num_types + color] = 1
+        expected[n, i, j, num_types + num_colors + state] = 1
+
+    batch = one_hot_encode(images)
+    assert batch.dtype == np.uint8
+    assert np.array_equal(batch, expected)
+    assert np.array_equal(one_hot_encode(images[2]), expected[2])
+
+    env = OneHotPartialObsWrapper(gym.make("MiniGrid-DoorKey-8x8-v0"))
+    obs, _ = env.reset(seed=1)
+    image = env.unwrapped.gen_obs()["image"]
+    assert np.array_equal(obs["image"], one_hot_encode(image))
+    assert obs["image"] in env.observation_space["image"]
+    env.close()
+
+
+def test_flat_obs_wrapper_missions():
+    env = FlatObsWrapper(gym.make("MiniGrid-Empty-5x5-v0"), maxStrLen=32)
+    image = np.arange(7 * 7 * 3, dtype=np.uint8).reshape(7, 7, 3)
+
+    def expected(mission):
+        chars = np.zeros((32, 28), dtype=np.uint8)
+        for idx, ch in enumerate(mission.lower()):
+            chars[idx, "abcdefghijklmnopqrstuvwxyz ,".index(ch)] = 1
+        return np.concatenate((image.flatten(), chars.flatten()))
+
+    # Alternating missions are encoded from the cache
+    for mission in ["Go to the goal", "pick up a key, then open a door"] * 2:
+        obs = env.observation({"image": image, "mission": mission})
+        assert obs in env.observation_space
+        assert np.array_equal(obs, expected(mission))
+    assert obs is not env.observation({"image": image, "mission": mission})
+
+    with pytest.raises(ValueError, match="Character 2"):
+        env.observation({"image": image, "mission": "go to room 2"})
+    with pytest.raises(ValueError, match="Character é"):
+        env.observation({"image": image, "mission": "café"})
+
+    env = FlatObsWrapper(env.env, maxStrLen=32, reuse_buffer=True)
+    first = env.observation({"image": image, "mission": "go to the goal"})
+    second = env.observation({"image": image, "mission": "open the door"})
+    assert first is second
+    assert np.array_equal(second, expected("open the door"))
+    env.close()
+
+
+def test_dict_observation_space_wrapper_missions():
+    env = gym.make("MiniGrid-Empty-5x5-v0")
+    wrappers = [DictObservationSpaceWrapper(env) for _ in range(2)]
+    assert wrappers[0]._word_indices is wrappers[1]._word_indices
+
+    for mission in ["get to the green goal square", "pick up the key, then open"]:
+        obs = wrappers[0].observation({"mission": mission})
+        indices = wrappers[0].string_to_indices(mission)
+        assert obs["mission"] == indices + [0] * (50 - len(indices))
+        assert obs["mission"] in wrappers[0].observation_space["mission"]
+
+        # Observations can be modified without affecting the cache
+        obs["mission"].append(0)
+        assert wrappers[1].observation({"mission": mission})["mission"] == (
+            indices + [0] * (50 - len(indices))
+        )
+
+    with pytest.raises(ValueError, match="Unknown word: sofa"):
+        wrappers[0].observation({"mission": "go to the sofa"})
+
+    # Missions are converted with the current vocabulary and the conversion
+    # of subclasses
+    with pytest.raises(TypeError):
+        wrappers[0].word_dict["sofa"] = 0
+    wrappers[0].word_dict = {**wrappers[0].word_dict, "sofa": 99}
+    assert wrappers[0].observation({"mission": "go to the sofa"})["mission"][3] == 100
+    with pytest.raises(ValueError, match="Unknown word: sofa"):
+        wrappers[1].observation({"mission": "go to the sofa"})
+
+    class LowerCaseWrapper(DictObservationSpaceWrapper):
+        def string_to_indices(self, string, offset=1):
+            return super().string_to_indices(string.lower(), offset)
+
+    restored = pickle.loads(pickle.dumps(wrappers[0]))
+    assert restored.observation({"mission": "go to the sofa"})["mission"][3] == 100
+
+    obs = LowerCaseWrapper(env).observation({"mission": "Go to the Key"})
+    assert (
+        obs["mission"]
+        == wrappers[1].observation({"mission": "go to the key"})["mission"]
+    )
+    env.close()
+
+
+@pytest.mark.parametrize("wrapper", [FullyObsWrapper, SymbolicObsWrapper])
+def test_full_grid_wrappers_reuse_buffer(wrapper):
+    env = wrapper(gym.make("BabyAI-GoToLocal-v0"))
+    reused = wrapper(gym.make("BabyAI-GoToLocal-v0"), reuse_buffer=True)
+    obs, _ = env.reset(seed=3)
+    reused_obs, _ = reused.reset(seed=3)
+    images = [obs["image"]]
+    for action in [0, 2, 2, 1, 2, 3]:
+        obs, *_ = env.step(action)
+        new_obs, *_ = reused.step(action)
+        assert new_obs["image"] is reused_obs["image"]
+        assert np.array_equal(new_obs["image"], obs["image"])
+        assert new_obs["image"].dtype == obs["image"].dtype
+        images.append(obs["image"])
+
+    # Without reusing the buffer, earlier observations are not modified
+    assert all(image is not images[-1] for image in images[:-1])
+    grid = env.unwrapped.grid
+    x, y = env.unwrapped.agent_pos
+    if wrapper is SymbolicObsWrapper:
+        ids = [-1 if obj is None else OBJECT_TO_IDX[obj.type] for obj in grid.grid]
+        expected = np.array(ids).reshape(grid.height, grid.width).T
+        expected[x, y] = OBJECT_TO_IDX["agent"]
+        assert np.array_equal(images[-1][:, :, 2], expected)
+        assert np.array_equal(images[-1][3, 5, :2], [3, 5])
+    else:
+        agent = [OBJECT_TO_IDX["agent"], 0, env.unwrapped.agent_dir]
+        assert np.array_equal(images[-1][x, y], agent)
+    env.close()
+    reused.close()
+
+
 def test_no_death_wrapper():
     death_cost = -1
 
@@ -380,11 +607,11 @@ def test_no_death_wrapper():
     env_wrap.close()
 
     env = gym.make("MiniGrid-Dynamic-Obstacles-5x5-v0")
-    _, _ = env.reset(seed=2)
+    _, _ = env.reset(seed=9)
     _, reward, term, *_ = env.step(2)
 
     env = NoDeath(env, ("ball",), death_cost)
-    _, _ = env.reset(seed=2)
+    _, _ = env.reset(seed=9)
     _, reward_wrap, term_wrap, *_ = env.step(2)
 
     assert term and not term_wrap